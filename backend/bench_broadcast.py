@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: time spent in broadcast() per tick as dashboards are added,
+sequential send_json (previous ConnectionManager) vs encode-once + per-client queues.
+Each fake socket takes 1 ms per send; one in ten is a slow tab taking 50 ms.
+Usage: python bench_broadcast.py [clients ...]   (default: 10 100 500)
+"""
+import asyncio
+import json
+import sys
+import time
+from bench_simulation import synthetic_patients
+from broadcast import ConnectionManager
+from explainability import ExplainabilityEngine
+from simulation import VitalsSimulation
+
+class FakeSocket:
+    def __init__(self, delay):
+        self.delay = delay
+        self.frames = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.frames += 1
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+def sockets(n):
+    return [FakeSocket(0.05 if i % 10 == 0 else 0.001) for i in range(n)]
+
+async def legacy_tick(clients, message):
+    # Previous broadcast: one send_json (and one encode) per client, awaited in turn
+    start = time.perf_counter()
+    for ws in clients:
+        await ws.send_json(message)
+    return time.perf_counter() - start
+
+async def run(n, message, ticks=5):
+    legacy_ms = (await legacy_tick(sockets(n), message)) * 1000
+
+    manager = ConnectionManager(max_queue=2)
+    clients = sockets(n)
+    for ws in clients:
+        await manager.connect(ws)
+    tick_ms = 0.0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        await manager.broadcast(message)
+        tick_ms += (time.perf_counter() - start) * 1000 / ticks
+        await asyncio.sleep(0.01)  # ticks are 2 s apart in the server; slow tabs fall behind here
+    await asyncio.sleep(0.2)
+    stats = manager.stats()
+    print(f"{n:>5} clients | sequential {legacy_ms:9.1f} ms/tick | queued {tick_ms:6.2f} ms/tick | dropped frames {stats['dropped_frames']}")
+    for ws in clients:
+        manager.disconnect(ws)
+
+async def main(sizes):
+    sim = VitalsSimulation(synthetic_patients(500), seed=0, explain_engine=ExplainabilityEngine())
+    sim.tick()
+    sim.tick()
+    message = {"type": "delta", "seq": sim.ticks, "patients": sim.changes()}
+    print(f"Broadcast of one delta frame ({len(json.dumps(message)) / 1000:.0f} kB)")
+    for n in sizes:
+        await run(n, message)
+
+if __name__ == "__main__":
+    asyncio.run(main([int(s) for s in sys.argv[1:]] or [10, 100, 500]))
@@ -0,0 +1,40 @@
+"""
+Benchmark: importing a transfer batch of discharge summaries.
+Previous flow: one /upload_doc + one /predict round trip per document.
+Bulk flow: one /import_docs request (parallel extraction, one model call).
+Usage: python bench_bulk_import.py [documents] [pages per document]   (default: 50 20)
+"""
+import sys
+import time
+import orjson
+from fastapi.testclient import TestClient
+import main
+from test_pdf_extract import make_pdf, SUMMARY
+
+def per_document(client, pdfs):
+    start = time.perf_counter()
+    for name, content in pdfs:
+        extracted = client.post('/upload_doc', files={'file': (name, content, 'application/pdf')}).json()
+        patient = dict(extracted['extracted_data'], Medical_Notes=extracted['medical_notes'])
+        client.post('/predict', json=patient).raise_for_status()
+    return time.perf_counter() - start
+
+def bulk(client, pdfs):
+    start = time.perf_counter()
+    response = client.post('/import_docs', files=[('files', (name, content, 'application/pdf')) for name, content in pdfs])
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    assert sum(1 for l in lines if l['type'] == 'triage' and l['status'] == 'ok') == len(pdfs)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pdfs = [(f"summary_{i}.pdf", make_pdf(pages, SUMMARY)) for i in range(n)]
+    with TestClient(main.app) as client:
+        bulk(client, pdfs[:2])  # warm up models and the PDF worker pool
+        legacy = per_document(client, pdfs)
+        main.doctor_registry.reset()
+        fast = bulk(client, pdfs)
+    print(f"{n} documents x {pages} pages (PDF workers: {main.pdf_extract.PDF_WORKERS})")
+    print(f"  per-document round trips: {legacy:6.2f} s  {n / legacy:7.1f} docs/s")
+    print(f"  /import_docs:             {fast:6.2f} s  {n / fast:7.1f} docs/s")
@@ -0,0 +1,32 @@
+"""
+Benchmark: synthetic data generation, row-by-row generate_patient_data vs the vectorized,
+chunked writer (write_patient_data) with 1..N worker processes.
+The row-by-row generator is timed on a smaller sample and reported as rows/s.
+Usage: python bench_data_gen.py [rows] [max workers]   (default: 1000000, all cores)
+"""
+import os
+import sys
+import tempfile
+import time
+from data_gen import generate_patient_data, write_patient_data
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    print(f"{n} rows, {os.cpu_count()} cores")
+
+    sample = 5000
+    start = time.perf_counter()
+    generate_patient_data(sample)
+    legacy = sample / (time.perf_counter() - start)
+    print(f"  row-by-row:           {legacy:>10,.0f} rows/s  (~{n / legacy:.0f} s for {n} rows, in memory)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patients.csv')
+        workers = 1
+        while workers <= max_workers:
+            start = time.perf_counter()
+            write_patient_data(path, n, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"  vectorized, {workers} worker(s): {n / elapsed:>10,.0f} rows/s  ({elapsed:.1f} s, {os.path.getsize(path) / 1e6:.0f} MB CSV)")
+            workers *= 2
@@ -0,0 +1,48 @@
+"""
+Micro-benchmark: population percentile lookup, full-column scan vs PercentileIndex.
+Usage: python bench_population.py [rows ...]   (default: 5000 500000 5000000)
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from population import PercentileIndex
+
+def synthetic_population(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Age': rng.integers(1, 91, n),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'BP_Systolic': rng.integers(90, 220, n),
+        'BP_Diastolic': rng.integers(60, 105, n),
+        'Heart_Rate': rng.integers(60, 150, n),
+        'Temperature': rng.uniform(36.1, 40.5, n).round(1),
+        'O2_Saturation': rng.integers(70, 100, n),
+    })
+
+def time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6  # microseconds
+
+def run(n):
+    df = synthetic_population(n)
+
+    start = time.perf_counter()
+    index = PercentileIndex.from_frame(df)
+    build_s = time.perf_counter() - start
+
+    cohort = int(index.cohort_codes([45], ['Male'])[0])
+    repeat_scan = max(3, 2000000 // n)
+    scan_us = time_per_call(lambda: (df['Heart_Rate'] < 110).mean(), repeat_scan)
+    index_us = time_per_call(lambda: index.percentile('Heart_Rate', 110), 20000)
+    cohort_us = time_per_call(lambda: index.percentile('Heart_Rate', 110, cohort=cohort), 20000)
+
+    print(f"{n:>9,} rows | build {build_s:7.2f} s | scan {scan_us:10.1f} us | index {index_us:6.2f} us | cohort {cohort_us:6.2f} us")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [5000, 500000, 5000000]
+    print("Heart_Rate percentile lookup (per call)")
+    for n in sizes:
+        run(n)
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: one vitals simulation tick, per-dict loop vs VitalsSimulation.
+Usage: python bench_simulation.py [patients ...]   (default: 1000 5000 20000 100000)
+"""
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+from explainability import ExplainabilityEngine
+from simulation import VitalsSimulation
+
+def synthetic_patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Patient_ID': [f"P{i}" for i in range(n)],
+        'Age': rng.integers(1, 91, n),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'BP_Systolic': rng.integers(90, 180, n),
+        'BP_Diastolic': rng.integers(60, 105, n),
+        'Heart_Rate': rng.integers(60, 120, n),
+        'Temperature': rng.uniform(36.1, 38.5, n).round(1),
+        'O2_Saturation': rng.integers(90, 100, n),
+        'Risk_Level': rng.choice(['Low', 'Medium', 'High'], n),
+        'Department': rng.choice(['General Medicine', 'Cardiology', 'Orthopedics', 'Pulmonology',
+                                  'Gastroenterology', 'Neurology', 'Dermatology'], n),
+    })
+
+def legacy_tick(patients, engine):
+    # The previous SimulationManager.update_vitals, condensed
+    for p in patients:
+        if 'scenario' not in p:
+            r = random.random()
+            p['scenario'] = 'Stable' if r < 0.8 else 'Sepsis' if r < 0.9 else 'Cardiac'
+            p['history'] = []
+        p['history'].append({'Heart_Rate': p['Heart_Rate'], 'BPM': p['Heart_Rate'], 'Temperature': p['Temperature'],
+                             'O2_Saturation': p['O2_Saturation'], 'BP_Systolic': p['BP_Systolic']})
+        if len(p['history']) > 5:
+            p['history'].pop(0)
+        if p['scenario'] == 'Stable':
+            p['Heart_Rate'] = max(60, min(100, p['Heart_Rate'] + random.randint(-1, 1)))
+            p['Temperature'] = round(max(36.0, min(37.5, p['Temperature'] + random.uniform(-0.05, 0.05))), 1)
+        elif p['scenario'] == 'Sepsis':
+            p['Temperature'] = round(min(41.0, p['Temperature'] + random.uniform(0.01, 0.1)), 1)
+            p['Heart_Rate'] = min(160, p['Heart_Rate'] + random.randint(0, 2))
+            p['BP_Systolic'] = max(70, p['BP_Systolic'] - random.randint(0, 1))
+        else:
+            step = random.randint(10, 30) if random.random() < 0.1 else random.randint(-5, 5)
+            p['Heart_Rate'] = min(190, max(40, p['Heart_Rate'] + step))
+        anomalies = engine.detect_anomalies(p, p['history'])
+        if anomalies:
+            p['Risk_Level'] = 'High'
+            p['Predicted_Risk'] = 'High'
+            p['explanation'] = anomalies
+
+def time_ticks(fn, ticks):
+    fn()  # warm-up (first tick assigns scenarios)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        fn()
+    return (time.perf_counter() - start) / ticks * 1000  # milliseconds
+
+def run(n, ticks=10):
+    df = synthetic_patients(n)
+    engine = ExplainabilityEngine()
+
+    patients = df.to_dict(orient='records')
+    legacy_ms = time_ticks(lambda: legacy_tick(patients, engine), ticks)
+
+    sim = VitalsSimulation(df, seed=0, explain_engine=engine)
+    tick_ms = time_ticks(sim.tick, ticks)
+    page_ms = time_ticks(lambda: sim.records(range(50)), ticks)
+
+    print(f"{n:>8,} patients | dict loop {legacy_ms:8.1f} ms | vectorized {tick_ms:7.2f} ms ({legacy_ms / tick_ms:5.1f}x) | 50 records {page_ms:5.2f} ms")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1000, 5000, 20000, 100000]
+    print("Simulation tick (per tick, after 1 warm-up tick)")
+    for n in sizes:
+        run(n)
@@ -0,0 +1,53 @@
+"""
+Benchmark: retraining time, previous train_models flow vs the training.py driver.
+The dataset is scaled up by resampling patients_dataset.csv rows (vitals jittered).
+Previous flow: vectorize, then two 300-tree models one after the other, no early stopping.
+Driver: cold run (vectorize + cache) and warm run (cached features), heads in parallel.
+Usage: python bench_training.py [rows]   (default: 20000)
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from xgboost import XGBClassifier
+from model import FEATURES, build_preprocessor
+from training import peak_rss_mb, train
+
+def scaled_dataset(n, path, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv('patients_dataset.csv')
+    df = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+    for col in ['Heart_Rate', 'BP_Systolic', 'BP_Diastolic']:
+        df[col] = df[col] + rng.integers(-3, 4, n)
+    df['Temperature'] = (df['Temperature'] + rng.normal(0, 0.1, n)).round(1)
+    df.to_csv(path, index=False)
+
+def legacy(path):
+    df = pd.read_csv(path)
+    y_risk = LabelEncoder().fit_transform(df['Risk_Level'])
+    y_dept = LabelEncoder().fit_transform(df['Department'])
+    X_train, _, yr, _, yd, _ = train_test_split(df[FEATURES], y_risk, y_dept, test_size=0.2, random_state=42, stratify=y_risk)
+    X_t = build_preprocessor().fit_transform(X_train)
+    for y in (yr, yd):
+        XGBClassifier(n_estimators=300, learning_rate=0.1, max_depth=8, random_state=42, eval_metric='mlogloss').fit(X_t, y)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'patients.csv')
+        scaled_dataset(n, path)
+        print(f"{n} rows, {os.cpu_count()} cores")
+        start = time.perf_counter()
+        legacy(path)
+        print(f"  previous flow:        {time.perf_counter() - start:7.1f} s")
+        for label in ('driver, cold cache:', 'driver, warm cache:'):
+            start = time.perf_counter()
+            report = train(path, cache_dir=os.path.join(tmp, 'cache'), save=False, verbose=False)[2]
+            trees = report['heads']['risk']['best_iteration'] + 1, report['heads']['dept']['best_iteration'] + 1
+            print(f"  {label:<21}{time.perf_counter() - start:7.1f} s  (trees: risk {trees[0]}, dept {trees[1]})")
+        print(f"  peak RSS: {peak_rss_mb():.0f} MB")
@@ -0,0 +1,34 @@
+"""
+Benchmark: keyword rule matching cost as the rule table grows, one trie-shaped regex
+(RuleEngine) vs one substring test per phrase.
+Usage: python bench_triage_rules.py [phrases ...]   (default: 50 500 2000)
+"""
+import random
+import sys
+import time
+import pandas as pd
+from triage_rules import RuleEngine
+
+def best_of(fn, runs=5):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run(n, phrases, records):
+    engine = RuleEngine([{"name": f"r{i}", "department": "D", "priority": i, "phrases": [phrases[i]]} for i in range(n)])
+    trie = best_of(lambda: engine.evaluate_batch(records, ["Low"] * len(records), ["D"] * len(records)))
+    texts = [(r["Symptoms"] + " " + r["Medical_Notes"]).lower() for r in records]
+    naive = best_of(lambda: [[p for p in phrases[:n] if p in t] for t in texts], runs=1)
+    print(f"{n:>6} phrases | {len(records)} records | trie regex {trie * 1000:7.1f} ms "
+          f"| substring per phrase {naive * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    sizes = [int(a) for a in sys.argv[1:]] or [50, 500, 2000]
+    phrases = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 12))) for _ in range(max(sizes))]
+    records = pd.read_csv("patients_dataset.csv", usecols=["Symptoms", "Medical_Notes"]).fillna("").head(2000).to_dict("records")
+    for n in sizes:
+        run(n, phrases, records)
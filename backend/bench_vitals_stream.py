@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: /ws/vitals frame size and server CPU per tick,
+protocol 1 (full list every tick) vs protocol 2 (snapshot once, then deltas).
+Usage: python bench_vitals_stream.py [patients ...]   (default: 5000 20000)
+"""
+import json
+import sys
+import time
+from bench_simulation import synthetic_patients
+from explainability import ExplainabilityEngine
+from simulation import VitalsSimulation
+from subscriptions import PatientIndex, Subscription
+
+# Typical ward views
+VIEWS = {
+    'cardiology station': Subscription(departments=['Cardiology']),
+    'charge nurse (High)': Subscription(risk_levels=['High']),
+    'anomalies only': Subscription(anomalies_only=True),
+}
+
+def encode(message):
+    # What Starlette's send_json does
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode()
+
+def run(n, ticks=10):
+    sim = VitalsSimulation(synthetic_patients(n), seed=0, explain_engine=ExplainabilityEngine())
+    for _ in range(5):
+        sim.tick()  # fill the history like a running server
+    sim.records()  # warm the static field cache
+
+    full_bytes = full_s = delta_bytes = delta_s = 0
+    for _ in range(ticks):
+        sim.tick()
+        start = time.perf_counter()
+        full_bytes += len(encode(sim.records()))
+        full_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        delta_bytes += len(encode({"type": "delta", "seq": sim.ticks, "patients": sim.changes()}))
+        delta_s += time.perf_counter() - start
+
+    snapshot = len(encode({"type": "snapshot", "seq": sim.ticks, "patients": sim.records()}))
+    print(f"{n:>7,} patients | v1 {full_bytes / ticks / 1e6:6.2f} MB {full_s / ticks * 1000:7.1f} ms/tick"
+          f" | v2 {delta_bytes / ticks / 1e6:6.2f} MB {delta_s / ticks * 1000:6.1f} ms/tick"
+          f" | {full_bytes / delta_bytes:5.1f}x fewer bytes | snapshot {snapshot / 1e6:.2f} MB once")
+
+    index = PatientIndex(sim)
+    for name, subscription in VIEWS.items():
+        v1_bytes = v2_bytes = 0
+        for _ in range(ticks):
+            prev = index.mask(subscription)
+            sim.tick()
+            mask = index.mask(subscription)
+            v1_bytes += len(encode(sim.records(mask.nonzero()[0])))
+            v2_bytes += len(encode({"type": "delta", "seq": sim.ticks, "patients": sim.changes(among=mask & prev),
+                                    "added": sim.records((mask & ~prev).nonzero()[0])}))
+        print(f"{'':>17}| {name:<20} {mask.sum():>6,} patients | v1 {v1_bytes / ticks / 1e6:6.3f} MB"
+              f" | v2 {v2_bytes / ticks / 1e6:6.3f} MB | {full_bytes / v2_bytes:6.1f}x fewer than v1 full list")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [5000, 20000]
+    print("Vitals stream, per tick per client (materialize + JSON encode)")
+    for n in sizes:
+        run(n)
@@ -0,0 +1,103 @@
+import threading
+from collections import Counter
+import numpy as np
+from population import AGE_LABELS, age_band
+
+# Contingency tables kept in memory: name -> (row field, column field)
+# *_risk tables count labels only; model output goes to the *_predicted_risk tables
+TABLES = {
+    'gender_risk': ('Gender', 'Risk_Level'),
+    'age_risk': ('Age_Group', 'Risk_Level'),
+    'department_risk': ('Department', 'Risk_Level'),
+    'gender_predicted_risk': ('Gender', 'Predicted_Risk'),
+    'age_predicted_risk': ('Age_Group', 'Predicted_Risk'),
+    # Only rows that carry both a label and a model prediction
+    'predicted_vs_labeled': ('Risk_Level', 'Predicted_Risk'),
+}
+
+
+def _count_frame(df):
+    """One groupby per table over a frame -> {table: Counter((row, col))}"""
+    counts = {name: Counter() for name in TABLES}
+    if df is None or df.empty:
+        return counts
+    df = df.copy()
+    if 'Age' in df.columns:
+        # Ages in no band get None and drop out of the age tables (groupby skips missing keys)
+        bands = age_band(df['Age'].to_numpy())
+        df['Age_Group'] = np.where(bands >= 0, np.asarray(AGE_LABELS, dtype=object)[bands], None)
+    for name, (row, col) in TABLES.items():
+        if row not in df.columns or col not in df.columns:
+            continue
+        sizes = df.groupby([row, col], observed=True).size()
+        counts[name].update({key: int(n) for key, n in sizes.items()})
+    return counts
+
+
+class BiasStats:
+    """
+    Fairness dashboard aggregates, kept in memory instead of re-reading the CSV per request.
+
+    Counts from the shared dataset are rebuilt only when it reloads; patients
+    triaged since startup are added incrementally (O(1) per patient) in a separate
+    layer so a dataset reload doesn't drop them. The JSON response is cached and only
+    re-rendered after a change, so a dashboard poll is a constant-time read.
+    add() is called from concurrent request threads, so updates and reads take a lock.
+    """
+    def __init__(self, df=None):
+        self.file_counts = _count_frame(df)
+        self.live_counts = {name: Counter() for name in TABLES}
+        self.version = 0
+        self._response = None
+        self._lock = threading.Lock()
+
+    def sync(self, dataset, appended_from=None):
+        """PatientDataset.on_change callback: recount the dataset, keep live counts"""
+        file_counts = _count_frame(dataset.frame)
+        with self._lock:
+            self.file_counts = file_counts
+            self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._response = None
+
+    def add(self, record):
+        """
+        Incrementally counts one triaged patient.
+        record: dict with Gender, Age, Department, Risk_Level (label, optional) and Predicted_Risk.
+        """
+        record = dict(record)
+        band = age_band(record['Age']) if record.get('Age') is not None else None
+        record['Age_Group'] = AGE_LABELS[band] if band is not None else None
+        # Unlabeled patients only reach the predicted-risk tables
+        record['Risk_Level'] = record.get('Risk_Level') or None
+        record['Predicted_Risk'] = record.get('Predicted_Risk') or None
+
+        with self._lock:
+            for name, (row, col) in TABLES.items():
+                if record.get(row) is None or record.get(col) is None:
+                    continue
+                self.live_counts[name][(record[row], record[col])] += 1
+            self._changed()
+
+    def table(self, name):
+        """{column value: {row value: count}} - same shape as DataFrame.unstack(fill_value=0).to_dict()"""
+        counts = self.file_counts[name] + self.live_counts[name]
+        rows = sorted({r for r, _ in counts}, key=self._sort_key)
+        cols = sorted({c for _, c in counts}, key=self._sort_key)
+        return {c: {r: counts.get((r, c), 0) for r in rows} for c in cols}
+
+    @staticmethod
+    def _sort_key(value):
+        # Age bands in their natural order, everything else alphabetically
+        if value in AGE_LABELS:
+            return (0, AGE_LABELS.index(value), '')
+        return (1, 0, str(value))
+
+    def response(self):
+        with self._lock:
+            if self._response is None:
+                self._response = {name: self.table(name) for name in TABLES}
+                self._response['version'] = self.version
+            return self._response
@@ -0,0 +1,186 @@
+import asyncio
+import os
+from collections import deque
+import orjson
+from fastapi import WebSocket
+from subscriptions import EVERYTHING
+
+# Slow-consumer policy when a client's queue is full:
+#   drop_oldest - drop the oldest queued frame
+#   coalesce    - drop everything queued, keep only the latest frame
+POLICIES = ('drop_oldest', 'coalesce')
+
+
+def encode(message):
+    """One fast JSON encode per frame, shared by every client (text frame, like send_json)"""
+    return orjson.dumps(message).decode()
+
+
+class ClientChannel:
+    """
+    One connected dashboard: a bounded frame queue drained by its own writer task,
+    so a slow browser only ever delays itself.
+
+    Clients on a delta protocol pass `snapshot` (called with the client's subscription):
+    dropping a delta would corrupt their state, so instead of dropping frames their
+    queue is cleared and the writer sends a fresh snapshot next.
+    """
+    def __init__(self, websocket: WebSocket, protocol=1, max_queue=8, policy='coalesce', send_timeout=10.0, snapshot=None):
+        self.websocket = websocket
+        self.protocol = protocol
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.snapshot = snapshot
+        self.subscription = EVERYTHING
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.needs_snapshot = False
+        self.sent = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.closed = False
+        self.task = None
+
+    def offer(self, frame):
+        """Queues an encoded frame without waiting. Applies the slow-consumer policy when full."""
+        if self.closed:
+            return
+        if self.needs_snapshot:
+            # A snapshot is already due and supersedes this frame
+            self.dropped += 1
+            return
+        if len(self.queue) >= self.max_queue:
+            if self.snapshot is not None:
+                self.dropped += len(self.queue) + 1
+                self.queue.clear()
+                self.request_snapshot()
+                return
+            if self.policy == 'coalesce':
+                self.dropped += len(self.queue)
+                self.queue.clear()
+            else:
+                self.queue.popleft()
+                self.dropped += 1
+        self.queue.append(frame)
+        self.ready.set()
+
+    def request_snapshot(self, resync=True):
+        """Initial state, or a resync (client asked / fell behind): pending deltas are dropped, a snapshot goes next"""
+        self.needs_snapshot = True
+        if resync:
+            self.resyncs += 1
+        self.ready.set()
+
+    async def run(self):
+        """Writer task: sends queued frames in order until the socket fails or times out"""
+        try:
+            while not self.closed:
+                if not self.queue and not self.needs_snapshot:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+                if self.needs_snapshot:
+                    # Built at send time, so it covers every delta that was dropped
+                    self.needs_snapshot = False
+                    self.dropped += len(self.queue)
+                    self.queue.clear()
+                    frame = encode(self.snapshot(self.subscription))
+                else:
+                    frame = self.queue.popleft()
+                await asyncio.wait_for(self.websocket.send_text(frame), timeout=self.send_timeout)
+                self.sent += 1
+        except Exception:
+            # Disconnected or stuck client: stop writing, the endpoint cleans up
+            self.closed = True
+
+    def stats(self):
+        return {
+            "protocol": self.protocol,
+            "subscription": {
+                "departments": sorted(self.subscription.departments),
+                "risk_levels": sorted(self.subscription.risk_levels),
+                "patient_ids": len(self.subscription.patient_ids),
+                "anomalies_only": self.subscription.anomalies_only,
+            },
+            "queued": len(self.queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+        }
+
+
+class ConnectionManager:
+    """
+    Fan-out for /ws/vitals: each frame is encoded once, then handed to every
+    client's queue. broadcast() never awaits a socket, so tick latency doesn't
+    grow with the number (or slowness) of dashboards.
+
+    Clients are grouped by (protocol, subscription): each group gets its own slice,
+    built and encoded once per tick however many clients share it.
+    """
+    def __init__(self, max_queue=None, policy=None, send_timeout=None):
+        self.max_queue = int(max_queue or os.environ.get('WS_QUEUE_SIZE', 8))
+        self.policy = policy or os.environ.get('WS_SLOW_POLICY', 'coalesce')
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {self.policy}")
+        self.send_timeout = float(send_timeout or os.environ.get('WS_SEND_TIMEOUT', 10))
+        self.channels = {}
+        self.dropped_closed = 0
+
+    @property
+    def active_connections(self):
+        return list(self.channels)
+
+    async def connect(self, websocket: WebSocket, protocol: int = 1, snapshot=None):
+        await websocket.accept()
+        channel = ClientChannel(websocket, protocol, self.max_queue, self.policy, self.send_timeout, snapshot)
+        channel.task = asyncio.create_task(channel.run())
+        self.channels[websocket] = channel
+        return channel
+
+    def disconnect(self, websocket: WebSocket):
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.closed = True
+            channel.task.cancel()
+            self.dropped_closed += channel.dropped
+
+    def has_clients(self, protocol: int) -> bool:
+        return any(c.protocol == protocol for c in self.channels.values())
+
+    def subscriptions(self, protocol: int):
+        """Distinct subscriptions among the clients on a protocol (one frame each per tick)"""
+        return {c.subscription for c in self.channels.values() if c.protocol == protocol}
+
+    def send(self, websocket: WebSocket, message):
+        """Queues a message for one client (keeps ordering with broadcast frames)"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.offer(encode(message))
+
+    async def broadcast(self, message, protocol: int = 1, subscription=None):
+        # Encode once, queue for every client speaking this protocol (and subscription, if given);
+        # drop clients whose writer died
+        frame = None
+        for websocket, channel in list(self.channels.items()):
+            if channel.protocol != protocol:
+                continue
+            if subscription is not None and channel.subscription != subscription:
+                continue
+            if channel.closed:
+                self.disconnect(websocket)
+                continue
+            if frame is None:
+                frame = encode(message)
+            channel.offer(frame)
+
+    def stats(self):
+        clients = [c.stats() for c in self.channels.values()]
+        return {
+            "clients": len(clients),
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "dropped_frames": sum(c["dropped"] for c in clients) + self.dropped_closed,
+            "per_client": clients,
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import io
+import os
+import zipfile
+import zlib
+import pdf_extract
+
+# Limits for /import_docs (env overridable)
+MAX_IMPORT_DOCS = int(os.environ.get('IMPORT_MAX_DOCS', 200))
+MAX_ZIP_BYTES = int(os.environ.get('IMPORT_MAX_ZIP_BYTES', 200 * 1024 * 1024))
+# Total PDF bytes in one import, decompressed from ZIPs or uploaded directly
+MAX_UNZIPPED_BYTES = int(os.environ.get('IMPORT_MAX_UNZIPPED_BYTES', 500 * 1024 * 1024))
+
+# Fields triage needs that only the document can provide
+REQUIRED_FIELDS = ['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation']
+
+
+class ImportLimitError(ValueError):
+    pass
+
+
+def is_zip(filename, content_type):
+    return (filename or '').lower().endswith('.zip') or content_type in ('application/zip', 'application/x-zip-compressed')
+
+
+def expand_zip(name, content, max_docs=MAX_IMPORT_DOCS, max_bytes=MAX_UNZIPPED_BYTES):
+    """
+    [(document name, pdf bytes or None, error or None)] for the PDFs in a ZIP.
+    Counts and sizes are checked from the directory before anything is decompressed:
+    raises ImportLimitError for more than `max_docs` PDFs or `max_bytes` in total.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        return [(name, None, "Not a valid ZIP file")]
+    with archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and info.filename.lower().endswith('.pdf')]
+        if len(members) > max_docs:
+            raise ImportLimitError(f"{name}: {len(members)} documents, the limit is {max_docs}")
+        total = sum(info.file_size for info in members if info.file_size <= pdf_extract.MAX_PDF_BYTES)
+        if total > max_bytes:
+            raise ImportLimitError(f"{name}: {total // (1024 * 1024)} MB of PDFs uncompressed, "
+                                   f"the limit is {max_bytes // (1024 * 1024)} MB")
+        docs = []
+        for info in members:
+            doc_name = f"{name}/{info.filename}"
+            if info.file_size > pdf_extract.MAX_PDF_BYTES:
+                docs.append((doc_name, None, f"PDF is larger than {pdf_extract.MAX_PDF_BYTES // (1024 * 1024)} MB"))
+            else:
+                try:
+                    docs.append((doc_name, archive.read(info), None))
+                except (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error):
+                    # Bad CRC, encrypted member, unsupported compression: that document fails, not the import
+                    docs.append((doc_name, None, "Corrupt or unsupported ZIP member"))
+    return docs
+
+
+def to_patient(extracted_data, notes):
+    """(PatientData fields, missing required fields) for one extracted document"""
+    missing = [f for f in REQUIRED_FIELDS if f not in extracted_data]
+    patient = dict(extracted_data)
+    patient['Medical_Notes'] = notes
+    return patient, missing
+
+
+async def extract_documents(docs):
+    """
+    Queues every document for the PDF workers (PDF_WORKERS parse at a time, each with
+    its own timeout) and yields (index, result or None, error or None) in completion order.
+    """
+    async def run(i, content):
+        try:
+            return i, await pdf_extract.extract_pdf_async(content), None
+        except pdf_extract.PdfLimitError as e:
+            return i, None, str(e)
+        except asyncio.TimeoutError:
+            return i, None, f"PDF processing took longer than {pdf_extract.PDF_TIMEOUT:.0f}s"
+        except Exception as e:
+            return i, None, f"Error processing file: {e}"
+
+    pending = []
+    for i, (_, content, error) in enumerate(docs):
+        if error is None:
+            pending.append(run(i, content))
+    for finished in asyncio.as_completed(pending):
+        yield await finished
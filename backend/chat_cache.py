@@ -0,0 +1,191 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+
+# Red-flag phrases from the system prompt: these chats always go to the model
+EMERGENCY_KEYWORDS = [
+    'chest pain', 'chest pressure', 'chest tightness', 'heart attack',
+    "can't breathe", 'cannot breathe', 'difficulty breathing', 'shortness of breath', 'not breathing',
+    'stroke', 'facial droop', 'slurred', 'arm weakness',
+    'bleeding', 'unconscious', 'fainted', 'fainting', 'passed out',
+    'anaphylaxis', 'allergic reaction', 'throat swelling',
+    'worst headache', 'seizure',
+    'suicide', 'suicidal', 'kill myself', 'self-harm', 'self harm', 'overdose',
+]
+
+_EMERGENCY_RE = re.compile("|".join(re.escape(k) for k in EMERGENCY_KEYWORDS))
+_PUNCT_RE = re.compile(r"[^\w\s']+")
+_SPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_message(message):
+    """Lowercase, drop punctuation, collapse whitespace: 'I have a FEVER!!' -> 'i have a fever'"""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", message.lower())).strip()
+
+
+NEGATIONS = frozenset(['no', 'not', 'never', 'without', 'dont', "don't", 'didnt', "didn't", 'cant', "can't", 'isnt', "isn't"])
+
+
+def negations(text):
+    """Negation words in a normalized message: 'fever' and 'no fever' must never match"""
+    return frozenset(w for w in text.split() if w in NEGATIONS)
+
+
+def numbers(message):
+    """Numbers in a raw message, in order: '40.1 degrees' and '38.1 degrees' must never match"""
+    return tuple(n.replace(',', '.') for n in _NUMBER_RE.findall(message))
+
+
+def trigrams(text):
+    """Character trigram signature used for the similarity lookup"""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _Entry:
+    __slots__ = ('reply', 'created', 'fingerprint', 'signature', 'negations', 'numbers')
+
+    def __init__(self, reply, created, fingerprint, signature, negations, numbers):
+        self.reply = reply
+        self.created = created
+        self.fingerprint = fingerprint
+        self.signature = signature
+        self.negations = negations
+        self.numbers = numbers
+
+
+class ChatResponseCache:
+    """
+    LRU + TTL cache of chatbot replies, in front of the Ollama call.
+
+    Key = normalized message + fingerprint of the conversation so far, so the same
+    question in a different conversation state is a different entry. On an exact miss,
+    an optional similarity lookup compares trigram signatures against entries with the
+    same fingerprint ("i have a fever" ~ "i have fever"). It is off by default; when on,
+    negation words and numbers (temperatures, ages, doses) must match exactly.
+
+    Messages with emergency keywords bypass the cache entirely: they are never served
+    from it and never stored.
+    """
+    def __init__(self, max_entries=512, ttl=3600, similarity_threshold=0.8, use_similarity=False, max_similar_length=200):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.use_similarity = use_similarity
+        # Long messages are unlikely to repeat; don't spend time comparing them
+        self.max_similar_length = max_similar_length
+        self._entries = OrderedDict()
+        # fingerprint -> keys, so similarity only scans the same conversation state
+        self._by_fingerprint = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def is_emergency(message):
+        return _EMERGENCY_RE.search(message.lower()) is not None
+
+    @staticmethod
+    def fingerprint(history):
+        """Stable hash of the conversation state (roles + normalized contents)"""
+        state = [(m.get('role'), normalize_message(str(m.get('content', '')))) for m in history]
+        return hashlib.sha1(json.dumps(state).encode()).hexdigest()
+
+    def _key(self, normalized, fingerprint):
+        return f"{fingerprint}:{normalized}"
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        keys = self._by_fingerprint.get(entry.fingerprint)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_fingerprint[entry.fingerprint]
+
+    def _expired(self, entry, now):
+        return now - entry.created > self.ttl
+
+    def get(self, message, history):
+        """Cached reply or None. Emergency messages always return None."""
+        if self.is_emergency(message):
+            self.bypassed += 1
+            return None
+
+        now = time.monotonic()
+        normalized = normalize_message(message)
+        fingerprint = self.fingerprint(history)
+        key = self._key(normalized, fingerprint)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._expired(entry, now):
+                self._remove(key)
+                self.expirations += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.reply
+
+        if self.use_similarity and len(normalized) <= self.max_similar_length:
+            signature = trigrams(normalized)
+            negated = negations(normalized)
+            numbered = numbers(message)
+            best_key, best_score = None, self.similarity_threshold
+            for candidate in list(self._by_fingerprint.get(fingerprint, ())):
+                other = self._entries[candidate]
+                if self._expired(other, now):
+                    self._remove(candidate)
+                    self.expirations += 1
+                    continue
+                if other.signature is None or other.negations != negated or other.numbers != numbered:
+                    continue
+                score = len(signature & other.signature) / len(signature | other.signature)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.similar_hits += 1
+                return self._entries[best_key].reply
+
+        self.misses += 1
+        return None
+
+    def put(self, message, history, reply):
+        """Stores a reply. Emergency messages and empty replies are never cached."""
+        if not reply or self.is_emergency(message):
+            return
+        normalized = normalize_message(message)
+        fingerprint = self.fingerprint(history)
+        key = self._key(normalized, fingerprint)
+        if key in self._entries:
+            self._remove(key)
+
+        signature = trigrams(normalized) if len(normalized) <= self.max_similar_length else None
+        self._entries[key] = _Entry(reply, time.monotonic(), fingerprint, signature, negations(normalized), numbers(message))
+        self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "bypassed_emergency": self.bypassed,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.similar_hits) / lookups, 3) if lookups else 0.0
+        }
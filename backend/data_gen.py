@@ -1,3 +1,6 @@
+import argparse
+import os
+import time
 import pandas as pd
 import numpy as np
 from faker import Faker
@@ -20,6 +23,25 @@ DOCTORS = {
 
 DEPARTMENTS = ['General Medicine', 'Cardiology', 'Neurology', 'Orthopedics', 'Emergency']
 
+# Simulated EHR notes per risk level
+NOTE_TEMPLATES = {
+    'High': [
+        "Patient presents with acute distress. Reports severe {symptoms}. Stat ECG shows abnormalities.",
+        "Emergency admission. History of {chronic}. Vitals unstable. Complains of {symptoms}.",
+        "Critical condition. {symptoms} observed. Immediate intervention required."
+    ],
+    'Medium': [
+        "Patient reports {symptoms} for past 2 days. History of {chronic}. Vitals elevated.",
+        "Urgent care visit. {symptoms}. Moderate distress. Monitoring required.",
+        "Complains of {symptoms}. Fever spiked to {temp}. ruling out sepsis."
+    ],
+    'Low': [
+        "Routine checkup. Client reports {symptoms}. Vitals stable.",
+        "Follow-up visit for {chronic}. No acute complaints. {symptoms} mentioned.",
+        "Walk-in patient. {symptoms} mild. Discharged with prescription."
+    ]
+}
+
 def generate_patient_data(num_patients=2000):
     data = []
     
@@ -119,25 +141,7 @@ def generate_patient_data(num_patients=2000):
              chronic.append('Arthritis')
         
         # Simulating EHR/Medical Notes
-        notes_templates = {
-            'High': [
-                "Patient presents with acute distress. Reports severe {symptoms}. Stat ECG shows abnormalities.",
-                "Emergency admission. History of {chronic}. Vitals unstable. Complains of {symptoms}.",
-                "Critical condition. {symptoms} observed. Immediate intervention required."
-            ],
-            'Medium': [
-                "Patient reports {symptoms} for past 2 days. History of {chronic}. Vitals elevated.",
-                "Urgent care visit. {symptoms}. Moderate distress. Monitoring required.",
-                "Complains of {symptoms}. Fever spiked to {temp}. ruling out sepsis."
-            ],
-            'Low': [
-                "Routine checkup. Client reports {symptoms}. Vitals stable.",
-                "Follow-up visit for {chronic}. No acute complaints. {symptoms} mentioned.",
-                "Walk-in patient. {symptoms} mild. Discharged with prescription."
-            ]
-        }
-        
-        note_template = np.random.choice(notes_templates[risk_level])
+        note_template = np.random.choice(NOTE_TEMPLATES[risk_level])
         medical_notes = note_template.format(
             symptoms=', '.join(symptoms),
             chronic=', '.join(chronic) if chronic else "no significant history",
@@ -164,9 +168,257 @@ def generate_patient_data(num_patients=2000):
         
     return pd.DataFrame(data)
 
+# --- Vectorized generator ---
+# Same clinical logic as generate_patient_data, but every column of a chunk is drawn as one
+# array and the scenario-specific vitals are applied with masks. Chunks are generated by
+# worker processes, each from its own stream (SeedSequence(seed).spawn), and streamed to
+# the output file in order, so memory stays at a few chunks and a given seed (and chunk
+# size) always produces the same file, whatever the number of workers.
+CHUNK_ROWS = 100_000
+CONDITION_P = [0.34, 0.33, 0.33]  # Critical, Urgent, Normal
+# Three scenarios per condition, equally likely. Vitals overrides: int range -> randint [lo, hi),
+# float range -> uniform, rounded to 0.1
+SCENARIOS = [
+    ('Cardiac', 'High', 'Cardiology', ['Chest Pain', 'Shortness of Breath', 'Sweating'],
+     {'BP_Systolic': (150, 200), 'Heart_Rate': (110, 150), 'O2_Saturation': (85, 94)}),
+    ('Stroke', 'High', 'Neurology', ['Slurred Speech', 'Facial Droop', 'Arm Weakness'], {'BP_Systolic': (160, 220)}),
+    ('Respiratory', 'High', 'Pulmonology', ['Severe Difficulty Breathing', 'Cyanosis'], {'O2_Saturation': (70, 88)}),
+    ('Infection', 'Medium', 'General Medicine', ['High Fever', 'Chills', 'Cough'],
+     {'Temperature': (38.5, 40.5), 'Heart_Rate': (90, 120)}),
+    ('Trauma', 'Medium', 'Orthopedics', ['Deep Cut', 'Bleeding', 'Pain'], {}),
+    ('Gastro', 'Medium', 'Gastroenterology', ['Severe Abdominal Pain', 'Vomiting'], {}),
+    ('Minor', 'Low', 'Dermatology', ['Mild Pain', 'Rash', 'Itchiness'], {}),
+    ('Flu', 'Low', 'General Medicine', ['Runny Nose', 'Sore Throat', 'Mild Fever'], {'Temperature': (37.0, 38.0)}),
+    ('Checkup', 'Low', 'General Medicine', ['None', 'Routine Checkup'], {}),
+]
+# Chronic condition combinations: bit 1 = Hypertension, bit 2 = Diabetes, 4 = Arthritis (only alone)
+CHRONIC = ['', 'Hypertension', 'Diabetes', 'Hypertension, Diabetes', 'Arthritis']
+COLUMNS = ['Patient_ID', 'Name', 'Age', 'Gender', 'Symptoms', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate',
+           'Temperature', 'O2_Saturation', 'Chronic_Conditions', 'Medical_Notes', 'Risk_Level', 'Department',
+           'Assigned_Doctor']
+
+
+def _note_parts():
+    """
+    Notes for every (scenario, template, chronic) combination, split around the temperature:
+    (prefix, suffix, has temperature) arrays indexed by scenario * 15 + template * 5 + chronic.
+    """
+    prefixes, suffixes, has_temp = [], [], []
+    for _, risk, _, symptoms, _ in SCENARIOS:
+        for template in NOTE_TEMPLATES[risk]:
+            for chronic in CHRONIC:
+                note = template.format(symptoms=', '.join(symptoms), chronic=chronic or "no significant history", temp='\x00')
+                prefix, _, suffix = note.partition('\x00')
+                prefixes.append(prefix)
+                suffixes.append(suffix)
+                has_temp.append('{temp}' in template)
+    return np.array(prefixes, dtype=object), np.array(suffixes, dtype=object), np.array(has_temp)
+
+
+def _name_tables():
+    from faker.providers.person.en_US import Provider
+    tables = []
+    for names in (Provider.first_names, Provider.last_names):
+        weights = np.array(list(names.values()), dtype=np.float64)
+        tables.append((np.array(list(names), dtype=object), weights / weights.sum()))
+    return tables
+
+
+NOTE_PREFIX, NOTE_SUFFIX, NOTE_HAS_TEMP = _note_parts()
+NAME_TABLES = _name_tables()
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def _uuid4(rng, n):
+    """n random version-4 UUID strings, built as one ASCII byte array"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    digits = np.empty((n, 32), dtype=np.uint8)
+    digits[:, 0::2] = HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = HEX_DIGITS[raw & 0x0F]
+    text = np.full((n, 36), ord('-'), dtype=np.uint8)
+    for src, dst in ((slice(0, 8), slice(0, 8)), (slice(8, 12), slice(9, 13)), (slice(12, 16), slice(14, 18)),
+                     (slice(16, 20), slice(19, 23)), (slice(20, 32), slice(24, 36))):
+        text[:, dst] = digits[:, src]
+    return text.view('S36').ravel().astype(str).astype(object)
+
+
+def generate_chunk(num_patients, seed):
+    """One chunk of patients as a DataFrame (seed: int or np.random.SeedSequence)"""
+    rng = np.random.default_rng(seed)
+    n = num_patients
+
+    age = rng.integers(1, 91, n)
+    gender = np.where(rng.random(n) < 0.5, 'Male', 'Female').astype(object)
+    (first, first_p), (last, last_p) = NAME_TABLES
+    name = first[rng.choice(len(first), n, p=first_p)] + ' ' + last[rng.choice(len(last), n, p=last_p)]
+
+    # Base vitals (normal range)
+    vitals = {
+        'BP_Systolic': rng.integers(90, 140, n),
+        'BP_Diastolic': rng.integers(60, 90, n),
+        'Heart_Rate': rng.integers(60, 100, n),
+        'Temperature': np.round(rng.uniform(36.1, 37.5, n), 1),
+        'O2_Saturation': rng.integers(95, 100, n),
+    }
+
+    # Risk factors
+    hypertension = (age > 40) & (rng.random(n) < 0.3)
+    diabetes = (age > 50) & (rng.random(n) < 0.15)
+    vitals['BP_Systolic'] += np.where(hypertension, rng.integers(10, 30, n), 0)
+    vitals['BP_Diastolic'] += np.where(hypertension, rng.integers(5, 15, n), 0)
+    chronic = hypertension * 1 + diabetes * 2
+    arthritis = (chronic == 0) & (age > 60) & (rng.random(n) > 0.7)
+    chronic[arthritis] = 4
+
+    # Condition -> one of its three scenarios; scenario vitals replace the base ones
+    scenario = rng.choice(3, n, p=CONDITION_P) * 3 + rng.integers(0, 3, n)
+    for k, (_, _, _, _, overrides) in enumerate(SCENARIOS):
+        mask = scenario == k
+        count = int(mask.sum())
+        for column, (lo, hi) in overrides.items():
+            if isinstance(lo, float):
+                vitals[column][mask] = np.round(rng.uniform(lo, hi, count), 1)
+            else:
+                vitals[column][mask] = rng.integers(lo, hi, count)
+
+    risk = np.array([s[1] for s in SCENARIOS], dtype=object)[scenario]
+    department = np.array([s[2] for s in SCENARIOS], dtype=object)[scenario]
+    symptoms = np.array([', '.join(s[3]) for s in SCENARIOS], dtype=object)[scenario]
+
+    # Notes: constant per (scenario, template, chronic) except the temperature in one template
+    note_key = scenario * 15 + rng.integers(0, 3, n) * 5 + chronic
+    notes = NOTE_PREFIX[note_key]
+    with_temp = np.flatnonzero(NOTE_HAS_TEMP[note_key])
+    if len(with_temp):
+        temps = vitals['Temperature'][with_temp].astype(str).astype(object)
+        notes[with_temp] = NOTE_PREFIX[note_key[with_temp]] + temps + NOTE_SUFFIX[note_key[with_temp]]
+
+    doctor = np.empty(n, dtype=object)
+    for dept in np.unique(department):
+        mask = department == dept
+        choices = np.array(DOCTORS.get(dept, DOCTORS['General Medicine']), dtype=object)
+        doctor[mask] = choices[rng.integers(0, len(choices), int(mask.sum()))]
+
+    return pd.DataFrame({
+        'Patient_ID': _uuid4(rng, n),
+        'Name': name,
+        'Age': age,
+        'Gender': gender,
+        'Symptoms': symptoms,
+        **{c: vitals[c] for c in ['BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation']},
+        'Chronic_Conditions': np.array([c or 'None' for c in CHRONIC], dtype=object)[chronic],
+        'Medical_Notes': notes,
+        'Risk_Level': risk,
+        'Department': department,
+        'Assigned_Doctor': doctor,
+    }, columns=COLUMNS)
+
+
+def _chunk_sizes(num_patients, chunk_size):
+    return [min(chunk_size, num_patients - start) for start in range(0, num_patients, chunk_size)]
+
+
+def generate_patient_frame(num_patients, seed=42, chunk_size=CHUNK_ROWS):
+    """In-memory DataFrame with the same rows write_patient_data would write"""
+    sizes = _chunk_sizes(num_patients, chunk_size)
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    if not sizes:
+        return generate_chunk(0, seed)
+    return pd.concat([generate_chunk(size, stream) for size, stream in zip(sizes, streams)], ignore_index=True)
+
+
+def _render_chunk(num_patients, seed, fmt, header):
+    """Worker job: CSV chunks come back as encoded text (cheap to pass between processes)"""
+    frame = generate_chunk(num_patients, seed)
+    if fmt == 'csv':
+        return frame.to_csv(index=False, header=header).encode()
+    return frame
+
+
+def _rendered_chunks(sizes, streams, fmt, workers):
+    jobs = [(size, stream, fmt, i == 0) for i, (size, stream) in enumerate(zip(sizes, streams))]
+    if workers <= 1:
+        for job in jobs:
+            yield _render_chunk(*job)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # At most two chunks in flight per worker: bounded memory, results consumed in order
+        window = deque()
+        for job in jobs:
+            window.append(pool.submit(_render_chunk, *job))
+            if len(window) >= 2 * workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def write_patient_data(path, num_patients, seed=42, workers=1, chunk_size=CHUNK_ROWS, fmt=None):
+    """
+    Generates num_patients rows with the vectorized generator and streams them to a CSV or
+    Parquet file (fmt, default from the extension). The file is written under a temporary
+    name and renamed when complete. Returns the number of rows written; with 0 rows the
+    file still has the CSV header or Parquet schema.
+    """
+    if num_patients < 0:
+        raise ValueError(f"num_patients must be >= 0, got {num_patients}")
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported format {fmt!r} (csv or parquet)")
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+
+    # One empty chunk when there are no rows: it carries the header / schema
+    sizes = _chunk_sizes(num_patients, chunk_size) or [0]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    tmp = path + '.tmp'
+    written = 0
+    if fmt == 'csv':
+        with open(tmp, 'wb') as f:
+            for chunk in _rendered_chunks(sizes, streams, fmt, workers):
+                f.write(chunk)
+        written = num_patients
+    else:
+        writer = None
+        try:
+            for chunk in _rendered_chunks(sizes, streams, fmt, workers):
+                if chunk.empty:
+                    # Nothing to infer text columns from: declare them as strings, not nulls
+                    chunk = chunk.astype({c: 'string' for c in chunk.columns if chunk[c].dtype == object})
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                writer.write_table(table)  # one row group per chunk
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp, path)
+    return written
+
+
 if __name__ == "__main__":
-    df = generate_patient_data(5000)
-    output_path = 'patients_dataset.csv'
-    df.to_csv(output_path, index=False)
-    print(f"Generated {len(df)} patient records saved to {output_path}")
-    print(df['Risk_Level'].value_counts())
+    parser = argparse.ArgumentParser(description="Generate the synthetic patient dataset")
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--out', default='patients_dataset.csv', help=".csv or .parquet")
+    parser.add_argument('--fast', action='store_true', help="vectorized, chunked generator (needed for millions of rows)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processes for --fast")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    if args.fast:
+        start = time.perf_counter()
+        rows = write_patient_data(args.out, args.rows, seed=args.seed, workers=args.workers, chunk_size=args.chunk_size)
+        print(f"Generated {rows} patient records saved to {args.out} ({time.perf_counter() - start:.1f}s, {args.workers} workers)")
+    else:
+        df = generate_patient_data(args.rows)
+        df.to_csv(args.out, index=False)
+        print(f"Generated {len(df)} patient records saved to {args.out}")
+        print(df['Risk_Level'].value_counts())
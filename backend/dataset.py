@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.environ.get('DATASET_PATH', os.path.join(BACKEND_DIR, 'patients_dataset.csv'))
+CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', os.path.join(BACKEND_DIR, '.dataset_cache'))
+
+# Typed columnar schema (bump SCHEMA_VERSION when it changes so old caches are ignored)
+SCHEMA_VERSION = 2
+NUMERIC = {
+    'Age': np.int16,
+    'BP_Systolic': np.int16,
+    'BP_Diastolic': np.int16,
+    'Heart_Rate': np.int16,
+    'Temperature': np.float64,  # kept at full precision so percentiles match the raw CSV
+    'O2_Saturation': np.int16,
+}
+CATEGORICAL = ['Gender', 'Department', 'Risk_Level', 'Assigned_Doctor', 'Chronic_Conditions', 'Symptoms']
+TEXT = ['Patient_ID', 'Name', 'Medical_Notes']
+# Long free text stays out of the frame: memory-mapped, decoded per row on access (PatientDataset.texts)
+LAZY_TEXT = ['Medical_Notes']
+CACHE_KEY = re.compile(r"[0-9a-f]{16}")
+
+
+class TextColumn:
+    """
+    Strings stored as one UTF-8 byte buffer plus row offsets (both memory-mappable).
+    Row i is buffer[offsets[i]:offsets[i + 1]]; nothing is decoded until a row is read.
+    """
+    def __init__(self, buffer, offsets, missing=None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.missing = missing
+
+    @classmethod
+    def from_values(cls, values):
+        values = list(values)
+        missing = np.array([v is None or (isinstance(v, float) and np.isnan(v)) for v in values], dtype=bool)
+        encoded = [b'' if m else str(v).encode() for v, m in zip(values, missing)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets, missing if missing.any() else None)
+
+    def save(self, directory, name):
+        np.save(os.path.join(directory, f'{name}.buffer.npy'), self.buffer)
+        np.save(os.path.join(directory, f'{name}.offsets.npy'), self.offsets)
+        if self.missing is not None:
+            np.save(os.path.join(directory, f'{name}.missing.npy'), self.missing)
+
+    @classmethod
+    def load(cls, directory, name, missing=False):
+        return cls(
+            np.load(os.path.join(directory, f'{name}.buffer.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, f'{name}.offsets.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, f'{name}.missing.npy')) if missing else None,
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if self.missing is not None and self.missing[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+    def take(self, indices):
+        return [self[int(i)] for i in indices]
+
+    def to_series(self):
+        """Every row decoded (for the short identifier columns kept in the frame)"""
+        data = self.buffer.tobytes()
+        bounds = self.offsets.tolist()
+        values = np.empty(len(self), dtype=object)
+        values[:] = [data[bounds[i]:bounds[i + 1]].decode() for i in range(len(self))]
+        if self.missing is not None:
+            values[self.missing] = None
+        return pd.Series(values, dtype=object)
+
+
+def _typed_frame(df):
+    """Applies the schema: fixed-width numerics, categoricals, plain strings for free text"""
+    out = {}
+    for col in df.columns:
+        if col in NUMERIC:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if np.issubdtype(NUMERIC[col], np.integer) and values.isna().any():
+                # Missing ints can't be stored in int16; keep them as float NaN
+                out[col] = values.astype(np.float64)
+            else:
+                out[col] = values.astype(NUMERIC[col])
+        elif col in CATEGORICAL:
+            out[col] = df[col].astype('category')
+        else:
+            out[col] = df[col].astype(object)
+    return pd.DataFrame(out)
+
+
+class PatientDataset:
+    """
+    The one in-memory copy of patients_dataset.csv, shared by every subsystem
+    (population percentiles, bias stats, vitals simulation).
+
+    The CSV is parsed once into a typed columnar frame. A binary cache (.npy per
+    column, memory-mapped where possible) is written next to it and reused on later
+    starts as long as the CSV's size/mtime match.
+
+    Consumers get `frame` and must treat it as read-only (pandas copy-on-write protects
+    the shared arrays) and can subscribe to changes with on_change(callback).
+    LAZY_TEXT columns are not in the frame: `texts[name]` is a TextColumn.
+    """
+    def __init__(self, path=DATASET_PATH, cache_dir=CACHE_DIR, check_interval=5.0):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self.last_check = 0.0
+        self.mtime = None
+        self.version = 0
+        self.frame = pd.DataFrame()
+        self.texts = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Loading & binary cache ---
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_size, st.st_mtime_ns
+
+    def _cache_path(self, size, mtime_ns):
+        key = hashlib.sha1(f"{os.path.abspath(self.path)}:{size}:{mtime_ns}:{SCHEMA_VERSION}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key)
+
+    def _load(self):
+        try:
+            size, mtime_ns = self._stat()
+        except OSError as e:
+            print(f"Error loading dataset: {e}")
+            return
+        cache_path = self._cache_path(size, mtime_ns)
+        loaded = None
+        if os.path.exists(os.path.join(cache_path, 'columns.json')):
+            try:
+                loaded = self._read_cache(cache_path)
+            except Exception as e:
+                print(f"Ignoring unreadable dataset cache {cache_path}: {e}")
+        if loaded is None:
+            frame = _typed_frame(pd.read_csv(self.path))
+            texts = {col: TextColumn.from_values(frame.pop(col)) for col in LAZY_TEXT if col in frame.columns}
+            loaded = frame, texts
+            try:
+                self._write_cache(cache_path, frame, texts)
+                loaded = self._read_cache(cache_path)  # serve the memory-mapped copy
+            except OSError as e:
+                print(f"Could not write dataset cache: {e}")
+        self.frame, self.texts = loaded
+        self.mtime = mtime_ns
+        self.version += 1
+
+    def _write_cache(self, cache_path, frame, texts):
+        # Private temp dir per process: workers starting together don't write into each other's
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+        columns = []
+        for col in frame.columns:
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                np.save(os.path.join(tmp, f'{col}.codes.npy'), series.cat.codes.to_numpy())
+                columns.append({'name': col, 'kind': 'category', 'categories': [str(c) for c in series.cat.categories]})
+            elif series.dtype == object:
+                text = TextColumn.from_values(series)
+                text.save(tmp, col)
+                columns.append({'name': col, 'kind': 'text', 'missing': text.missing is not None})
+            else:
+                np.save(os.path.join(tmp, f'{col}.npy'), series.to_numpy())
+                columns.append({'name': col, 'kind': 'numeric'})
+        for col, text in texts.items():
+            text.save(tmp, col)
+            columns.append({'name': col, 'kind': 'text', 'lazy': True, 'missing': text.missing is not None})
+        with open(os.path.join(tmp, 'columns.json'), 'w') as f:
+            json.dump({'source': os.path.abspath(self.path), 'rows': len(frame), 'columns': columns}, f)
+        try:
+            os.replace(tmp, cache_path)
+        except OSError:
+            # Another worker published the same cache first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.exists(os.path.join(cache_path, 'columns.json')):
+                raise
+        self._prune_cache(os.path.basename(cache_path))
+
+    def _prune_cache(self, keep):
+        """Removes older caches of this dataset file; other entries in cache_dir are left alone"""
+        source = os.path.abspath(self.path)
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name == keep or not CACHE_KEY.fullmatch(name):
+                continue
+            try:
+                with open(os.path.join(path, 'columns.json')) as f:
+                    if json.load(f).get('source') != source:
+                        continue
+            except (OSError, ValueError):
+                continue
+            # Readers that still map these files keep them until they close (POSIX unlink semantics)
+            shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _read_cache(cache_path):
+        with open(os.path.join(cache_path, 'columns.json')) as f:
+            meta = json.load(f)
+        data, texts = {}, {}
+        for col in meta['columns']:
+            name = col['name']
+            if col['kind'] == 'category':
+                codes = np.load(os.path.join(cache_path, f'{name}.codes.npy'), mmap_mode='r')
+                data[name] = pd.Categorical.from_codes(codes, categories=col['categories'])
+            elif col['kind'] == 'text':
+                text = TextColumn.load(cache_path, name, missing=col.get('missing', False))
+                if col.get('lazy'):
+                    texts[name] = text
+                else:
+                    data[name] = text.to_series()
+            else:
+                data[name] = np.load(os.path.join(cache_path, f'{name}.npy'), mmap_mode='r')
+        return pd.DataFrame(data), texts
+
+    # --- Change detection ---
+
+    def on_change(self, callback):
+        """callback(dataset, appended_from): appended_from is the first new row if rows were only appended, else None"""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """Reloads the CSV if it changed on disk and notifies subscribers. Returns True if it did."""
+        with self._lock:
+            self.last_check = time.monotonic()
+            try:
+                _, mtime_ns = self._stat()
+            except OSError:
+                return False
+            if mtime_ns == self.mtime:
+                return False
+
+            old = self.frame
+            self._load()
+            new = self.frame
+            appended_from = None
+            if len(new) > len(old) > 0 and 'Patient_ID' in new.columns and new['Patient_ID'].iloc[len(old) - 1] == old['Patient_ID'].iloc[-1]:
+                appended_from = len(old)
+            for callback in self._listeners:
+                callback(self, appended_from)
+            return True
+
+    def maybe_refresh(self):
+        """Throttled refresh() so request paths don't stat() the file every call"""
+        if time.monotonic() - self.last_check >= self.check_interval:
+            return self.refresh()
+        return False
+
+    def __len__(self):
+        return len(self.frame)
+
+
+_shared = None
+
+
+def get_dataset():
+    """The process-wide PatientDataset, loaded on first use"""
+    global _shared
+    if _shared is None:
+        _shared = PatientDataset()
+    return _shared
@@ -0,0 +1,160 @@
+import random
+import threading
+
+# Used when the predicted department has no doctors
+FALLBACK_DEPTS = ['General Practice', 'General Medicine']
+# Returned if no doctor exists at all (shouldn't happen with the default roster)
+TRIAGE_NURSE = {"name": "Triage Nurse", "id": "nurse_1", "dept": "General", "status": "Active"}
+
+
+class _Pool:
+    """Set of doctor ids with O(1) add, remove, first and random pick (list + position map)"""
+    def __init__(self):
+        self.items = []
+        self.pos = {}
+
+    def add(self, doc_id):
+        if doc_id not in self.pos:
+            self.pos[doc_id] = len(self.items)
+            self.items.append(doc_id)
+
+    def remove(self, doc_id):
+        i = self.pos.pop(doc_id, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.pos[last] = i
+
+    def __len__(self):
+        return len(self.items)
+
+
+class DoctorRegistry:
+    """
+    Doctor roster with per-department Available / Busy pools.
+
+    Picking and releasing a doctor is O(1), and every read-modify-write happens under
+    one lock, so concurrent requests (FastAPI runs sync endpoints in a threadpool)
+    can never both take the same Available doctor. Department stats are updated
+    incrementally on each status change instead of rescanning the roster.
+    """
+    def __init__(self, doctors, seed=None):
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._load(doctors)
+
+    def _load(self, doctors):
+        self.doctors = {}
+        self.by_name = {}
+        self.by_dept = {}
+        self.available = {}
+        self.busy = {}
+        self.stats = {}
+        for doc in doctors:
+            doc = dict(doc)
+            dept = doc['dept']
+            self.doctors[doc['id']] = doc
+            self.by_name[doc['name']] = doc['id']
+            self.by_dept.setdefault(dept, []).append(doc['id'])
+            self.available.setdefault(dept, _Pool())
+            self.busy.setdefault(dept, _Pool())
+            stats = self.stats.setdefault(dept, {"total": 0, "available": 0, "specs": []})
+            stats["total"] += 1
+            if doc['spec'] not in stats["specs"]:
+                stats["specs"].append(doc['spec'])
+            self._pool_for(doc).add(doc['id'])
+            if doc['status'] == 'Available':
+                stats["available"] += 1
+        self._grouped = None
+
+    def _pool_for(self, doc):
+        return self.available[doc['dept']] if doc['status'] == 'Available' else self.busy[doc['dept']]
+
+    def _set_status(self, doc, status):
+        """Moves a doctor between pools and keeps the stats in step (caller holds the lock)"""
+        if doc['status'] == status:
+            return
+        was_available = doc['status'] == 'Available'
+        self._pool_for(doc).remove(doc['id'])
+        doc['status'] = status
+        self._pool_for(doc).add(doc['id'])
+        is_available = status == 'Available'
+        if was_available != is_available:
+            self.stats[doc['dept']]["available"] += 1 if is_available else -1
+        self._grouped = None
+
+    def _department(self, department):
+        if department in self.by_dept:
+            return [department]
+        return [d for d in FALLBACK_DEPTS if d in self.by_dept]
+
+    def acquire(self, department, risk_level):
+        """
+        Assignment logic (same policy as before, now atomic):
+        1. Doctors of the predicted department, else the General Medicine/GP fallback.
+        2. High risk takes an Available doctor if there is one, else interrupts a busy one.
+        3. Medium/Low pick a random Available doctor, else a random one from the department.
+        4. High/Medium mark the Available doctor they got as Busy.
+        Returns (doctor copy, taken_from_available).
+        """
+        with self._lock:
+            depts = self._department(department)
+            available = [p for p in (self.available[d] for d in depts) if len(p)]
+            if available:
+                pool = available[0]
+                doc_id = pool.items[0] if risk_level == 'High' else self._rng.choice(pool.items)
+            else:
+                candidates = [i for d in depts for i in self.by_dept[d]]
+                if not candidates:
+                    return dict(TRIAGE_NURSE), False
+                doc_id = candidates[0] if risk_level == 'High' else self._rng.choice(candidates)
+            doc = self.doctors[doc_id]
+            taken = doc['status'] == 'Available'
+            if risk_level in ['High', 'Medium'] and taken:
+                self._set_status(doc, 'Busy')
+            return dict(doc), taken
+
+    def assign(self, department, risk_level):
+        return self.acquire(department, risk_level)[0]
+
+    def get(self, doctor_id):
+        """Doctor copy, or None"""
+        with self._lock:
+            doc = self.doctors.get(doctor_id)
+            return dict(doc) if doc is not None else None
+
+    def set_status(self, doctor_id, status):
+        with self._lock:
+            doc = self.doctors.get(doctor_id)
+            if doc is None:
+                raise KeyError(doctor_id)
+            self._set_status(doc, status)
+            return dict(doc)
+
+    def set_status_by_name(self, name, status):
+        """Raises KeyError for an unknown doctor"""
+        return self.set_status(self.by_name[name], status)
+
+    def release(self, doctor_id):
+        """Doctor finished with a patient: back to Available"""
+        return self.set_status(doctor_id, 'Available')
+
+    def reset(self):
+        with self._lock:
+            for doc in self.doctors.values():
+                self._set_status(doc, 'Available')
+
+    def grouped(self):
+        """Doctors grouped by department (rebuilt only after a status change)"""
+        with self._lock:
+            if self._grouped is None:
+                self._grouped = {dept: [dict(self.doctors[i]) for i in ids] for dept, ids in self.by_dept.items()}
+            return self._grouped
+
+    def department_stats(self):
+        """Available vs total per department, maintained incrementally"""
+        with self._lock:
+            return {dept: {"total": s["total"], "available": s["available"], "specs": list(s["specs"])}
+                    for dept, s in self.stats.items()}
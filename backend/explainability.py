@@ -1,3 +1,25 @@
+import numpy as np
+
+# Anomaly codes for the batch API: one bit per rule, OR-ed per patient
+TACHYCARDIA = 1 << 0
+BRADYCARDIA = 1 << 1
+FEVER = 1 << 2
+HYPOTHERMIA = 1 << 3
+HYPOXIA = 1 << 4
+HYPERTENSIVE_CRISIS = 1 << 5
+HYPOTENSION = 1 << 6
+HR_SPIKE = 1 << 7
+O2_DESATURATION = 1 << 8
+
+# Which codes quote which vital (their text changes when that value does)
+CODE_FIELDS = {
+    'Heart_Rate': TACHYCARDIA | BRADYCARDIA | HR_SPIKE,
+    'Temperature': FEVER | HYPOTHERMIA,
+    'O2_Saturation': HYPOXIA | O2_DESATURATION,
+    'BP_Systolic': HYPERTENSIVE_CRISIS | HYPOTENSION,
+}
+
+
 class ExplainabilityEngine:
     def __init__(self):
         self.thresholds = {
@@ -17,25 +39,25 @@ class ExplainabilityEngine:
 
         # 1. Threshold Checks
         hr = current_data.get('Heart_Rate')
-        if hr:
+        if hr is not None:
             if hr > self.thresholds['Heart_Rate']['high']:
                 explanations.append(f"CRITICAL: Extreme Tachycardia ({hr} bpm)")
             elif hr < self.thresholds['Heart_Rate']['low']:
                  explanations.append(f"CRITICAL: Bradycardia ({hr} bpm)")
 
         temp = current_data.get('Temperature')
-        if temp:
+        if temp is not None:
             if temp > self.thresholds['Temperature']['high']:
                 explanations.append(f"High Fever ({temp}°C)")
             elif temp < self.thresholds['Temperature']['low']:
                  explanations.append(f"Hypothermia Risk ({temp}°C)")
 
         o2 = current_data.get('O2_Saturation')
-        if o2 and o2 < self.thresholds['O2_Saturation']['low']:
+        if o2 is not None and o2 < self.thresholds['O2_Saturation']['low']:
              explanations.append(f"Hypoxia Alert (O2 {o2}%)")
         
         bp_sys = current_data.get('BP_Systolic')
-        if bp_sys:
+        if bp_sys is not None:
             if bp_sys > self.thresholds['BP_Systolic']['high']:
                 explanations.append(f"Hypertensive Crisis (Sys {bp_sys})")
             elif bp_sys < self.thresholds['BP_Systolic']['low']:
@@ -46,15 +68,75 @@ class ExplainabilityEngine:
             prev_data = history[-1] # Last recorded state
             
             # Rapid Heart Rate Spike (> 20 bpm increase)
-            if hr and prev_data.get('Heart_Rate'):
+            if hr is not None and prev_data.get('Heart_Rate') is not None:
                 diff = hr - prev_data['Heart_Rate']
                 if diff > 20:
                      explanations.append(f"Sudden HR Spike (+{diff} bpm)")
             
             # Rapid O2 Drop (> 5% drop)
-            if o2 and prev_data.get('O2_Saturation'):
+            if o2 is not None and prev_data.get('O2_Saturation') is not None:
                 diff = prev_data['O2_Saturation'] - o2
                 if diff > 5:
                      explanations.append(f"Rapid O2 Desaturation (-{diff}%)")
 
         return explanations
+
+    def detect_anomalies_batch(self, vitals: dict, previous: dict = None) -> np.ndarray:
+        """
+        Same rules as detect_anomalies, evaluated for many patients at once.
+        vitals / previous: {'Heart_Rate': array, 'Temperature': array, ...} (NaN = missing).
+        previous is the last recorded sample; None skips the trend rules.
+        Returns one uint16 code per patient (OR of the anomaly bits, 0 = nothing abnormal).
+        """
+        t = self.thresholds
+        hr = np.asarray(vitals['Heart_Rate'], dtype=np.float64)
+        temp = np.asarray(vitals['Temperature'], dtype=np.float64)
+        o2 = np.asarray(vitals['O2_Saturation'], dtype=np.float64)
+        bp_sys = np.asarray(vitals['BP_Systolic'], dtype=np.float64)
+        codes = np.zeros(hr.shape, dtype=np.uint16)
+
+        # 1. Threshold checks (high and low are exclusive, like the if/elif above)
+        np.bitwise_or(codes, TACHYCARDIA, out=codes, where=hr > t['Heart_Rate']['high'])
+        np.bitwise_or(codes, BRADYCARDIA, out=codes, where=hr < t['Heart_Rate']['low'])
+        np.bitwise_or(codes, FEVER, out=codes, where=temp > t['Temperature']['high'])
+        np.bitwise_or(codes, HYPOTHERMIA, out=codes, where=temp < t['Temperature']['low'])
+        np.bitwise_or(codes, HYPOXIA, out=codes, where=o2 < t['O2_Saturation']['low'])
+        np.bitwise_or(codes, HYPERTENSIVE_CRISIS, out=codes, where=bp_sys > t['BP_Systolic']['high'])
+        np.bitwise_or(codes, HYPOTENSION, out=codes, where=bp_sys < t['BP_Systolic']['low'])
+
+        # 2. Trend analysis
+        if previous is not None:
+            np.bitwise_or(codes, HR_SPIKE, out=codes, where=hr - np.asarray(previous['Heart_Rate'], dtype=np.float64) > 20)
+            np.bitwise_or(codes, O2_DESATURATION, out=codes, where=np.asarray(previous['O2_Saturation'], dtype=np.float64) - o2 > 5)
+        return codes
+
+    @staticmethod
+    def describe_anomalies(code: int, current: dict, previous: dict = None) -> list:
+        """
+        Explanation strings for one patient's anomaly code (same text as detect_anomalies).
+        Only called for flagged patients that are actually being sent.
+        """
+        explanations = []
+        hr = current.get('Heart_Rate')
+        temp = current.get('Temperature')
+        o2 = current.get('O2_Saturation')
+        bp_sys = current.get('BP_Systolic')
+        if code & TACHYCARDIA:
+            explanations.append(f"CRITICAL: Extreme Tachycardia ({hr} bpm)")
+        elif code & BRADYCARDIA:
+            explanations.append(f"CRITICAL: Bradycardia ({hr} bpm)")
+        if code & FEVER:
+            explanations.append(f"High Fever ({temp}°C)")
+        elif code & HYPOTHERMIA:
+            explanations.append(f"Hypothermia Risk ({temp}°C)")
+        if code & HYPOXIA:
+            explanations.append(f"Hypoxia Alert (O2 {o2}%)")
+        if code & HYPERTENSIVE_CRISIS:
+            explanations.append(f"Hypertensive Crisis (Sys {bp_sys})")
+        elif code & HYPOTENSION:
+            explanations.append(f"Hypotension (Sys {bp_sys})")
+        if code & HR_SPIKE:
+            explanations.append(f"Sudden HR Spike (+{hr - previous['Heart_Rate']} bpm)")
+        if code & O2_DESATURATION:
+            explanations.append(f"Rapid O2 Desaturation (-{previous['O2_Saturation'] - o2}%)")
+        return explanations
@@ -0,0 +1,319 @@
+"""
+Clinician feedback and incremental retraining.
+
+FeedbackLog: append-only JSON-lines log of (model features, confirmed risk, confirmed
+department). Records are buffered and written in batches (one append per batch).
+
+Retrainer: once RETRAIN_THRESHOLD new records have arrived, runs retrain() in a separate
+process (spawned, low priority, RETRAIN_THREADS threads), so serving latency is unaffected.
+retrain() warm-starts both boosters of the serving model bundle on the feedback it hasn't
+seen and publishes the result as a new bundle version only if validation accuracy doesn't
+regress against the serving model (on a reference sample of the dataset and on a holdout
+of the feedback). Publishing doesn't promote: until a candidate is activated, the next
+attempt starts again from the serving model with all of its unseen feedback.
+"""
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDBACK_PATH = os.environ.get('FEEDBACK_LOG', os.path.join(BACKEND_DIR, 'feedback', 'feedback.jsonl'))
+RETRAIN_THRESHOLD = int(os.environ.get('RETRAIN_THRESHOLD', 200))
+RETRAIN_ROUNDS = int(os.environ.get('RETRAIN_ROUNDS', 20))
+RETRAIN_THREADS = int(os.environ.get('RETRAIN_THREADS', 1))
+# Allowed accuracy drop per head and validation set before a candidate is rejected
+REGRESSION_TOLERANCE = float(os.environ.get('RETRAIN_TOLERANCE', 0.005))
+# Every n-th feedback record is held out for validation instead of training
+HOLDOUT_EVERY = 5
+REFERENCE_ROWS = 2000
+BATCH_SIZE = 32
+FLUSH_INTERVAL = 5.0
+
+# Same columns as model.FEATURES (not imported: model.py pulls in scikit-learn)
+FEATURES = ['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']
+LABELS = {'risk': 'Risk_Level', 'dept': 'Department'}
+
+
+class FeedbackLog:
+    """Append-only feedback log, written in batches"""
+    def __init__(self, path=FEEDBACK_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._oldest = None
+        self.count = self._count_lines()  # records on disk
+
+    def _count_lines(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'rb') as f:
+            return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1024 * 1024), b''))
+
+    @property
+    def total(self):
+        return self.count + len(self._buffer)
+
+    def record(self, features, risk=None, department=None, source='predict'):
+        """Buffers one confirmed outcome (features: dict or object with the model columns)"""
+        get = features.get if isinstance(features, dict) else partial(getattr, features)
+        entry = {
+            "ts": round(time.time(), 3),
+            "features": {f: get(f, None) for f in FEATURES},
+            "Risk_Level": risk or None,
+            "Department": department or None,
+            "source": source,
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._oldest >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write("".join(self._buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(self._buffer)
+        self._buffer = []
+        self._oldest = None
+
+    def read(self, start=0, end=None):
+        """Records [start, end) as dicts (a torn last line from a crash is skipped)"""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path) as f:
+            for i, line in enumerate(f):
+                if end is not None and i >= end:
+                    break
+                if i < start:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+
+def _accuracy(booster, X, y):
+    import numpy as np
+    import xgboost as xgb
+    if len(y) == 0:
+        return None
+    proba = booster.predict(xgb.DMatrix(X)).reshape(len(y), -1)
+    return float(np.mean(proba.argmax(axis=1) == y))
+
+
+def _labelled(frame, column, classes):
+    """Rows whose label is one of the model's classes, and the encoded labels"""
+    import numpy as np
+    index = {c: i for i, c in enumerate(classes)}
+    keep = frame[column].map(lambda v: v in index).to_numpy(dtype=bool)
+    return frame[keep], np.array([index[v] for v in frame[column][keep]], dtype=np.int64)
+
+
+def retrain(log_path, start, end, model_dir, base_version, reference_path, nthread=RETRAIN_THREADS,
+            rounds=RETRAIN_ROUNDS, tolerance=REGRESSION_TOLERANCE):
+    """
+    Worker-process job: warm-starts the base bundle's boosters on feedback records [start, end)
+    and writes a new bundle version if no head loses accuracy on either validation set.
+    Returns a summary dict (status: published | rejected | skipped).
+    """
+    try:
+        os.nice(10)  # Serving comes first
+    except (AttributeError, OSError):
+        pass
+    import pandas as pd
+    import xgboost as xgb
+    from model_bundle import load_engine, next_version, read_manifest
+
+    base_dir = os.path.join(model_dir, base_version)
+    manifest = read_manifest(base_dir)
+    engine = load_engine(base_dir)
+    boosters = {'risk': engine.risk_booster, 'dept': engine.dept_booster}
+
+    records = FeedbackLog(log_path).read(start, end)
+    rows = pd.DataFrame([dict(r['features'], Risk_Level=r.get('Risk_Level'), Department=r.get('Department')) for r in records])
+    if rows.empty:
+        return {"status": "skipped", "detail": "no feedback records", "base": base_version}
+    holdout_mask = (pd.RangeIndex(len(rows)) % HOLDOUT_EVERY) == HOLDOUT_EVERY - 1
+    train_rows, holdout = rows[~holdout_mask], rows[holdout_mask]
+    reference = pd.read_csv(reference_path, usecols=FEATURES + list(LABELS.values()))
+    reference = reference.sample(n=min(REFERENCE_ROWS, len(reference)), random_state=0)
+
+    candidates, metrics, trained = {}, {}, {}
+    for head, column in LABELS.items():
+        classes = manifest['classes'][head]
+        base = boosters[head]
+        frame, y = _labelled(train_rows, column, classes)
+        trained[head] = len(y)
+        if len(y):
+            params = {'objective': 'multi:softprob', 'num_class': len(classes), 'learning_rate': 0.05,
+                      'max_depth': 8, 'tree_method': 'hist', 'nthread': nthread, 'seed': 42}
+            matrix = xgb.DMatrix(engine.transform(frame[FEATURES]), label=y)
+            candidates[head] = xgb.train(params, matrix, num_boost_round=rounds, xgb_model=base.copy())
+        else:
+            candidates[head] = base
+        metrics[head] = {}
+        for name, data in (('reference', reference), ('feedback_holdout', holdout)):
+            frame, y = _labelled(data, column, classes)
+            if len(y) == 0:
+                continue
+            X = engine.transform(frame[FEATURES])
+            metrics[head][name] = {'base': _accuracy(base, X, y), 'candidate': _accuracy(candidates[head], X, y), 'rows': len(y)}
+
+    summary = {"base": base_version, "records": len(rows), "trained_rows": trained, "metrics": metrics}
+    if not any(trained.values()):
+        return dict(summary, status="skipped", detail="no records with a known label")
+    regressions = [f"{head}/{name}" for head, sets in metrics.items() for name, m in sets.items()
+                   if m['candidate'] < m['base'] - tolerance]
+    if regressions:
+        return dict(summary, status="rejected", detail=f"accuracy regressed on {', '.join(regressions)}")
+
+    # Publish: same preprocessing arrays, new boosters, manifest last (the bundle is complete once it exists)
+    version = next_version(model_dir)
+    bundle_dir = os.path.join(model_dir, version)
+    os.makedirs(bundle_dir)
+    for filename in os.listdir(base_dir):
+        if filename != 'manifest.json' and filename not in manifest['models'].values():
+            shutil.copy2(os.path.join(base_dir, filename), bundle_dir)
+    for head, filename in manifest['models'].items():
+        candidates[head].save_model(os.path.join(bundle_dir, filename))
+    new_manifest = dict(manifest, version=version, created=datetime.datetime.now().isoformat(timespec='seconds'),
+                        parent=base_version, feedback={'records': [start, end], 'metrics': metrics},
+                        xgboost_version=xgb.__version__)
+    with open(os.path.join(bundle_dir, 'manifest.json'), 'w') as f:
+        json.dump(new_manifest, f, indent=2)
+    return dict(summary, status="published", version=version)
+
+
+class Retrainer:
+    """
+    Starts retrain() in a separate process when enough feedback is pending.
+    base_version() names the serving bundle (default: the registry's ACTIVE pointer, else the
+    newest); the records it was trained through come from its manifest.
+    State (records attempted, last result) survives restarts in state.json.
+    """
+    def __init__(self, log, model_dir, reference_path, threshold=RETRAIN_THRESHOLD, state_path=None, on_publish=None,
+                 base_version=None):
+        self.log = log
+        self.model_dir = model_dir
+        self.reference_path = reference_path
+        self.threshold = threshold
+        self.state_path = state_path or os.path.join(os.path.dirname(log.path) or '.', 'state.json')
+        self.on_publish = on_publish
+        self.base_version = base_version or self._pointer_version
+        self._lock = threading.Lock()
+        self._executor = None
+        self.future = None
+        self.state = {"attempted_through": 0, "last_result": None}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state.update(json.load(f))
+
+    def _pointer_version(self):
+        from model_bundle import list_versions
+        from model_registry import ACTIVE_FILE
+        versions = list_versions(self.model_dir)
+        path = os.path.join(self.model_dir, ACTIVE_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                version = f.read().strip()
+            if version in versions:
+                return version
+        return versions[-1] if versions else None
+
+    def _trained_through(self, version):
+        """Feedback records a bundle has been trained on (a retrained bundle's manifest records its range)"""
+        from model_bundle import list_versions, read_manifest
+        if version not in list_versions(self.model_dir):
+            return 0
+        manifest = read_manifest(os.path.join(self.model_dir, version))
+        return (manifest.get('feedback') or {}).get('records', [0, 0])[1]
+
+    @property
+    def pending(self):
+        """Records that arrived since the last attempt"""
+        return self.log.total - self.state['attempted_through']
+
+    @property
+    def running(self):
+        return self.future is not None and not self.future.done()
+
+    def maybe_start(self, force=False):
+        """Starts a retraining job if the threshold is reached (or force) and none is running"""
+        from model_bundle import list_versions
+        with self._lock:
+            if self.running or self.pending <= 0 or (self.pending < self.threshold and not force):
+                return False
+            base = self.base_version()
+            if base not in list_versions(self.model_dir):
+                return False  # nothing to warm-start from (no bundle, or a legacy model is serving)
+            start = self._trained_through(base)
+            self.log.flush()
+            end = self.log.count
+            if self._executor is None:
+                # spawn: don't fork a server process that has threads and an event loop
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            # Everything the serving model hasn't seen: records from rejected or unpromoted attempts
+            # are retried with the new ones
+            self.future = self._executor.submit(retrain, self.log.path, start, end,
+                                                self.model_dir, base, self.reference_path)
+            self.state['attempted_through'] = end
+            self.future.add_done_callback(self._finished)
+            return True
+
+    def _finished(self, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"status": "error", "detail": str(e)}
+        result['finished'] = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self.state['last_result'] = result
+            self._save_state()
+        print(f"Feedback retraining {result['status']}: {result.get('version') or result.get('detail', '')}")
+        if result['status'] == 'published' and self.on_publish:
+            self.on_publish(result)
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def status(self):
+        base = self.base_version()
+        return {
+            "base_version": base,
+            "records": self.log.total,
+            "pending": self.pending,
+            "threshold": self.threshold,
+            "running": self.running,
+            "trained_through": self._trained_through(base),
+            "last_result": self.state['last_result'],
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,218 @@
+import numpy as np
+import scipy.sparse as sp
+import xgboost as xgb
+
+
+def fitted_booster(classifier):
+    """
+    The classifier's booster, cut at the best iteration if it was trained with early stopping
+    (the sklearn wrapper predicts with best_iteration, a raw Booster would use every tree).
+    """
+    booster = classifier.get_booster()
+    best = getattr(classifier, 'best_iteration', None)
+    if best is not None and best + 1 < booster.num_boosted_rounds():
+        booster = booster[:best + 1]
+    return booster
+
+
+class TriageEngine:
+    """
+    Fused inference for the risk and department models.
+    The input frame is transformed ONCE into a sparse matrix, which is fed to both boosters.
+    Class and confidence come from a single probability call per model.
+    """
+    def __init__(self, preprocessor, risk_booster, dept_booster, risk_classes, dept_classes, feature_map, dept_preprocessor=None, version=None):
+        self.preprocessor = preprocessor
+        # Only set when the two models were trained on different preprocessors (legacy artifacts)
+        self.dept_preprocessor = dept_preprocessor
+        self.risk_booster = risk_booster
+        self.dept_booster = dept_booster
+        self.risk_classes = np.asarray(risk_classes)
+        self.dept_classes = np.asarray(dept_classes)
+        # Expanded feature names -> source fields, resolved once at load
+        self.feature_map = feature_map
+        self.version = version
+
+    @classmethod
+    def from_pipelines(cls, risk_model, dept_model, risk_le, dept_le, version=None):
+        """Builds the engine from the saved sklearn Pipelines (preprocessor + classifier)."""
+        risk_pre = risk_model.named_steps['preprocessor']
+        dept_pre = dept_model.named_steps['preprocessor']
+        shared = same_preprocessor(risk_pre, dept_pre)
+        if not shared:
+            print("Warning: risk/dept preprocessors differ, falling back to two transforms per batch.")
+        return cls(
+            risk_pre,
+            fitted_booster(risk_model.named_steps['classifier']),
+            fitted_booster(dept_model.named_steps['classifier']),
+            risk_le.classes_,
+            dept_le.classes_,
+            FeatureMap.from_preprocessor(risk_pre),
+            dept_preprocessor=None if shared else dept_pre,
+            version=version
+        )
+
+    def transform(self, frame):
+        """Runs the ColumnTransformer once for the whole frame."""
+        return self.preprocessor.transform(frame)
+
+    def predict(self, frame, explain=True):
+        """
+        Scores a batch. Returns a dict of arrays (one entry per row):
+        risk / dept (decoded labels), risk_proba / dept_proba (full class probabilities),
+        the shared feature matrix and, if explain=True, per-patient explanations
+        from the risk booster's contributions (same DMatrix as the prediction).
+        """
+        features = self.transform(frame)
+        dept_features = features if self.dept_preprocessor is None else self.dept_preprocessor.transform(frame)
+
+        n = len(frame)
+        if explain:
+            risk_matrix = xgb.DMatrix(features)
+            risk_proba = self.risk_booster.predict(risk_matrix).reshape(n, -1)
+            contribs = self.risk_booster.predict(risk_matrix, pred_contribs=True)
+        else:
+            risk_proba = self.risk_booster.inplace_predict(features).reshape(n, -1)
+        dept_proba = self.dept_booster.inplace_predict(dept_features).reshape(n, -1)
+
+        risk_idx = risk_proba.argmax(axis=1)
+        prediction = {
+            "risk": self.risk_classes[risk_idx],
+            "dept": self.dept_classes[dept_proba.argmax(axis=1)],
+            "risk_proba": risk_proba,
+            "dept_proba": dept_proba,
+            "features": features
+        }
+        if explain:
+            # Multi-class contributions are (n, classes, features + bias): keep the predicted class
+            if contribs.ndim == 3:
+                contribs = contribs[np.arange(n), risk_idx]
+            prediction["explanation"] = self.feature_map.explain(contribs[:, :-1], features, frame)
+        return prediction
+
+
+class FeatureMap:
+    """
+    Maps the expanded ColumnTransformer features (scaled vitals, one-hot gender,
+    symptom and note n-grams) back onto the source fields they came from.
+    """
+    def __init__(self, feature_names, fields, feature_field, text_fields):
+        self.feature_names = np.asarray(feature_names)
+        self.fields = list(fields)
+        self.feature_field = np.asarray(feature_field)
+        # Sparse (features x fields) 0/1 matrix: field contribution = contribs @ aggregation
+        self.aggregation = sp.csr_matrix(
+            (np.ones(len(self.feature_field)), (np.arange(len(self.feature_field)), self.feature_field)),
+            shape=(len(self.feature_field), len(self.fields))
+        )
+        # Text fields keep their contiguous n-gram block so we can name the strongest term
+        self.text_fields = {}
+        self.terms = np.array([name.split('__', 1)[-1] for name in self.feature_names], dtype=object)
+        for field in text_fields:
+            group = self.fields.index(field)
+            cols = np.flatnonzero(self.feature_field == group)
+            if len(cols):
+                self.text_fields[group] = (cols[0], cols[-1] + 1)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Resolves feature names and their source columns from a fitted ColumnTransformer."""
+        feature_names = preprocessor.get_feature_names_out()
+        fields = []
+        feature_field = np.zeros(len(feature_names), dtype=np.int32)
+        text_fields = []
+        for name, _, columns in preprocessor.transformers_:
+            if name == 'remainder':
+                continue
+            block = preprocessor.output_indices_[name]
+            width = block.stop - block.start
+            if isinstance(columns, str):
+                # Text column (CountVectorizer): every n-gram belongs to the one field
+                text_fields.append(columns)
+                columns = [columns]
+            columns = list(columns)
+            for c in columns:
+                if c not in fields:
+                    fields.append(c)
+            if width == len(columns):
+                # One output per input column (numeric vitals)
+                for offset, c in enumerate(columns):
+                    feature_field[block.start + offset] = fields.index(c)
+            else:
+                # Several outputs per column (one-hot / n-grams): match on the prefix
+                for i in range(block.start, block.stop):
+                    suffix = feature_names[i].split('__', 1)[-1]
+                    owner = next((c for c in columns if suffix.startswith(f"{c}_")), columns[0])
+                    feature_field[i] = fields.index(owner)
+        return cls(feature_names, fields, feature_field, text_fields)
+
+    def explain(self, contribs, features, frame, top_k=3):
+        """
+        Vectorized explanations for a batch: sums contributions per source field,
+        keeps the top_k fields pushing towards the predicted class, and for text fields
+        names the present n-gram with the highest contribution.
+        """
+        field_contribs = np.asarray(self.aggregation.T.dot(contribs.T)).T
+        top_fields = np.argsort(-field_contribs, axis=1)[:, :top_k]
+
+        # Strongest present term per text field (absent n-grams are masked out)
+        present = features.toarray() > 0 if sp.issparse(features) else np.asarray(features) > 0
+        top_terms = {}
+        for group, (start, stop) in self.text_fields.items():
+            masked = np.where(present[:, start:stop], contribs[:, start:stop], -np.inf)
+            best = masked.argmax(axis=1)
+            has_term = np.isfinite(masked[np.arange(len(masked)), best])
+            top_terms[group] = np.where(has_term, self.terms[start + best], None)
+
+        # Only the top_k fields per patient get formatted
+        rows = frame.to_dict(orient='records')
+        explanations = []
+        for i, row in enumerate(rows):
+            explanation = []
+            for group in top_fields[i]:
+                if field_contribs[i, group] <= 0:
+                    break
+                field = self.fields[group]
+                term = top_terms[group][i] if group in top_terms else None
+                explanation.append(describe_field(field, row.get(field), term))
+            explanations.append(explanation or ["Complex Pattern Detected"])
+        return explanations
+
+
+def describe_field(field, value, term=None):
+    """Human-readable context for one contributing field"""
+    if field == 'O2_Saturation':
+        return f"O2 Saturation ({value}%)"
+    if field == 'Temperature':
+        return f"Temperature ({value}C)"
+    if field == 'Heart_Rate':
+        return f"Heart Rate ({value} bpm)"
+    if field == 'Medical_Notes':
+        return f"Medical Notes: '{term}'" if term else "Medical Notes"
+    if field == 'Symptoms':
+        return f"Symptoms: '{term}'" if term else "Symptoms"
+    if 'BP' in field or field in ('Age', 'Gender'):
+        return f"{field} ({value})"
+    return field
+
+
+def same_preprocessor(a, b):
+    """
+    True if two fitted ColumnTransformers produce identical output.
+    Models trained by train_models() share one fitted preprocessor; older artifacts
+    fitted a copy per pipeline on the same data, which is equivalent in practice.
+    """
+    if a is b:
+        return True
+    try:
+        if list(a.get_feature_names_out()) != list(b.get_feature_names_out()):
+            return False
+        num_a = a.named_transformers_['num']
+        num_b = b.named_transformers_['num']
+        return (
+            np.allclose(num_a.named_steps['imputer'].statistics_, num_b.named_steps['imputer'].statistics_)
+            and np.allclose(num_a.named_steps['scaler'].mean_, num_b.named_steps['scaler'].mean_)
+            and np.allclose(num_a.named_steps['scaler'].scale_, num_b.named_steps['scaler'].scale_)
+        )
+    except Exception:
+        return False
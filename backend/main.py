@@ -1,22 +1,38 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Header, Body
+from pydantic import BaseModel, ValidationError
 
-from typing import List
+from typing import Any, List, Optional
 import asyncio
 import json
+import os
+import time
 import random
 from explainability import ExplainabilityEngine
+from population import PopulationStats
+from bias_stats import BiasStats
+from dataset import get_dataset, DATASET_PATH
+from simulation import VitalsSimulation
+from vitals_store import VitalsStore
+from doctors import DoctorRegistry
+from triage_queue import TriageQueue
+from pagination import PatientPages
+from triage_rules import get_rule_engine
+from feedback import FeedbackLog, Retrainer
+from broadcast import ConnectionManager
+from subscriptions import Subscription, PatientIndex, EVERYTHING
+from model_registry import ModelRegistry
 
 # Initialize Explainability Engine
 explain_engine = ExplainabilityEngine()
-import joblib
 import pandas as pd
 import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
-from pypdf import PdfReader
-import io
-import re
-import requests
+from fastapi.responses import StreamingResponse
+import pdf_extract
+import bulk_import
+import httpx
+from ollama_client import OllamaClient, OllamaError
+from chat_cache import ChatResponseCache
 
 # Initialize App
 app = FastAPI(title="Smart Patient Triage API") # Reload Triggered Again
@@ -26,17 +42,11 @@ class ChatRequest(BaseModel):
     message: str
     history: List[dict] = [] # Optional: context for memory
 
-@app.post("/chat")
-def chat_with_bot(request: ChatRequest):
-    """
-    Communicates with local Ollama instance (Qwen3 1.7B - Non-thinking mode)
-    """
-    ollama_url = "http://localhost:11434/api/chat"
-    
-    # ── Comprehensive System Instruction ──
-    system_prompt = {
-        "role": "system",
-        "content": """You are **OmniTriage AI** — the intelligent triage assistant powering the OmniTriage Smart Patient Triage System.
+# ── Comprehensive System Instruction ──
+# Built once at import, reused for every chat
+SYSTEM_PROMPT = {
+    "role": "system",
+    "content": """You are **OmniTriage AI** — the intelligent triage assistant powering the OmniTriage Smart Patient Triage System.
 
 ━━━━━━━━━━━━━  IDENTITY & ROLE  ━━━━━━━━━━━━━
 • You are a virtual **pre-screening triage assistant** embedded in a hospital's AI triage platform.
@@ -129,39 +139,93 @@ Map symptoms to these departments (same as our ML model):
 ❌ Generate or discuss graphic, violent, or harmful content  
 ❌ Pretend to be a licensed physician or nurse  
 """
-    }
-    
-    messages = [system_prompt] + request.history + [{"role": "user", "content": request.message}]
-    
-    # Build payload
-    payload = {
-        "model": "qwen3:1.7b",
-        "messages": messages,
-        "stream": False,
-        "think": False
-    }
+}
 
-    try:
-        response = requests.post(ollama_url, json=payload)
+# Shared keep-alive client (connect/read timeouts via OLLAMA_CONNECT_TIMEOUT / OLLAMA_READ_TIMEOUT)
+ollama = OllamaClient()
 
-        if response.status_code == 200:
-            data = response.json()
-            return {"response": data['message']['content']}
-        else:
-            error_msg = response.text
-            try:
-                error_json = response.json()
-                if 'error' in error_json: error_msg = error_json['error']
-            except: pass
-            return {"response": f"System Error (Qwen3): {error_msg}. Please check Ollama metrics/logs."}
-            
-    except requests.exceptions.RequestException as e:
-        print(f"Ollama Connection Error: {e}")
+# Reply cache in front of Ollama (emergency messages always bypass it; near-duplicate
+# matching is opt-in via CHAT_CACHE_SIMILARITY=1)
+chat_cache = ChatResponseCache(
+    max_entries=int(os.environ.get('CHAT_CACHE_SIZE', 512)),
+    ttl=float(os.environ.get('CHAT_CACHE_TTL', 3600)),
+    use_similarity=os.environ.get('CHAT_CACHE_SIMILARITY', '0') == '1'
+)
+
+def build_chat_messages(request: ChatRequest):
+    return [SYSTEM_PROMPT] + request.history + [{"role": "user", "content": request.message}]
+
+@app.post("/chat")
+async def chat_with_bot(request: ChatRequest):
+    """
+    Communicates with local Ollama instance (Qwen3 1.7B - Non-thinking mode).
+    Async: a long generation no longer holds a threadpool worker that /predict needs.
+    """
+    cached = chat_cache.get(request.message, request.history)
+    if cached is not None:
+        return {"response": cached, "cached": True}
+
+    messages = build_chat_messages(request)
+
+    try:
+        reply = await ollama.chat(messages)
+        chat_cache.put(request.message, request.history, reply)
+        return {"response": reply}
+    except OllamaError as e:
+        return {"response": f"System Error (Qwen3): {e}. Please check Ollama metrics/logs."}
+    except httpx.HTTPError as e:
+        print(f"Ollama Connection Error: {e!r}")
         return {"response": "I'm having trouble connecting to my brain. Please ensure 'ollama serve' is running."}
     except Exception as e:
         print(f"Chat Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(data: dict, event: str = None):
+    """One Server-Sent Event frame"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams tokens back as Server-Sent Events as soon as Ollama generates them:
+    data: {"token": "..."} ... then data: {"done": true, "response": "<full reply>"}
+    Errors are sent as an 'error' event so the client can show them in place.
+    """
+    messages = build_chat_messages(request)
+    cached = chat_cache.get(request.message, request.history)
+
+    async def event_stream():
+        if cached is not None:
+            yield sse_event({"token": cached})
+            yield sse_event({"done": True, "response": cached, "cached": True})
+            return
+
+        tokens = []
+        try:
+            async for token in ollama.stream_chat(messages):
+                tokens.append(token)
+                yield sse_event({"token": token})
+            reply = "".join(tokens)
+            chat_cache.put(request.message, request.history, reply)
+            yield sse_event({"done": True, "response": reply})
+        except OllamaError as e:
+            yield sse_event({"message": f"System Error (Qwen3): {e}. Please check Ollama metrics/logs."}, event="error")
+        except httpx.HTTPError as e:
+            print(f"Ollama Connection Error: {e!r}")
+            yield sse_event({"message": "I'm having trouble connecting to my brain. Please ensure 'ollama serve' is running."}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/chat/cache_stats")
+def chat_cache_stats():
+    """Hit/miss counters for the chat reply cache"""
+    return chat_cache.stats()
+
 # CORS (Allow Frontend to connect)
 app.add_middleware(
     CORSMiddleware,
@@ -171,54 +235,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load Models & Encoders
-try:
+# Load Models & Encoders (lazily)
+# Importing xgboost/sklearn and unpickling takes seconds, so the models are loaded on first use
+# (or in the background at startup) instead of at import time - /health is served immediately.
+# The registry holds the serving version and swaps it under live traffic (see /models endpoints).
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+# Optional shared secret for the /models admin endpoints (X-Admin-Token header)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def load_legacy_engine():
+    """Legacy joblib Pipelines, used only if no versioned bundle has been exported to models/"""
+    import joblib
+    from inference import TriageEngine
     risk_model = joblib.load('risk_model.joblib')
     dept_model = joblib.load('dept_model.joblib')
-    # Load Encoders to decoding predictions if needed (though we currently return raw strings from heuristics? No, we need to decode)
-    # Actually, the model returns integers now. We must decode them.
+    # The model returns integers. We must decode them with the saved encoders.
     risk_le = joblib.load('risk_le.joblib')
     dept_le = joblib.load('dept_le.joblib')
-    print("Models and Encoders loaded successfully.")
-except Exception as e:
-    print(f"Error loading models: {e}")
-    risk_model = None
-    dept_model = None
-    risk_le = None
-    dept_le = None
-
-
-# Load Population Data for Comparison
-try:
-    population_df = pd.read_csv('patients_dataset.csv')
-    print("Population data loaded successfully.")
-except Exception as e:
-    print(f"Error loading population data: {e}")
-    population_df = pd.DataFrame()
+    # Fused inference: one preprocessing pass shared by both boosters
+    return TriageEngine.from_pipelines(risk_model, dept_model, risk_le, dept_le, version='joblib')
+
+model_registry = ModelRegistry(MODEL_DIR, fallback=load_legacy_engine)
+
+def get_engine():
+    """Returns the active TriageEngine, loading it on first call. None if loading failed."""
+    return model_registry.get()
+
+
+# Shared patient dataset: parsed once (typed columns + binary cache), read-only for every subsystem
+dataset = get_dataset()
+print(f"Population data loaded successfully ({len(dataset)} patients).")
+
+# Percentile index built once at startup (sorted arrays per vital and per age/gender cohort)
+population_stats = PopulationStats(dataset.frame)
+dataset.on_change(population_stats.sync)
 
 def get_population_comparison(patient_data):
     """
-    Compares the current patient's vitals to the entire population.
-    Returns percentile rankings.
+    Compares the current patient's vitals to the entire population and to their cohort.
+    Returns percentile rankings (O(log N) lookups against the precomputed index).
     """
-    if population_df.empty:
-        return {}
-    
-    stats = {}
-    
-    # Heart Rate
-    hr_percentile = (population_df['Heart_Rate'] < patient_data.Heart_Rate).mean() * 100
-    stats['Heart_Rate_Percentile'] = f"Higher than {hr_percentile:.1f}% of patients"
-    
-    # Temperature
-    temp_percentile = (population_df['Temperature'] < patient_data.Temperature).mean() * 100
-    stats['Temperature_Percentile'] = f"Higher than {temp_percentile:.1f}% of patients"
-    
-    # BP Systolic
-    bp_percentile = (population_df['BP_Systolic'] < patient_data.BP_Systolic).mean() * 100
-    stats['BP_Percentile'] = f"Higher than {bp_percentile:.1f}% of patients"
-    
-    return stats
+    dataset.maybe_refresh()
+    return population_stats.compare(patient_data)
 
 # Input Schema
 
@@ -234,10 +292,15 @@ class PatientData(BaseModel):
     Medical_Notes: str = "" # New field for EHR text
     Pre_Existing_Conditions: str = "" # New field
     Risk_Level: str = "" # Optional manual override or training label
+    Department: str = "" # Optional confirmed department (training label)
 
 @app.get("/health")
 def health_check():
-    return {"status": "active", "models_loaded": risk_model is not None}
+    return {
+        "status": "active",
+        "models_loaded": model_registry.active is not None,
+        "model_version": model_registry.active.version if model_registry.active else None
+    }
 
 # Advanced Doctor Management
 # Data Structure: List of objects for valid JSON handling and easier filtering
@@ -270,6 +333,9 @@ DOCTORS_DB = [
     {"id": "gp_2", "name": "Dr. Smith", "dept": "General Medicine", "status": "Available", "spec": "Family Medicine"},
 ]
 
+# Roster with per-department Available/Busy pools (O(1) atomic pick/release, incremental stats)
+doctor_registry = DoctorRegistry(DOCTORS_DB)
+
 def assign_doctor(department, risk_level):
     """
     Intelligent Assignment Logic:
@@ -277,116 +343,140 @@ def assign_doctor(department, risk_level):
     2. If Risk is High/Critical, filter for 'Available' doctors ONLY.
     3. If no specific department match, fallback to General Medicine/GP.
     """
-    candidate_docs = [d for d in DOCTORS_DB if d['dept'] == department]
-    
-    if not candidate_docs:
-        # Fallback to General Practice if specific dept not found
-        candidate_docs = [d for d in DOCTORS_DB if d['dept'] in ['General Practice', 'General Medicine']]
-
-    # Filter by Availability
-    available_docs = [d for d in candidate_docs if d['status'] == 'Available']
-    
-    assigned_doc = None
-    
-    if risk_level == 'High':
-        # CRITICAL: Must find an Available doctor if possible
-        if available_docs:
-             assigned_doc = available_docs[0] # Grab first available
-        else:
-             # If all busy, we must interrupt. Pick the first one.
-             # In real world, this would trigger an 'Overload' alert.
-             assigned_doc = candidate_docs[0] if candidate_docs else None
-    elif risk_level == 'Medium':
-         # Urgent: Prefer available, but can wait (simulated by random choice if busy)
-         if available_docs:
-             assigned_doc = np.random.choice(available_docs)
-         else:
-             assigned_doc = np.random.choice(candidate_docs) if candidate_docs else None
-    else:
-         # Low: Load balancing (Random)
-         # To preserve 'Available' doctors for high risk, we could prefer busy ones? 
-         # No, that doesn't make sense. Just pick available if any, else random.
-         if available_docs:
-             assigned_doc = np.random.choice(available_docs)
-         else:
-             assigned_doc = np.random.choice(candidate_docs) if candidate_docs else None
-
-    # Fallback if absolutely no doctors found (shouldn't happen with default DB)
-    if not assigned_doc:
-         return {"name": "Triage Nurse", "id": "nurse_1", "dept": "General", "status": "Active"}
-
-    # Auto-update status for Simulation
-    # If High Risk, mark as Busy
-    if risk_level in ['High', 'Medium'] and assigned_doc['status'] == 'Available':
-         for d in DOCTORS_DB:
-             if d['id'] == assigned_doc['id']:
-                 d['status'] = 'Busy'
-                 break
-    
-    return assigned_doc
+    return doctor_registry.assign(department, risk_level)
 
 @app.get("/get_doctor_list")
 def get_doctor_list():
     """Returns list of doctors grouped by department for frontend"""
-    grouped = {}
-    for doc in DOCTORS_DB:
-        if doc['dept'] not in grouped:
-            grouped[doc['dept']] = []
-        grouped[doc['dept']].append(doc)
-    return grouped
+    return doctor_registry.grouped()
 
 @app.get("/get_department_stats")
 def get_department_stats():
     """Returns stats for Grid View: Available vs Total per Dept"""
-    stats = {}
-    for doc in DOCTORS_DB:
-        dept = doc['dept']
-        if dept not in stats:
-            stats[dept] = {"total": 0, "available": 0, "specs": set()}
-        
-        stats[dept]["total"] += 1
-        if doc['status'] == 'Available':
-            stats[dept]["available"] += 1
-        stats[dept]["specs"].add(doc['spec'])
-    
-    # Convert sets to lists for JSON
-    for k in stats:
-        stats[k]["specs"] = list(stats[k]["specs"])
-        
-    return stats
+    return doctor_registry.department_stats()
 
 class AvailabilityUpdate(BaseModel):
     doctor_name: str
     status: str # 'Available' or 'Busy'
 
+# --- Waiting Queue (per department, priority by risk + confidence, aged by wait time) ---
+triage_queue = TriageQueue()
+
+def hand_off_or_release(doctor_id):
+    """
+    A doctor becomes free (release, manual toggle, reset): hand them the next waiting patient
+    of their department, or mark them Available if nobody is waiting.
+    Returns (status, queue entry or None); raises KeyError for an unknown doctor.
+    """
+    doctor = doctor_registry.get(doctor_id)
+    if doctor is None:
+        raise KeyError(doctor_id)
+    entry = triage_queue.dequeue(doctor['dept'])
+    if entry is None:
+        doctor_registry.release(doctor_id)
+        return 'Available', None
+    doctor_registry.set_status(doctor_id, 'Busy')
+    return 'Busy', entry
+
 @app.post("/toggle_availability")
 def toggle_availability(update: AvailabilityUpdate):
-    for doc in DOCTORS_DB:
-        if doc['name'] == update.doctor_name:
-            doc['status'] = update.status
-            return {"status": "success", "new_state": update.status}
-    raise HTTPException(status_code=404, detail="Doctor not found")
+    doctor_id = doctor_registry.by_name.get(update.doctor_name)
+    if doctor_id is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    patient = None
+    if update.status == 'Available':
+        # Nobody stays in the queue while a doctor of their department is free
+        status, entry = hand_off_or_release(doctor_id)
+        patient = entry.as_dict(time.time()) if entry else None
+    else:
+        status = doctor_registry.set_status(doctor_id, update.status)['status']
+    return {"status": "success", "new_state": status, "patient": patient}
+
+@app.post("/doctors/{doctor_id}/release")
+def release_doctor(doctor_id: str):
+    """
+    A doctor finished with their patient: hand them the next waiting patient of their
+    department, or mark them Available if nobody is waiting.
+    """
+    try:
+        status, entry = hand_off_or_release(doctor_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return {"doctor_id": doctor_id, "status": status, "patient": entry.as_dict(time.time()) if entry else None}
+
+@app.post("/queue/{department}/dequeue")
+def dequeue_patient(department: str):
+    """Next patient of a department's queue (highest aged priority)"""
+    entry = triage_queue.dequeue(department)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Queue is empty")
+    return entry.as_dict(time.time())
+
+@app.delete("/queue/{ticket}")
+def cancel_queued_patient(ticket: str):
+    if not triage_queue.cancel(ticket):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return {"status": "cancelled", "ticket": ticket}
+
+@app.get("/queue/stats")
+def get_queue_stats():
+    """Queue depth and wait-time percentiles (current and recently served) per department"""
+    return triage_queue.stats()
 
 @app.post("/reset_doctors")
 def reset_doctors():
-    for doc in DOCTORS_DB:
-        doc['status'] = 'Available'
-    return {"status": "All doctors reset to Available"}
+    """Everyone back to Available, then waiting patients are handed to the freed doctors"""
+    doctor_registry.reset()
+    handed_off = []
+    for doctor_id in list(doctor_registry.doctors):
+        status, entry = hand_off_or_release(doctor_id)
+        if entry is not None:
+            handed_off.append({"doctor_id": doctor_id, "patient": entry.as_dict(time.time())})
+    return {"status": "All doctors reset to Available", "handed_off": handed_off}
 
 @app.get("/patients")
-def get_patients():
-    """Returns the current pool of simulated patients"""
-    # Filter to return a manageable list if needed, or all
-    return sim_manager.patients[:50] # Return top 50 for the stream
+def get_patients(sort: str = 'risk', order: Optional[str] = None, limit: int = 50,
+                 cursor: Optional[str] = None, fields: Optional[str] = None):
+    """
+    One page of simulated patients, sorted server-side.
+    sort: risk | anomaly (latest anomaly first) | department | age; order: asc | desc (default per sort).
+    cursor: `next_cursor` of the previous page. fields: comma-separated projection, e.g. to skip
+    Medical_Notes and history.
+    """
+    try:
+        rows, next_cursor = sim_manager.pages.page(sort, order, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    projection = {f.strip() for f in fields.split(',') if f.strip()} | {'Patient_ID'} if fields else None
+    return {
+        "items": sim_manager.sim.records(rows, fields=projection),
+        "next_cursor": next_cursor,
+        "total": sim_manager.sim.n,
+    }
+
+@app.get("/patients/{patient_id}/vitals")
+def get_patient_vitals(patient_id: str, since: Optional[float] = None, resolution: Optional[int] = None):
+    """
+    Vitals time series of one simulated patient, newer than `since` (unix seconds).
+    resolution: seconds per sample, one of the stored tiers (default: raw 2 s samples).
+    """
+    row = sim_manager.index.rows_by_id.get(patient_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    try:
+        series = sim_manager.store.query(row, since=since, resolution=resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"Patient_ID": patient_id, **series}
 
 @app.post("/simulate_arrival")
 def simulate_arrival():
     """Simulates a random new patient arrival"""
-    if not sim_manager.patients:
+    if not sim_manager.sim.n:
         return {}
     
     # Pick a random profile from the dataset
-    new_p = random.choice(sim_manager.patients).copy()
+    new_p = sim_manager.sim.records([random.randrange(sim_manager.sim.n)])[0]
     
     # Assign new ID and random name for visual variety
     new_p['Patient_ID'] = random.randint(10000, 99999)
@@ -399,115 +489,241 @@ def simulate_arrival():
     
     return new_p
 
-@app.post("/predict")
-def predict_triage(data: PatientData):
-    if not risk_model or not dept_model:
+# Columns the models were trained on
+MODEL_FEATURES = ['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']
+
+# RULE-BASED OVERRIDE (Safety Net): keyword rules from triage_rules.json force the department
+# (and a minimum risk) over the ML model; compiled once into a single matcher
+triage_rules = get_rule_engine()
+
+def triage_batch(patients: List[PatientData]) -> List[dict]:
+    """
+    Scores a list of patients with one model call per batch.
+    Builds a single DataFrame, runs preprocessing + predict_proba once for the whole batch,
+    then applies keyword overrides and doctor assignment row by row (in input order).
+    Returns one entry per patient, in the same order: either the triage result or {"error": ...}.
+    """
+    # One engine for the whole batch: a model swap mid-request doesn't affect it
+    engine = get_engine()
+    if not engine:
         raise HTTPException(status_code=500, detail="Models not loaded")
+    if not patients:
+        return []
     
-    # Prepare DataFrame for prediction
-    input_data = pd.DataFrame([{
-        'Age': data.Age,
-        'Gender': data.Gender,
-        'BP_Systolic': data.BP_Systolic,
-        'BP_Diastolic': data.BP_Diastolic,
-        'Heart_Rate': data.Heart_Rate,
-        'Temperature': data.Temperature,
-        'O2_Saturation': data.O2_Saturation,
-        'Symptoms': data.Symptoms,
-        'Medical_Notes': data.Medical_Notes
-    }])
+    # Clinician-confirmed labels go to the feedback log (buffered, written in batches)
+    labelled = [p for p in patients if p.Risk_Level or p.Department]
+    for p in labelled:
+        feedback_log.record(p, p.Risk_Level, p.Department)
+    if labelled:
+        retrainer.maybe_start()
     
-    # Predict (Returns indices)
-    risk_pred_idx = risk_model.predict(input_data)[0]
-    dept_pred_idx = dept_model.predict(input_data)[0]
-    
-    # Decode Predictions
-    risk_pred = risk_le.inverse_transform([risk_pred_idx])[0]
-    dept_pred = dept_le.inverse_transform([dept_pred_idx])[0]
-
-    # --- RULE-BASED OVERRIDE (Safety Net) ---
-    # Force specific departments for critical keywords, overriding the ML model
-    symptoms_lower = data.Symptoms.lower()
+    # Prepare one DataFrame for the whole batch
+    input_data = pd.DataFrame([{col: getattr(p, col) for col in MODEL_FEATURES} for p in patients], columns=MODEL_FEATURES)
     
-    if any(x in symptoms_lower for x in ['chest', 'heart', 'coronary', 'angina']):
-        dept_pred = "Cardiology"
-        risk_pred = "High"
-    elif any(x in symptoms_lower for x in ['stroke', 'slurred', 'facial', 'droop', 'paralysis']):
-        dept_pred = "Neurology"
-        risk_pred = "High"
-    elif any(x in symptoms_lower for x in ['breath', 'lung', 'respiratory', 'asthma', 'wheez']):
-        dept_pred = "Pulmonology"
-        risk_pred = "High"
-    elif any(x in symptoms_lower for x in ['bone', 'fracture', 'break', 'dislocat']):
-        dept_pred = "Orthopedics"
-    elif any(x in symptoms_lower for x in ['skin', 'rash', 'derma']):
-        dept_pred = "Dermatology"
-    elif any(x in symptoms_lower for x in ['stomach', 'abdomen', 'gut', 'vomit']):
-        dept_pred = "Gastroenterology"
-    
-    # ----------------------------------------
+    # Fused prediction: one transform, one predict_proba per model (already decoded)
+    # plus per-patient explanations from the risk booster's contributions
+    prediction = engine.predict(input_data)
+    # Candidate model (if any) scores the same batch on its own thread
+    model_registry.submit_shadow(engine, input_data, prediction)
+    risk_preds = prediction["risk"]
+    dept_preds = prediction["dept"]
     
     # Calculate Confidence (Probability)
-    risk_proba = risk_model.predict_proba(input_data)[0]
-    confidence_score = float(max(risk_proba) * 100) 
-
-    # Assign Doctor
-    assigned_doc = assign_doctor(dept_pred, risk_pred)
-    
-    # Explainability: XGBoost Feature Importance
-    # Extract gain scores from the booster
-    booster = risk_model.named_steps['classifier'].get_booster()
-    importance_map = booster.get_score(importance_type='gain')
+    confidence_scores = prediction["risk_proba"].max(axis=1) * 100
     
-    # Map feature names (f0, f1...) to actual column names
-    # XGBoost internal feature names might be f0, f1... or preservation depends on version/sklearn wrapper
-    # Safe approach: usage of feature_names_in_ from the fitted classifier if available
+    # Keyword rules over Symptoms + Medical_Notes of the whole batch, one scan
+    overrides = triage_rules.evaluate_batch(patients, risk_preds, dept_preds)
     
-    # Sort importances by gain (descending)
-    sorted_importance = sorted(importance_map.items(), key=lambda x: x[1], reverse=True)
-    
-    # Get top 3 features (These keys might be 'f0', 'Age', etc.)
-    # If keys are 'f0', 'f1', we need to map them to input_data columns
-    feature_names = input_data.columns.tolist() # The order columns were passed to predict
+    results = []
+    for i, data in enumerate(patients):
+        try:
+            risk_pred, dept_pred, rule_hits = overrides[i]
+            
+            # Assign Doctor; with nobody Available the patient also joins the department's waiting queue
+            assigned_doc, from_pool = doctor_registry.acquire(dept_pred, risk_pred)
+            queue_entry = None
+            if not from_pool:
+                queue_entry = triage_queue.enqueue(assigned_doc['dept'], str(risk_pred), float(confidence_scores[i]) / 100, {
+                    'Age': data.Age,
+                    'Gender': data.Gender,
+                    'Symptoms': data.Symptoms,
+                    'Department': str(dept_pred),
+                })
+            
+            # Fairness aggregates: count the newly triaged patient
+            bias_stats.add({
+                'Gender': data.Gender,
+                'Age': data.Age,
+                'Department': str(dept_pred),
+                'Risk_Level': data.Risk_Level,
+                'Predicted_Risk': str(risk_pred)
+            })
+            
+            # A queued Medium/Low patient has no doctor yet: whoever frees up first takes them off the queue.
+            # High risk still interrupts the busy doctor it was given.
+            waiting = queue_entry is not None and str(risk_pred) != 'High'
+            result = {
+                "Predicted_Risk": str(risk_pred),
+                "Risk_Confidence": float(confidence_scores[i]), # Return confidence
+                "Department": str(dept_pred),
+                "Assigned_Doctor": None if waiting else assigned_doc['name'],
+                "Assigned_Doctor_ID": None if waiting else assigned_doc['id'],
+                "Doctor_Status": "Queued" if queue_entry else "Notified", # Simulation
+                "explanation": prediction["explanation"][i], # Top 3 factors
+                "Rule_Hits": rule_hits, # Safety-net keyword rules that matched (first one applied)
+                "comparison_stats": get_population_comparison(data), # Population Comparison
+                
+                # Pass through full data for Frontend Display (EHR Packet Simulation)
+                "Medical_Notes": data.Medical_Notes,
+                "Pre_Existing_Conditions": data.Pre_Existing_Conditions,
+                "Symptoms": data.Symptoms
+            }
+            if queue_entry:
+                result["Queue"] = {
+                    "ticket": queue_entry.ticket,
+                    "department": queue_entry.department,
+                    "position": triage_queue.position(queue_entry.ticket),
+                    "depth": triage_queue.depth(queue_entry.department)
+                }
+            results.append(result)
+        except Exception as e:
+            print(f"Triage Error (row {i}): {e}")
+            results.append({"error": str(e)})
     
-    explanation = []
-    for k, v in sorted_importance[:3]:
-        # Handle 'f0' style names if present, or raw names
-        feat_name = k
-        if k.startswith('f') and k[1:].isdigit():
-             idx = int(k[1:])
-             if idx < len(feature_names):
-                 feat_name = feature_names[idx]
-        
-        # Add human-readable context based on values
-        val = input_data.iloc[0][feat_name] if feat_name in input_data.columns else "High Impact"
-        if feat_name == 'O2_Saturation':
-            explanation.append(f"O2 Saturation ({val}%)")
-        elif 'BP' in feat_name:
-             explanation.append(f"{feat_name} ({val})")
-        elif feat_name == 'Temperature':
-             explanation.append(f"Temperature ({val}C)")
-        else:
-             explanation.append(f"{feat_name}")
+    return results
+
+# --- Feedback & background retraining ---
+feedback_log = FeedbackLog()
+
+def shadow_published_model(result):
+    """A retrained bundle passed its validation gate: score live traffic with it before anyone promotes it"""
+    if model_registry.active is None or os.environ.get('SHADOW_RETRAINED', '1') != '1':
+        return
+    try:
+        model_registry.set_shadow(result['version'])
+        print(f"Candidate model {result['version']} published, now in shadow mode.")
+    except Exception as e:
+        print(f"Could not shadow {result['version']}: {e}")
+
+# Retraining warm-starts from, and is gated against, the model that is actually serving
+retrainer = Retrainer(feedback_log, MODEL_DIR, DATASET_PATH, on_publish=shadow_published_model,
+                      base_version=lambda: model_registry.active.version if model_registry.active else None)
+
+class FeedbackData(PatientData):
+    Risk_Level: str
+    Department: str = ""
+
+@app.post("/feedback")
+def submit_feedback(data: FeedbackData):
+    """Confirmed outcome for a patient (features + confirmed risk, optionally department)"""
+    feedback_log.record(data, data.Risk_Level, data.Department, source='feedback')
+    started = retrainer.maybe_start()
+    return {"status": "recorded", "retraining_started": started, **retrainer.status()}
+
+@app.get("/feedback/stats")
+def feedback_stats():
+    return retrainer.status()
+
+@app.post("/feedback/retrain")
+def force_retrain():
+    """Starts a retraining job now with whatever feedback is pending"""
+    if not retrainer.maybe_start(force=True):
+        raise HTTPException(status_code=409, detail="Retraining already running, or no new feedback")
+    return retrainer.status()
+
+# --- Model registry (admin): hot-swap, rollback, shadow scoring ---
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+class ShadowRequest(BaseModel):
+    version: str
+    sample_rate: float = 1.0
+
+@app.get("/models")
+def list_models():
+    """Available bundle versions, the active one, rollback history and the shadow candidate"""
+    get_engine()
+    return model_registry.status()
+
+@app.post("/models/{version}/activate")
+def activate_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Loads and warms `version`, then swaps it in; in-flight requests finish on the old model"""
+    check_admin(x_admin_token)
+    if version not in model_registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}")
+    get_engine()
+    try:
+        return model_registry.activate(version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load {version}: {e}")
+
+@app.post("/models/rollback")
+def rollback_model(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    try:
+        return model_registry.rollback()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/models/shadow")
+def shadow_stats():
+    """Disagreement between the active model and the shadow candidate so far"""
+    return model_registry.shadow_status()
+
+@app.post("/models/shadow")
+def start_shadow(request: ShadowRequest, x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    if request.version not in model_registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {request.version!r}")
+    get_engine()
+    try:
+        return model_registry.set_shadow(request.version, request.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.delete("/models/shadow")
+def stop_shadow(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    return model_registry.set_shadow(None)
 
-    if not explanation:
-        explanation = ["Complex Pattern Detected"]
+@app.post("/predict")
+def predict_triage(data: PatientData):
+    result = triage_batch([data])[0]
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
+@app.post("/predict_batch")
+def predict_triage_batch(patients: List[Any] = Body(...)):
+    """
+    Batch triage for mass-casualty intake / EHR imports.
+    Each item is validated on its own so one bad record doesn't fail the batch
+    (the body is a list of anything: a non-object item is an error for that index, not a 422).
+    Results come back in input order: {"index", "status": "ok", "result"} or {"index", "status": "error", "detail"}.
+    """
+    valid = []
+    results = [None] * len(patients)
+    for i, item in enumerate(patients):
+        if not isinstance(item, dict):
+            results[i] = {"index": i, "status": "error", "detail": f"Expected a patient object, got {type(item).__name__}"}
+            continue
+        try:
+            valid.append((i, PatientData(**item)))
+        except (ValidationError, TypeError) as e:
+            results[i] = {"index": i, "status": "error", "detail": str(e)}
+    
+    scored = triage_batch([p for _, p in valid])
+    for (i, _), res in zip(valid, scored):
+        if "error" in res:
+            results[i] = {"index": i, "status": "error", "detail": res["error"]}
+        else:
+            results[i] = {"index": i, "status": "ok", "result": res}
+    
     return {
-        "Predicted_Risk": risk_pred,
-        "Risk_Confidence": confidence_score, # Return confidence
-        "Department": dept_pred,
-        "Assigned_Doctor": assigned_doc['name'],
-        "Assigned_Doctor_ID": assigned_doc['id'],
-        "Doctor_Status": "Notified", # Simulation
-        "explanation": explanation[:3], # Top 3 factors
-        "comparison_stats": get_population_comparison(data), # Population Comparison
-
-        
-        # Pass through full data for Frontend Display (EHR Packet Simulation)
-        "Medical_Notes": data.Medical_Notes,
-        "Pre_Existing_Conditions": data.Pre_Existing_Conditions,
-        "Symptoms": data.Symptoms
+        "count": len(results),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "results": results
     }
 
 
@@ -518,238 +734,291 @@ async def upload_document(file: UploadFile = File(...)):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
+    # Parsing runs in a worker process (size/page limits, timeout) so the event loop
+    # keeps broadcasting vitals and serving other requests meanwhile
+    content = await file.read(pdf_extract.MAX_PDF_BYTES + 1)
     try:
-        content = await file.read()
-        reader = PdfReader(io.BytesIO(content))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-            
-        # simple regex extraction (Demo purposes)
-        extracted_data = {}
-        
-        # Age
-        age_match = re.search(r"Age:\s*(\d+)", text, re.IGNORECASE)
-        if age_match:
-            extracted_data["Age"] = int(age_match.group(1))
-            
-        # Gender
-        gender_match = re.search(r"Gender:\s*(Male|Female)", text, re.IGNORECASE)
-        if gender_match:
-            extracted_data["Gender"] = gender_match.group(1)
-
-        # BP (e.g., 120/80)
-        bp_match = re.search(r"BP:\s*(\d+)/(\d+)", text, re.IGNORECASE)
-        if bp_match:
-            extracted_data["BP_Systolic"] = int(bp_match.group(1))
-            extracted_data["BP_Diastolic"] = int(bp_match.group(2))
-            
-        # HR
-        hr_match = re.search(r"HR:\s*(\d+)", text, re.IGNORECASE)
-        if hr_match:
-             extracted_data["Heart_Rate"] = int(hr_match.group(1))
-             
-        # Temp
-        temp_match = re.search(r"Temp:\s*(\d+\.?\d*)", text, re.IGNORECASE)
-        if temp_match:
-             extracted_data["Temperature"] = float(temp_match.group(1))
-
-        # O2
-        o2_match = re.search(r"O2:\s*(\d+)", text, re.IGNORECASE)
-        if o2_match:
-             extracted_data["O2_Saturation"] = int(o2_match.group(1))
-
-        return {
-            "extracted_text_preview": text[:200], 
-            "extracted_data": extracted_data,
-            "medical_notes": text # Return full text for the model
-        }
-        
+        return await pdf_extract.extract_pdf_async(content)
+    except pdf_extract.PdfLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"PDF processing took longer than {pdf_extract.PDF_TIMEOUT:.0f}s")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
+@app.post("/import_docs")
+async def import_documents(files: List[UploadFile] = File(...)):
+    """
+    Bulk EHR import: many PDFs and/or ZIPs of PDFs in one request.
+    Documents are extracted in parallel in the PDF worker pool, then every complete record
+    is scored in one triage_batch call. Streams NDJSON, one line per event:
+      {"type": "document", "index", "name", "status": "extracted" | "incomplete" | "error", "extracted_data", "missing_fields"}
+      {"type": "triage", "index", "name", "status": "ok", "Predicted_Risk", "Department", "Assigned_Doctor", ...}
+      {"type": "summary", "documents", "scored", "errors", "seconds", "docs_per_second"}
+    """
+    docs = []
+    total_bytes = 0  # PDF bytes held for this request, from ZIPs or uploaded directly
+    for f in files:
+        if len(docs) >= bulk_import.MAX_IMPORT_DOCS:
+            raise HTTPException(status_code=413, detail=f"More than {bulk_import.MAX_IMPORT_DOCS} documents")
+        if bulk_import.is_zip(f.filename, f.content_type):
+            content = await f.read(bulk_import.MAX_ZIP_BYTES + 1)
+            if len(content) > bulk_import.MAX_ZIP_BYTES:
+                docs.append((f.filename, None, "ZIP file is too large"))
+                continue
+            # Remaining budget for this ZIP, checked before any member is decompressed
+            try:
+                expanded = bulk_import.expand_zip(f.filename, content, max_docs=bulk_import.MAX_IMPORT_DOCS - len(docs),
+                                                  max_bytes=bulk_import.MAX_UNZIPPED_BYTES - total_bytes)
+            except bulk_import.ImportLimitError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            total_bytes += sum(len(pdf) for _, pdf, _ in expanded if pdf is not None)
+            docs.extend(expanded)
+        elif f.content_type == "application/pdf" or (f.filename or '').lower().endswith('.pdf'):
+            content = await f.read(pdf_extract.MAX_PDF_BYTES + 1)
+            total_bytes += len(content)
+            if total_bytes > bulk_import.MAX_UNZIPPED_BYTES:
+                raise HTTPException(status_code=413, detail=f"More than {bulk_import.MAX_UNZIPPED_BYTES // (1024 * 1024)} MB of PDFs")
+            docs.append((f.filename, content, None))
+        else:
+            docs.append((f.filename, None, "Only PDF or ZIP files are allowed"))
+    if not docs:
+        raise HTTPException(status_code=400, detail="No PDF documents found")
+    if len(docs) > bulk_import.MAX_IMPORT_DOCS:
+        raise HTTPException(status_code=413, detail=f"{len(docs)} documents, the limit is {bulk_import.MAX_IMPORT_DOCS}")
+    # Fail before the stream starts: once lines are out, an error can only truncate it
+    if not get_engine():
+        raise HTTPException(status_code=500, detail="Models not loaded")
+
+    def line(data):
+        return json.dumps(data) + "\n"
+
+    async def result_stream():
+        start = time.perf_counter()
+        errors = 0
+        for i, (name, _, error) in enumerate(docs):
+            if error:
+                errors += 1
+                yield line({"type": "document", "index": i, "name": name, "status": "error", "detail": error})
+
+        # Extraction results as each document finishes
+        ready = []
+        async for i, result, error in bulk_import.extract_documents(docs):
+            name = docs[i][0]
+            if error:
+                errors += 1
+                yield line({"type": "document", "index": i, "name": name, "status": "error", "detail": error})
+                continue
+            patient, missing = bulk_import.to_patient(result["extracted_data"], result["medical_notes"])
+            if not missing:
+                try:
+                    patient = PatientData(**patient)
+                except ValidationError as e:
+                    errors += 1
+                    yield line({"type": "document", "index": i, "name": name, "status": "error",
+                                "detail": f"Invalid extracted data: {e.errors()[0]['msg']}",
+                                "extracted_data": result["extracted_data"]})
+                    continue
+                ready.append((i, patient))
+            yield line({"type": "document", "index": i, "name": name,
+                        "status": "incomplete" if missing else "extracted",
+                        "extracted_data": result["extracted_data"], "missing_fields": missing})
+
+        # One vectorized model call for every complete document (off the event loop)
+        scored = []
+        if ready:
+            scored = await asyncio.get_running_loop().run_in_executor(None, triage_batch, [p for _, p in ready])
+        for (i, _), res in zip(ready, scored):
+            name = docs[i][0]
+            if "error" in res:
+                errors += 1
+                yield line({"type": "triage", "index": i, "name": name, "status": "error", "detail": res["error"]})
+                continue
+            yield line({"type": "triage", "index": i, "name": name, "status": "ok",
+                        "Predicted_Risk": res["Predicted_Risk"], "Risk_Confidence": res["Risk_Confidence"],
+                        "Department": res["Department"], "Assigned_Doctor": res["Assigned_Doctor"],
+                        "Assigned_Doctor_ID": res["Assigned_Doctor_ID"], "Doctor_Status": res["Doctor_Status"]})
+
+        seconds = time.perf_counter() - start
+        yield line({"type": "summary", "documents": len(docs), "scored": len(scored), "errors": errors,
+                    "seconds": round(seconds, 3), "docs_per_second": round(len(docs) / seconds, 1) if seconds else None})
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
 # --- Module 4: Bias & Fairness Analysis ---
+# Contingency tables kept in memory (rebuilt on file change, updated per triaged patient)
+bias_stats = BiasStats(dataset.frame)
+dataset.on_change(bias_stats.sync)
+
 @app.get("/bias_stats")
 def get_bias_stats():
+    """
+    Gender x Risk and Age band x Risk tables (labels only) for the fairness dashboard,
+    plus Department x Risk, Gender/Age band x predicted risk and labeled vs predicted risk.
+    Constant-time read.
+    """
     try:
-        df = pd.read_csv('patients_dataset.csv')
-        
-        # Gender Analysis
-        gender_risk = df.groupby(['Gender', 'Risk_Level']).size().unstack(fill_value=0).to_dict()
-        
-        # Age Analysis
-        bins = [0, 18, 35, 50, 65, 120]
-        labels = ['0-18', '19-35', '36-50', '51-65', '65+']
-        df['Age_Group'] = pd.cut(df['Age'], bins=bins, labels=labels)
-        age_risk = df.groupby(['Age_Group', 'Risk_Level']).size().unstack(fill_value=0).to_dict()
-        
-        return {
-            "gender_risk": gender_risk,
-            "age_risk": age_risk
-        }
+        dataset.maybe_refresh()
+        return bias_stats.response()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # --- Real-Time Vitals Simulation Engine ---
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        # Broadcast to all connected clients
-        # Handle disconnected clients gracefully
-        for connection in self.active_connections[:]:
-            try:
-                await connection.send_json(message)
-            except:
-                self.disconnect(connection)
-
 manager = ConnectionManager()
 
 class SimulationManager:
+    """Owns the vectorized VitalsSimulation; dicts are only built for what gets sent"""
     def __init__(self):
-        self.patients = []
         self.running = False
         self._load_initial_data()
 
     def _load_initial_data(self):
-        # Load patients from CSV into memory for simulation
+        # Simulation state starts from the shared dataset (vitals copied into arrays)
         try:
-            df = pd.read_csv('patients_dataset.csv')
-            # Replace NaN with None/Empty for JSON safety
-            df = df.replace({np.nan: None})
-            self.patients = df.to_dict(orient='records')
-            
-            # Ensure numeric fields are floats/ints for calculation
-            for p in self.patients:
-                p['Heart_Rate'] = int(p.get('Heart_Rate', 80))
-                p['Temperature'] = float(p.get('Temperature', 37.0))
-                p['BP_Systolic'] = int(p.get('BP_Systolic', 120))
-                p['BP_Diastolic'] = int(p.get('BP_Diastolic', 80))
-                p['O2_Saturation'] = int(p.get('O2_Saturation', 98))
-                
-                # Initialize explanations list if not present
-                if 'explanation' not in p or not isinstance(p['explanation'], list):
-                    p['explanation'] = []
-
+            seed = os.environ.get('SIM_SEED')
+            self.sim = VitalsSimulation(dataset.frame, seed=int(seed) if seed else None, explain_engine=explain_engine, texts=dataset.texts)
         except Exception as e:
             print(f"Error loading initial simulation data: {e}")
-            self.patients = []
-
-            print(f"Error loading initial simulation data: {e}")
-            self.patients = []
+            self.sim = VitalsSimulation(pd.DataFrame(), explain_engine=explain_engine)
+        self.index = PatientIndex(self.sim)
+        # Longer vitals history per patient (raw ring + downsampled tiers), for /patients/{id}/vitals
+        self.store = VitalsStore(self.sim.n)
+        # Maintained sort indexes for the paginated /patients endpoint
+        self.pages = PatientPages(self.sim)
+        # Protocol 2 subscription -> row mask at the last tick (to send added / removed patients)
+        self.members = {}
+
+    @property
+    def patients(self):
+        """Every simulated patient as a dict (legacy full-list shape)"""
+        return self.sim.records()
+
+    def patients_for(self, subscription):
+        """Patient dicts in a subscription's slice"""
+        if subscription.is_everything:
+            return self.patients
+        return self.sim.records(np.flatnonzero(self.index.mask(subscription)))
 
     def update_vitals(self):
         """
-        Simulates vital sign drift and check clinical scenarios.
-        Step 1: Assign a scenario if not present.
-        Step 2: Drift vitals based on scenario.
-        Step 3: Check for anomalies using Explainability Engine.
+        Simulates vital sign drift and checks clinical scenarios for every patient in one
+        vectorized step (scenario drift, history, anomaly check with the Explainability Engine).
         """
-        for p in self.patients:
-            # Initialize Scenario & History if missing
-            if 'scenario' not in p:
-                # 80% Stable, 10% Sepsis, 10% Cardiac Risk
-                r = random.random()
-                if r < 0.8: p['scenario'] = 'Stable'
-                elif r < 0.9: p['scenario'] = 'Sepsis'
-                else: p['scenario'] = 'Cardiac'
-            
-            if 'history' not in p:
-                p['history'] = []
-
-            # Store current state for history before update
-            p['history'].append({
-                'Heart_Rate': p['Heart_Rate'],
-                'BPM': p['Heart_Rate'], # legacy
-                'Temperature': p['Temperature'],
-                'O2_Saturation': p['O2_Saturation'],
-                'BP_Systolic': p['BP_Systolic']
-            })
-            # Keep history short (last 5 ticks)
-            if len(p['history']) > 5:
-                p['history'].pop(0)
-
-            # --- Scenario Logic ---
-            if p['scenario'] == 'Stable':
-                # Random small drift
-                p['Heart_Rate'] += random.randint(-1, 1)
-                p['Temperature'] += random.uniform(-0.05, 0.05)
-                # Keep within normal-ish bounds
-                p['Heart_Rate'] = max(60, min(100, p['Heart_Rate']))
-                p['Temperature'] = round(max(36.0, min(37.5, p['Temperature'])), 1)
-
-            elif p['scenario'] == 'Sepsis':
-                # Gradual deterioration: Temp UP, HR UP, BP DOWN
-                p['Temperature'] += random.uniform(0.01, 0.1) # Slowly rising fever
-                p['Heart_Rate'] += random.randint(0, 2)       # Rising Tachycardia
-                p['BP_Systolic'] -= random.randint(0, 1)      # Hypotension
-                
-                # Cap extreme values to avoid unrealistic numbers
-                p['Temperature'] = round(min(41.0, p['Temperature']), 1)
-                p['Heart_Rate'] = min(160, p['Heart_Rate'])
-                p['BP_Systolic'] = max(70, p['BP_Systolic'])
-                
-            elif p['scenario'] == 'Cardiac':
-                # Erratic HR, Spikes
-                if random.random() < 0.1: # 10% chance of sudden spike
-                    p['Heart_Rate'] += random.randint(10, 30)
-                else:
-                    p['Heart_Rate'] += random.randint(-5, 5)
-                
-                p['Heart_Rate'] = min(190, max(40, p['Heart_Rate']))
-
-            # --- Analyze with Explainability Engine ---
-            anomalies = explain_engine.detect_anomalies(p, p['history'])
-            
-            if anomalies:
-                p['Risk_Level'] = 'High'
-                p['Predicted_Risk'] = 'High' # Override ML model for safety
-                p['explanation'] = anomalies
-            elif p['scenario'] == 'Stable':
-                # If stable and no anomalies, potentially revert risk (optional, but good for self-healing sim)
-                # p['Risk_Level'] = 'Low' 
-                pass 
+        flagged = self.sim.tick()
+        sim = self.sim
+        self.store.append(time.time(), sim.heart_rate, sim.temperature, sim.o2, sim.bp_systolic)
+        self.pages.sync(flagged)
+        return flagged
+
+    def snapshot(self, subscription=EVERYTHING):
+        """Protocol 2 full state of a slice; deltas with seq > this one apply on top of it"""
+        mask = self.index.mask(subscription)
+        self.members.setdefault(subscription, mask)
+        return {"type": "snapshot", "seq": self.sim.ticks, "patients": self.sim.records(np.flatnonzero(mask))}
+
+    def delta(self, subscription=EVERYTHING):
+        """
+        Protocol 2 frame for the last tick: only the fields that changed within the slice,
+        plus full records for patients that entered it and IDs of those that left.
+        """
+        mask = self.index.mask(subscription)
+        prev = self.members.get(subscription, mask)
+        self.members[subscription] = mask
+        frame = {"type": "delta", "seq": self.sim.ticks, "patients": self.sim.changes(among=mask & prev)}
+        added = np.flatnonzero(mask & ~prev)
+        if added.size:
+            frame["added"] = self.sim.records(added)
+        removed = np.flatnonzero(prev & ~mask)
+        if removed.size:
+            frame["removed"] = self.sim.patient_ids[removed].tolist()
+        return frame
 
-            
-            
     async def run_loop(self):
         self.running = True
         print("Simulation Loop Started...")
         while self.running:
             self.update_vitals()
-            await manager.broadcast(self.patients)
+            # Only build the frames someone is listening for: one per distinct subscription
+            for subscription in manager.subscriptions(protocol=1):
+                await manager.broadcast(self.patients_for(subscription), protocol=1, subscription=subscription)
+            active = manager.subscriptions(protocol=2)
+            for subscription in active:
+                await manager.broadcast(self.delta(subscription), protocol=2, subscription=subscription)
+            self.members = {s: m for s, m in self.members.items() if s in active}
             await asyncio.sleep(2) # Update every 2 seconds
 
 sim_manager = SimulationManager()
 
 @app.on_event("startup")
 async def startup_event():
+    # Warm the models in the background so the first /predict doesn't pay the load
+    asyncio.get_running_loop().run_in_executor(None, get_engine)
     # Start the simulation loop in background
     asyncio.create_task(sim_manager.run_loop())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await ollama.aclose()
+    pdf_extract.shutdown()
+    feedback_log.flush()
+    retrainer.shutdown()
+
 @app.websocket("/ws/vitals")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, protocol: int = 1):
+    """
+    Live vitals stream.
+    protocol=1 (default): the full patient list every tick.
+    protocol=2: one {"type": "snapshot", "seq", "patients"} frame, then a
+    {"type": "delta", "seq", "patients": [{"Patient_ID", <changed fields>}]} frame per tick.
+    A client that misses a seq sends {"type": "resync"} and gets a fresh snapshot.
+
+    Clients can narrow the stream with {"type": "subscribe", "departments": [...],
+    "risk_levels": [...], "patient_ids": [...], "anomalies_only": true} (filters are ANDed,
+    omitted ones match everything). Protocol 2 deltas then also carry "added" (full records
+    entering the slice) and "removed" (Patient_IDs leaving it).
+    """
+    if protocol >= 2:
+        channel = await manager.connect(websocket, protocol, snapshot=sim_manager.snapshot)
+    else:
+        channel = await manager.connect(websocket, protocol)
     try:
-        # Send initial state immediately
-        await websocket.send_json(sim_manager.patients)
+        # Send initial state immediately (queued ahead of the next tick's frame)
+        if protocol >= 2:
+            channel.request_snapshot(resync=False)
+        else:
+            manager.send(websocket, sim_manager.patients)
         while True:
-            # Keep connection alive, maybe listen for client commands?
-            # For now, we just stream OUT.
             data = await websocket.receive_text() # Wait for any msg to keep open / handle pong
+            try:
+                command = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            if command.get("type") == "subscribe":
+                try:
+                    channel.subscription = Subscription.from_message(command)
+                except ValueError as e:
+                    manager.send(websocket, {"type": "error", "message": str(e)})
+                    continue
+                # The new slice replaces whatever the client had
+                if protocol >= 2:
+                    channel.request_snapshot(resync=False)
+                else:
+                    manager.send(websocket, sim_manager.patients_for(channel.subscription))
+            elif command.get("type") == "resync" and protocol >= 2:
+                channel.request_snapshot()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+@app.get("/ws/stats")
+def websocket_stats():
+    """Connected dashboards, queue depths and dropped frames (slow consumers)"""
+    return manager.stats()
+
 # To run: uvicorn main:app --reload
 
@@ -1,3 +1,6 @@
+import os
+import json
+import datetime
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -12,6 +15,40 @@ from sklearn.metrics import classification_report
 
 
 from xgboost import XGBClassifier
+from sklearn.preprocessing import StandardScaler
+
+FEATURES = ['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']
+
+# Preprocessing settings (also part of the training cache key, see training.py)
+PREPROCESSOR_CONFIG = {
+    'numeric_features': ['Age', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation'],
+    'categorical_features': ['Gender'],
+    'text_feature': 'Symptoms',
+    'text_max_features': 500,
+    'note_feature': 'Medical_Notes',
+    'note_max_features': 1000,  # Increased features
+    'ngram_range': [1, 2],
+    'stop_words': 'english',
+}
+
+def build_preprocessor(config=PREPROCESSOR_CONFIG):
+    """Unfitted ColumnTransformer: scaled vitals, one-hot gender, n-gram counts of symptoms and notes"""
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+    categorical_transformer = OneHotEncoder(handle_unknown='ignore')
+    ngram_range = tuple(config['ngram_range'])
+    text_transformer = CountVectorizer(stop_words=config['stop_words'], max_features=config['text_max_features'], ngram_range=ngram_range)
+    note_transformer = CountVectorizer(stop_words=config['stop_words'], max_features=config['note_max_features'], ngram_range=ngram_range)
+    
+    return ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, config['numeric_features']),
+            ('cat', categorical_transformer, config['categorical_features']),
+            ('text', text_transformer, config['text_feature']),
+            ('note', note_transformer, config['note_feature'])
+        ])
 
 def train_models():
     # Load Data
@@ -23,7 +60,7 @@ def train_models():
     # A more advanced version would use NLP or MultiLabelBinarizer for symptoms
     
     # Features
-    X = df[['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']]
+    X = df[FEATURES]
     y_risk = df['Risk_Level']
     y_dept = df['Department']
 
@@ -39,35 +76,18 @@ def train_models():
         X, y_risk_encoded, y_dept_encoded, test_size=0.2, random_state=42, stratify=y_risk_encoded
     )
     
-    from sklearn.preprocessing import StandardScaler
-
-    # Preprocessing Pipeline
-    numeric_features = ['Age', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation']
-    categorical_features = ['Gender']
-    text_features = 'Symptoms'
-    note_features = 'Medical_Notes'
-    
-    numeric_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='median')),
-        ('scaler', StandardScaler())
-    ])
-    categorical_transformer = OneHotEncoder(handle_unknown='ignore')
-    text_transformer = CountVectorizer(stop_words='english', max_features=500, ngram_range=(1, 2))
-    note_transformer = CountVectorizer(stop_words='english', max_features=1000, ngram_range=(1, 2)) # Increased features
+    preprocessor = build_preprocessor()
     
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numeric_transformer, numeric_features),
-            ('cat', categorical_transformer, categorical_features),
-            ('text', text_transformer, text_features),
-            ('note', note_transformer, note_features)
-        ])
+    # Fit the preprocessor ONCE and share the transformed matrices between both heads
+    # (previously each Pipeline refit its own copy of the same ColumnTransformer)
+    X_train_t = preprocessor.fit_transform(X_train)
+    X_test_t = preprocessor.transform(X_test)
     
     # Train Risk Model (XGBoost)
-    risk_clf = Pipeline(steps=[('preprocessor', preprocessor),
-                               ('classifier', XGBClassifier(n_estimators=300, learning_rate=0.1, max_depth=8, random_state=42, eval_metric='mlogloss'))])
-    
-    risk_clf.fit(X_train, y_risk_encoded_train)
+    risk_xgb = XGBClassifier(n_estimators=300, learning_rate=0.1, max_depth=8, random_state=42, eval_metric='mlogloss')
+    risk_xgb.fit(X_train_t, y_risk_encoded_train)
+    # Wrap in a Pipeline around the shared fitted preprocessor so artifacts stay drop-in compatible
+    risk_clf = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', risk_xgb)])
     
     # Save LabelEncoder properly or just map back in main (For simplicity we return index, need mapping)
     # Actually, XGBoost returns class index. We need to save the LabelEncoder to map back.
@@ -76,27 +96,108 @@ def train_models():
     print("Risk Model (XGBoost) Trained and Saved.")
     
     # Evaluate Risk Model
-    y_pred = risk_clf.predict(X_test)
+    y_pred = risk_xgb.predict(X_test_t)
     print("\nRisk Model Performance:")
     print(classification_report(y_risk_encoded_test, y_pred, target_names=le_risk.classes_))
     
-    # Train Department Model (XGBoost)
-    dept_clf = Pipeline(steps=[('preprocessor', preprocessor),
-                               ('classifier', XGBClassifier(n_estimators=300, learning_rate=0.1, max_depth=8, random_state=42, eval_metric='mlogloss'))])
-    
-    dept_clf.fit(X_train, y_dept_encoded_train)
+    # Train Department Model (XGBoost) on the same feature matrix
+    dept_xgb = XGBClassifier(n_estimators=300, learning_rate=0.1, max_depth=8, random_state=42, eval_metric='mlogloss')
+    dept_xgb.fit(X_train_t, y_dept_encoded_train)
+    dept_clf = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', dept_xgb)])
     
     joblib.dump(le_dept, 'dept_le.joblib')
     joblib.dump(dept_clf, 'dept_model.joblib')
     print("Department Model (XGBoost) Trained and Saved.")
 
     # Evaluate Dept Model
-    y_dept_pred = dept_clf.predict(X_test)
+    y_dept_pred = dept_xgb.predict(X_test_t)
     print("\nDepartment Model Performance:")
     print(classification_report(y_dept_encoded_test, y_dept_pred, target_names=le_dept.classes_))
     
     return risk_clf, dept_clf
 
+def export_bundle(risk_clf=None, dept_clf=None, le_risk=None, le_dept=None, model_dir='models', version=None):
+    """
+    Writes a versioned, sklearn-free model bundle to models/<version>/:
+    native XGBoost boosters (UBJSON), preprocessing parameters as .npy arrays
+    and a manifest.json with feature names and label classes.
+    Defaults to the saved joblib artifacts if no fitted models are passed.
+    """
+    import xgboost
+    import sklearn
+    from inference import FeatureMap, fitted_booster
+    from model_bundle import BUNDLE_FORMAT, next_version
+
+    if risk_clf is None:
+        risk_clf = joblib.load('risk_model.joblib')
+    if dept_clf is None:
+        dept_clf = joblib.load('dept_model.joblib')
+    if le_risk is None:
+        le_risk = joblib.load('risk_le.joblib')
+    if le_dept is None:
+        le_dept = joblib.load('dept_le.joblib')
+
+    version = version or next_version(model_dir)
+    bundle_dir = os.path.join(model_dir, version)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    preprocessor = risk_clf.named_steps['preprocessor']
+    feature_names = [str(f) for f in preprocessor.get_feature_names_out()]
+
+    # Preprocessing spec: one block per ColumnTransformer step, in output order
+    blocks = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == 'remainder':
+            continue
+        if isinstance(transformer, Pipeline):
+            imputer = transformer.named_steps['imputer']
+            scaler = transformer.named_steps['scaler']
+            np.save(os.path.join(bundle_dir, f'{name}_impute.npy'), imputer.statistics_.astype(np.float64))
+            np.save(os.path.join(bundle_dir, f'{name}_mean.npy'), scaler.mean_.astype(np.float64))
+            np.save(os.path.join(bundle_dir, f'{name}_scale.npy'), scaler.scale_.astype(np.float64))
+            blocks.append({'name': name, 'kind': 'numeric', 'columns': list(columns),
+                           'impute': f'{name}_impute.npy', 'mean': f'{name}_mean.npy', 'scale': f'{name}_scale.npy'})
+        elif isinstance(transformer, OneHotEncoder):
+            blocks.append({'name': name, 'kind': 'onehot', 'columns': list(columns),
+                           'categories': [[str(c) for c in cats] for cats in transformer.categories_]})
+        elif isinstance(transformer, CountVectorizer):
+            vocab = transformer.get_feature_names_out().astype(str)
+            np.save(os.path.join(bundle_dir, f'{name}_vocabulary.npy'), vocab)
+            np.save(os.path.join(bundle_dir, f'{name}_stop_words.npy'), np.array(sorted(transformer.get_stop_words() or []), dtype=str))
+            blocks.append({'name': name, 'kind': 'ngram', 'column': columns,
+                           'vocabulary': f'{name}_vocabulary.npy', 'stop_words': f'{name}_stop_words.npy',
+                           'token_pattern': transformer.token_pattern, 'lowercase': transformer.lowercase,
+                           'ngram_range': list(transformer.ngram_range)})
+        else:
+            raise ValueError(f"Cannot export transformer '{name}' ({type(transformer).__name__})")
+
+    fitted_booster(risk_clf.named_steps['classifier']).save_model(os.path.join(bundle_dir, 'risk.ubj'))
+    fitted_booster(dept_clf.named_steps['classifier']).save_model(os.path.join(bundle_dir, 'dept.ubj'))
+
+    fmap = FeatureMap.from_preprocessor(preprocessor)
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'xgboost_version': xgboost.__version__,
+        'sklearn_version': sklearn.__version__,
+        'models': {'risk': 'risk.ubj', 'dept': 'dept.ubj'},
+        'classes': {'risk': [str(c) for c in le_risk.classes_], 'dept': [str(c) for c in le_dept.classes_]},
+        'feature_names': feature_names,
+        'feature_map': {
+            'fields': fmap.fields,
+            'feature_field': fmap.feature_field.tolist(),
+            'text_fields': [fmap.fields[g] for g in fmap.text_fields]
+        },
+        'preprocessor': {'n_features': len(feature_names), 'blocks': blocks}
+    }
+    # Manifest last: a bundle only counts as complete once it exists
+    with open(os.path.join(bundle_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"Model bundle {version} exported to {bundle_dir}")
+    return bundle_dir
+
 def explain_prediction(features):
     # Simple rule-based explanation for the "Why"
     explanation = []
@@ -121,4 +222,10 @@ def explain_prediction(features):
     return explanation[:3] # Return top 3 factors
 
 if __name__ == "__main__":
-    train_models()
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        # Export the existing joblib artifacts without retraining
+        export_bundle()
+    else:
+        risk_clf, dept_clf = train_models()
+        export_bundle(risk_clf, dept_clf)
@@ -0,0 +1,145 @@
+"""
+Versioned model bundle: loads the triage models WITHOUT scikit-learn.
+
+Layout of models/<version>/ (written by model.export_bundle):
+    manifest.json       feature names, field map, label classes, preprocessing spec
+    risk.ubj, dept.ubj  native XGBoost boosters (UBJSON)
+    *.npy               scaler/imputer parameters, vocabularies, stop words (memory-mapped on load)
+
+Vocabularies are sorted (CountVectorizer column order), so terms are looked up with a binary
+search on the memory-mapped array itself, never copied into per-process Python objects.
+"""
+import json
+import os
+import re
+import numpy as np
+import scipy.sparse as sp
+
+BUNDLE_FORMAT = 1
+DEFAULT_MODEL_DIR = 'models'
+
+
+def list_versions(model_dir=DEFAULT_MODEL_DIR):
+    """Bundle versions under model_dir, oldest first (v1, v2, ... sorted numerically)"""
+    if not os.path.isdir(model_dir):
+        return []
+    versions = [
+        d for d in os.listdir(model_dir)
+        if re.fullmatch(r"v\d+", d) and os.path.exists(os.path.join(model_dir, d, 'manifest.json'))
+    ]
+    return sorted(versions, key=lambda v: int(v[1:]))
+
+
+def next_version(model_dir=DEFAULT_MODEL_DIR):
+    versions = list_versions(model_dir)
+    return f"v{int(versions[-1][1:]) + 1}" if versions else "v1"
+
+
+def read_manifest(bundle_dir):
+    with open(os.path.join(bundle_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')} in {bundle_dir}")
+    return manifest
+
+
+class BundlePreprocessor:
+    """
+    Re-implements the fitted ColumnTransformer from plain arrays:
+    median imputation + standard scaling, one-hot encoding, and word n-gram counts
+    (CountVectorizer semantics: lowercase, token_pattern, stop words, n-gram range).
+    Output is the same CSR matrix the sklearn preprocessor produces.
+    """
+    def __init__(self, spec, bundle_dir):
+        self.blocks = []
+        for block in spec['blocks']:
+            block = dict(block)
+            if block['kind'] == 'numeric':
+                for key in ('impute', 'mean', 'scale'):
+                    block[key] = np.load(os.path.join(bundle_dir, block[key]), mmap_mode='r')
+            elif block['kind'] == 'onehot':
+                block['lookup'] = [{c: i for i, c in enumerate(cats)} for cats in block['categories']]
+                block['width'] = sum(len(cats) for cats in block['categories'])
+            elif block['kind'] == 'ngram':
+                vocab = np.load(os.path.join(bundle_dir, block['vocabulary']), mmap_mode='r')
+                if len(vocab) > 1 and not (vocab[:-1] < vocab[1:]).all():
+                    raise ValueError(f"Vocabulary {block['vocabulary']} in {bundle_dir} is not sorted")
+                block['vocabulary'] = vocab
+                block['width'] = len(vocab)
+                block['stop_words'] = frozenset(str(w) for w in np.load(os.path.join(bundle_dir, block['stop_words'])))
+                block['pattern'] = re.compile(block['token_pattern'])
+            self.blocks.append(block)
+        self.n_features = spec['n_features']
+
+    def transform(self, frame):
+        n = len(frame)
+        parts = []
+        for block in self.blocks:
+            if block['kind'] == 'numeric':
+                values = frame[block['columns']].to_numpy(dtype=np.float64)
+                values = np.where(np.isnan(values), block['impute'], values)
+                parts.append(sp.csr_matrix((values - block['mean']) / block['scale']))
+            elif block['kind'] == 'onehot':
+                rows, cols, offset = [], [], 0
+                for column, lookup in zip(block['columns'], block['lookup']):
+                    for i, value in enumerate(frame[column].tolist()):
+                        j = lookup.get(value)
+                        if j is not None:  # handle_unknown='ignore'
+                            rows.append(i)
+                            cols.append(offset + j)
+                    offset += len(lookup)
+                parts.append(sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, block['width'])))
+            elif block['kind'] == 'ngram':
+                parts.append(self._count_ngrams(frame[block['column']].tolist(), block))
+        return sp.hstack(parts, format='csr')
+
+    @staticmethod
+    def _count_ngrams(docs, block):
+        vocab, stop_words, pattern = block['vocabulary'], block['stop_words'], block['pattern']
+        min_n, max_n = block['ngram_range']
+        grams, rows = [], []
+        for row, doc in enumerate(docs):
+            doc = doc if isinstance(doc, str) else ''
+            if block['lowercase']:
+                doc = doc.lower()
+            tokens = [t for t in pattern.findall(doc) if t not in stop_words]
+            for size in range(min_n, max_n + 1):
+                for start in range(len(tokens) - size + 1):
+                    grams.append(" ".join(tokens[start:start + size]))
+                    rows.append(row)
+        shape = (len(docs), block['width'])
+        if not grams or not len(vocab):
+            return sp.csr_matrix(shape)
+        # Binary search of every n-gram in the sorted vocabulary at once
+        grams = np.array(grams)
+        pos = np.minimum(np.searchsorted(vocab, grams), len(vocab) - 1)
+        known = vocab[pos] == grams
+        # Duplicate (row, col) entries are summed -> term counts
+        counts = sp.csr_matrix((np.ones(int(known.sum())), (np.asarray(rows)[known], pos[known])), shape=shape)
+        counts.sum_duplicates()
+        return counts
+
+
+def load_engine(bundle_dir):
+    """Builds a TriageEngine from a bundle directory (no scikit-learn import)."""
+    import xgboost as xgb
+    from inference import TriageEngine, FeatureMap
+
+    manifest = read_manifest(bundle_dir)
+    preprocessor = BundlePreprocessor(manifest['preprocessor'], bundle_dir)
+
+    risk_booster = xgb.Booster(model_file=os.path.join(bundle_dir, manifest['models']['risk']))
+    dept_booster = xgb.Booster(model_file=os.path.join(bundle_dir, manifest['models']['dept']))
+
+    fmap = manifest['feature_map']
+    feature_map = FeatureMap(manifest['feature_names'], fmap['fields'], fmap['feature_field'], fmap['text_fields'])
+
+    return TriageEngine(
+        preprocessor,
+        risk_booster,
+        dept_booster,
+        manifest['classes']['risk'],
+        manifest['classes']['dept'],
+        feature_map,
+        version=manifest['version']
+    )
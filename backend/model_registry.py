@@ -0,0 +1,274 @@
+"""
+Model registry: which model bundle version serves traffic, swapped without a restart.
+
+- The active TriageEngine is one attribute. A request reads it once (registry.active) and
+  keeps that engine for its whole batch, so a swap never changes the model under an
+  in-flight request; the old engine is freed when the last request holding it finishes.
+- activate(version) loads and warms the new bundle BEFORE the swap, so traffic never
+  waits on a load, and a bundle that fails to load leaves the active model untouched.
+- rollback() re-activates the previously active version (kept loaded for that).
+- The active version is persisted to <model_dir>/ACTIVE so a restart keeps it.
+- Shadow mode: a candidate version scores a sample of the same batches on a background
+  thread (off the request path, dropped when it falls behind) and disagreement with the
+  active model's predictions is counted.
+"""
+import datetime
+import os
+import queue
+import random
+import threading
+import time
+import pandas as pd
+from model_bundle import list_versions, load_engine
+
+ACTIVE_FILE = 'ACTIVE'
+# Versions kept in memory: the active one, the previous one (for rollback) and the shadow
+MAX_LOADED = 3
+# Batches waiting for the shadow model; beyond that shadow scoring is skipped
+SHADOW_BACKLOG = 64
+# Warm-up row so the first real request doesn't pay for lazy initialisation
+WARMUP_ROW = {'Age': 50, 'Gender': 'Male', 'BP_Systolic': 120, 'BP_Diastolic': 80, 'Heart_Rate': 72,
+              'Temperature': 37.0, 'O2_Saturation': 98, 'Symptoms': 'Routine Checkup', 'Medical_Notes': ''}
+
+
+class ShadowStats:
+    """Agreement between the active model and a shadow candidate on the same rows"""
+    def __init__(self, active_version, shadow_version):
+        self.active_version = active_version
+        self.shadow_version = shadow_version
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self.batches = 0
+        self.rows = 0
+        self.dropped_batches = 0
+        self.errors = 0
+        self.risk_disagree = 0
+        self.dept_disagree = 0
+        # (active label, shadow label) -> rows, for the rows they disagree on
+        self.risk_pairs = {}
+        self.dept_pairs = {}
+        self.seconds = 0.0
+
+    def add(self, active, shadow, seconds):
+        risk_diff = active['risk'] != shadow['risk']
+        dept_diff = active['dept'] != shadow['dept']
+        self.batches += 1
+        self.rows += len(risk_diff)
+        self.risk_disagree += int(risk_diff.sum())
+        self.dept_disagree += int(dept_diff.sum())
+        for pairs, key, diff in ((self.risk_pairs, 'risk', risk_diff), (self.dept_pairs, 'dept', dept_diff)):
+            for a, s in zip(active[key][diff], shadow[key][diff]):
+                pairs[(str(a), str(s))] = pairs.get((str(a), str(s)), 0) + 1
+        self.seconds += seconds
+
+    def to_dict(self):
+        rate = lambda n: round(n / self.rows, 4) if self.rows else None
+        pairs = lambda d: [{"active": a, "shadow": s, "rows": n} for (a, s), n in sorted(dict(d).items(), key=lambda kv: -kv[1])]
+        return {
+            "active_version": self.active_version,
+            "shadow_version": self.shadow_version,
+            "started": self.started,
+            "batches": self.batches,
+            "rows": self.rows,
+            "dropped_batches": self.dropped_batches,
+            "errors": self.errors,
+            "risk_disagreement": rate(self.risk_disagree),
+            "dept_disagreement": rate(self.dept_disagree),
+            "risk_changes": pairs(self.risk_pairs),
+            "dept_changes": pairs(self.dept_pairs),
+            "avg_batch_ms": round(self.seconds / self.batches * 1000, 2) if self.batches else None,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, model_dir, fallback=None, loader=load_engine):
+        self.model_dir = model_dir
+        # Called when there is no bundle at all (legacy joblib models)
+        self.fallback = fallback
+        self.loader = loader
+        self.active = None
+        self.history = []  # previously active versions, most recent last
+        self.shadow = None
+        self.shadow_rate = 1.0
+        self.shadow_stats = None
+        self._loaded = {}  # version -> engine
+        self._lock = threading.Lock()  # one load/swap at a time (reads of .active need no lock)
+        self._shadow_queue = queue.Queue(maxsize=SHADOW_BACKLOG)
+        self._shadow_thread = None
+
+    # --- loading ---
+
+    def versions(self):
+        return list_versions(self.model_dir)
+
+    def _read_pointer(self):
+        path = os.path.join(self.model_dir, ACTIVE_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read().strip() or None
+        return None
+
+    def _write_pointer(self, version):
+        os.makedirs(self.model_dir, exist_ok=True)
+        path = os.path.join(self.model_dir, ACTIVE_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(version + "\n")
+        os.replace(tmp, path)
+
+    def _load(self, version):
+        """Loaded (and warmed) engine for a bundle version; raises ValueError if unknown"""
+        engine = self._loaded.get(version)
+        if engine is not None:
+            return engine
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r}")
+        engine = self.loader(os.path.join(self.model_dir, version))
+        engine.predict(pd.DataFrame([WARMUP_ROW]))
+        self._loaded[version] = engine
+        return engine
+
+    def _evict(self):
+        keep = {self.active.version if self.active else None, self.shadow.version if self.shadow else None}
+        keep.update(self.history[-1:])
+        for version in list(self._loaded):
+            if len(self._loaded) <= MAX_LOADED:
+                break
+            if version not in keep:
+                del self._loaded[version]
+
+    def get(self):
+        """The active engine, loading the default version on first use. None if loading failed."""
+        if self.active is None:
+            with self._lock:
+                if self.active is None:
+                    try:
+                        self._load_default()
+                        print(f"Models and Encoders loaded successfully ({self.active.version}).")
+                    except Exception as e:
+                        print(f"Error loading models: {e}")
+        return self.active
+
+    def _load_default(self):
+        # MODEL_VERSION pins a version; otherwise the last activated one, otherwise the newest
+        versions = self.versions()
+        if versions:
+            pointer = self._read_pointer()
+            version = os.environ.get('MODEL_VERSION') or pointer
+            if version not in versions:
+                version = versions[-1]
+            self.active = self._load(version)
+            if pointer not in versions:
+                # Persist the choice: a candidate published later must not become "the newest" at the next restart
+                self._write_pointer(version)
+        elif self.fallback:
+            self.active = self.fallback()
+        else:
+            raise FileNotFoundError(f"No model bundle in {self.model_dir}")
+
+    # --- swapping ---
+
+    def activate(self, version):
+        """Loads, warms and atomically makes `version` the serving model. Returns status()."""
+        with self._lock:
+            self._activate(version, remember=True)
+        return self.status()
+
+    def rollback(self):
+        """Re-activates the previously active version"""
+        with self._lock:
+            available = self.versions()
+            while self.history and self.history[-1] not in available:
+                self.history.pop()  # deleted bundles can't be rolled back to
+            if not self.history:
+                raise ValueError("No previous model version to roll back to")
+            self._activate(self.history[-1], remember=False)
+            self.history.pop()
+        return self.status()
+
+    def _activate(self, version, remember):
+        engine = self._load(version)  # a failing load raises before anything changes
+        previous = self.active
+        if previous is engine:
+            return
+        self.active = engine  # the swap: requests that already hold `previous` finish on it
+        if previous is not None and remember:
+            self.history.append(previous.version)
+        self._write_pointer(version)
+        if self.shadow is engine:
+            self._set_shadow(None)  # the candidate got promoted
+        elif self.shadow is not None:
+            self.shadow_stats = ShadowStats(version, self.shadow.version)  # compare against the new baseline
+        self._evict()
+        print(f"Model version {version} active (was {previous.version if previous else None}).")
+
+    # --- shadow scoring ---
+
+    def set_shadow(self, version, sample_rate=1.0):
+        """Scores a sample of live batches with `version` in the background (None stops it)"""
+        with self._lock:
+            if version is not None and self.active is not None and version == self.active.version:
+                raise ValueError(f"{version} is already the active model")
+            self._set_shadow(self._load(version) if version else None, sample_rate)
+            self._evict()
+        return self.shadow_status()
+
+    def _set_shadow(self, engine, sample_rate=1.0):
+        self.shadow = engine
+        self.shadow_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.shadow_stats = ShadowStats(self.active.version if self.active else None, engine.version) if engine else None
+        if engine is not None and self._shadow_thread is None:
+            self._shadow_thread = threading.Thread(target=self._shadow_worker, name='shadow-scoring', daemon=True)
+            self._shadow_thread.start()
+
+    def submit_shadow(self, engine, frame, prediction):
+        """
+        Called on the request path after `engine` scored `frame`: hands the batch to the shadow
+        thread without waiting. Never raises and never blocks.
+        """
+        shadow, stats = self.shadow, self.shadow_stats
+        if shadow is None or stats is None or engine is shadow:
+            return False
+        if self.shadow_rate < 1.0 and random.random() >= self.shadow_rate:
+            return False
+        try:
+            self._shadow_queue.put_nowait((shadow, stats, frame, {"risk": prediction["risk"], "dept": prediction["dept"]}))
+            return True
+        except queue.Full:
+            stats.dropped_batches += 1
+            return False
+
+    def _shadow_worker(self):
+        while True:
+            shadow, stats, frame, active = self._shadow_queue.get()
+            try:
+                start = time.perf_counter()
+                predicted = shadow.predict(frame, explain=False)
+                stats.add(active, predicted, time.perf_counter() - start)
+            except Exception as e:
+                stats.errors += 1
+                print(f"Shadow scoring error ({shadow.version}): {e}")
+            finally:
+                self._shadow_queue.task_done()
+
+    def wait_for_shadow(self):
+        """Blocks until queued shadow batches are scored (tests, benchmarks)"""
+        self._shadow_queue.join()
+
+    # --- reporting ---
+
+    def shadow_status(self):
+        return {
+            "enabled": self.shadow is not None,
+            "sample_rate": self.shadow_rate if self.shadow is not None else None,
+            "backlog": self._shadow_queue.qsize(),
+            "stats": self.shadow_stats.to_dict() if self.shadow_stats else None,
+        }
+
+    def status(self):
+        return {
+            "active": self.active.version if self.active else None,
+            "available": self.versions(),
+            "loaded": sorted(self._loaded),
+            "history": list(self.history),
+            "shadow": self.shadow.version if self.shadow else None,
+        }
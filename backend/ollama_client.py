@@ -0,0 +1,94 @@
+import json
+import os
+import httpx
+
+
+class OllamaError(Exception):
+    """Ollama answered, but with an error (bad model name, OOM, ...)"""
+
+
+class OllamaClient:
+    """
+    Async client for the local Ollama server.
+    One shared httpx.AsyncClient (keep-alive connection pool) for all chats,
+    with separate connect/read timeouts so a dead server fails fast but a long
+    generation doesn't get cut off.
+    """
+    def __init__(self, base_url=None, model=None, connect_timeout=None, read_timeout=None, max_connections=None):
+        self.base_url = (base_url or os.environ.get('OLLAMA_URL', 'http://localhost:11434')).rstrip('/')
+        self.model = model or os.environ.get('OLLAMA_MODEL', 'qwen3:1.7b')
+        self.timeout = httpx.Timeout(
+            connect=float(connect_timeout or os.environ.get('OLLAMA_CONNECT_TIMEOUT', 5)),
+            read=float(read_timeout or os.environ.get('OLLAMA_READ_TIMEOUT', 120)),
+            write=10.0,
+            pool=10.0
+        )
+        self.limits = httpx.Limits(
+            max_connections=int(max_connections or os.environ.get('OLLAMA_MAX_CONNECTIONS', 32)),
+            max_keepalive_connections=int(max_connections or os.environ.get('OLLAMA_MAX_CONNECTIONS', 32))
+        )
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(self, messages, stream):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "think": False
+        }
+
+    @staticmethod
+    def _error_message(status_code, body):
+        try:
+            error_json = json.loads(body)
+            if 'error' in error_json:
+                return error_json['error']
+        except ValueError:
+            pass
+        return body or f"HTTP {status_code}"
+
+    async def chat(self, messages):
+        """Full (non-streaming) reply. Raises httpx.HTTPError on connection problems, OllamaError on API errors."""
+        response = await self.client.post("/api/chat", json=self._payload(messages, stream=False))
+        if response.status_code != 200:
+            raise OllamaError(self._error_message(response.status_code, response.text))
+        return response.json()['message']['content']
+
+    async def stream_chat(self, messages):
+        """
+        Yields content tokens as Ollama generates them.
+        Ollama streams newline-delimited JSON objects, the last one has "done": true.
+        A malformed line is skipped; a stream that ends before "done" raises OllamaError.
+        """
+        async with self.client.stream("POST", "/api/chat", json=self._payload(messages, stream=True)) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors='replace')
+                raise OllamaError(self._error_message(response.status_code, body))
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Ollama stream: skipping malformed line {line[:80]!r}")
+                    continue
+                if 'error' in chunk:
+                    raise OllamaError(chunk['error'])
+                token = chunk.get('message', {}).get('content', '')
+                if token:
+                    yield token
+                if chunk.get('done'):
+                    return
+            raise OllamaError("reply stream ended before it was complete")
@@ -0,0 +1,120 @@
+import base64
+import numpy as np
+import orjson
+
+# Sort orders for /patients: name -> default direction
+SORTS = {'risk': 'desc', 'anomaly': 'desc', 'department': 'asc', 'age': 'asc'}
+RISK_SEVERITY = {'Low': 0, 'Medium': 1, 'High': 2}
+MAX_LIMIT = 500
+
+# Keys are int64: primary value in the high bits, row in the low 32 bits, so keys are
+# unique, ties are broken by row and the row of a key is key & ROW_MASK
+ROW_BITS = 32
+ROW_MASK = (1 << ROW_BITS) - 1
+
+
+def encode_cursor(sort, order, key):
+    return base64.urlsafe_b64encode(orjson.dumps([sort, order, int(key)])).decode()
+
+
+def decode_cursor(cursor, sort, order):
+    """Key of the last row of the previous page. Raises ValueError on a bad or foreign cursor."""
+    try:
+        c_sort, c_order, key = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if (c_sort, c_order) != (sort, order):
+        raise ValueError("Cursor belongs to a different sort order")
+    return int(key)
+
+
+class SortIndex:
+    """
+    Rows kept sorted by a composite int64 key. A page is a binary search for the
+    cursor key plus a slice, so its cost doesn't depend on how many rows there are.
+    Rows whose key changes are moved with one vectorized remove + merge per tick.
+    """
+    def __init__(self, primary):
+        primary = np.asarray(primary, dtype=np.int64)
+        self.key_of = (primary << ROW_BITS) | np.arange(primary.size, dtype=np.int64)
+        self.keys = np.sort(self.key_of)
+
+    def update(self, rows, primary):
+        """New primary values for `rows`"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        new = (np.asarray(primary, dtype=np.int64) << ROW_BITS) | rows
+        moved = np.zeros(self.key_of.size, dtype=bool)
+        moved[rows] = True
+        kept = self.keys[~moved[self.keys & ROW_MASK]]
+        new = np.sort(new)
+        self.keys = np.insert(kept, np.searchsorted(kept, new), new)
+        self.key_of[rows] = new
+
+    def page(self, limit, after=None, descending=False):
+        """(rows, key of the last row or None when there is nothing after it)"""
+        if descending:
+            end = self.keys.size if after is None else int(np.searchsorted(self.keys, after, side='left'))
+            keys = self.keys[max(0, end - limit):end][::-1]
+            more = end - limit > 0
+        else:
+            start = 0 if after is None else int(np.searchsorted(self.keys, after, side='right'))
+            keys = self.keys[start:start + limit]
+            more = start + limit < self.keys.size
+        return keys & ROW_MASK, (int(keys[-1]) if more and keys.size else None)
+
+
+class PatientPages:
+    """
+    Maintained sort indexes over a VitalsSimulation for the paginated /patients endpoint.
+
+    Department and age never change; risk only changes when the safety override flags
+    a patient (sticky High) and the latest anomaly tick changes for the patients flagged
+    this tick, so sync() after every tick only moves those rows.
+    """
+    def __init__(self, sim):
+        self.sim = sim
+        frame = sim.frame
+        n = sim.n
+        self.indexes = {}
+        if 'Department' in frame.columns:
+            departments = frame['Department'].astype('category')
+            # Category codes follow the sorted department names
+            self.indexes['department'] = SortIndex(departments.cat.codes.to_numpy())
+        else:
+            self.indexes['department'] = SortIndex(np.zeros(n))
+        age = frame['Age'] if 'Age' in frame.columns else None
+        self.indexes['age'] = SortIndex(np.zeros(n) if age is None else age.fillna(-1).to_numpy())
+        risk = frame['Risk_Level'].astype(object) if 'Risk_Level' in frame.columns else None
+        self.severity = np.array([RISK_SEVERITY.get(r, -1) for r in risk] if risk is not None else [-1] * n, dtype=np.int64)
+        self.severity[sim.flagged] = RISK_SEVERITY['High']
+        self.indexes['risk'] = SortIndex(self.severity)
+        # Latest anomaly tick, -1 for never flagged
+        self.indexes['anomaly'] = SortIndex(sim.last_alert)
+
+    def sync(self, flagged):
+        """Applies one tick: `flagged` are the rows the anomaly check flagged"""
+        flagged = np.asarray(flagged, dtype=np.int64)
+        if flagged.size == 0:
+            return
+        promoted = flagged[self.severity[flagged] != RISK_SEVERITY['High']]
+        self.severity[promoted] = RISK_SEVERITY['High']
+        self.indexes['risk'].update(promoted, self.severity[promoted])
+        self.indexes['anomaly'].update(flagged, self.sim.last_alert[flagged])
+
+    def page(self, sort='risk', order=None, limit=50, cursor=None):
+        """
+        (rows, next cursor or None). Keyset cursor: the next page starts right after the last
+        row served, by key, so pages stay consistent while rows move between fetches.
+        Raises ValueError on an unknown sort/order or a bad cursor.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort '{sort}', expected one of {sorted(SORTS)}")
+        order = order or SORTS[sort]
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        after = decode_cursor(cursor, sort, order) if cursor else None
+        rows, last = self.indexes[sort].page(limit, after, descending=order == 'desc')
+        return rows, (encode_cursor(sort, order, last) if last is not None else None)
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pypdf import PdfReader
+
+# Limits for /upload_doc (env overridable)
+MAX_PDF_BYTES = int(os.environ.get('PDF_MAX_BYTES', 20 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.environ.get('PDF_MAX_PAGES', 500))
+PDF_TIMEOUT = float(os.environ.get('PDF_TIMEOUT', 30))
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', 2))
+
+# The six field patterns as one alternation: a single pass over the text
+FIELD_PATTERN = re.compile(
+    r"Age:\s*(?P<age>\d+)"
+    r"|Gender:\s*(?P<gender>Male|Female)"
+    r"|BP:\s*(?P<sys>\d+)/(?P<dia>\d+)"
+    r"|HR:\s*(?P<hr>\d+)"
+    r"|Temp:\s*(?P<temp>\d+\.?\d*)"
+    r"|O2:\s*(?P<o2>\d+)",
+    re.IGNORECASE,
+)
+# Group -> (output field, converter); BP (e.g., 120/80) ends on the 'dia' group
+FIELD_GROUPS = {
+    'age': ('Age', int),
+    'gender': ('Gender', str),
+    'hr': ('Heart_Rate', int),
+    'temp': ('Temperature', float),
+    'o2': ('O2_Saturation', int),
+}
+
+
+class PdfLimitError(Exception):
+    """The document is over the size or page limit"""
+
+
+def extract_fields(text):
+    """Age, Gender, BP, HR, Temp and O2 from discharge-summary text (first occurrence of each)"""
+    extracted_data = {}
+    for match in FIELD_PATTERN.finditer(text):
+        group = match.lastgroup
+        if group == 'dia':
+            if 'BP_Systolic' not in extracted_data:
+                extracted_data['BP_Systolic'] = int(match.group('sys'))
+                extracted_data['BP_Diastolic'] = int(match.group('dia'))
+        else:
+            field, convert = FIELD_GROUPS[group]
+            extracted_data.setdefault(field, convert(match.group(group)))
+        if len(extracted_data) == len(FIELD_GROUPS) + 2:
+            break  # every field found
+    return extracted_data
+
+
+def extract_pdf(content, max_pages=MAX_PDF_PAGES):
+    """
+    Runs in a worker process: text of every page (collected as a list and joined once)
+    plus the extracted fields. Raises PdfLimitError over the page limit.
+    """
+    reader = PdfReader(io.BytesIO(content))
+    if len(reader.pages) > max_pages:
+        raise PdfLimitError(f"PDF has {len(reader.pages)} pages, the limit is {max_pages}")
+    parts = []
+    for page in reader.pages:
+        parts.append(page.extract_text() or "")
+    text = "".join(parts)
+    return {
+        "extracted_text_preview": text[:200],
+        "extracted_data": extract_fields(text),
+        "medical_notes": text,  # Return full text for the model
+    }
+
+
+class _Worker:
+    """One worker process of its own, so a stuck parse can be killed without touching the others"""
+    def __init__(self):
+        # spawn: don't fork a server process that has threads (request pool, shadow scoring, OpenMP)
+        self.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self.started = False
+
+    def kill(self):
+        for process in list((getattr(self.pool, '_processes', None) or {}).values()):
+            process.kill()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# PDF_WORKERS slots: the semaphore admits that many parses at once, each on an idle (or new) worker
+_idle = []
+_workers = set()
+_slots = None  # (event loop, asyncio.Semaphore)
+
+
+def _slots_for(loop):
+    global _slots
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(PDF_WORKERS))
+    return _slots[1]
+
+
+def _checkout():
+    worker = _idle.pop() if _idle else _Worker()
+    _workers.add(worker)
+    return worker
+
+
+def _checkin(worker, healthy):
+    if healthy:
+        _idle.append(worker)
+    else:
+        _workers.discard(worker)
+        worker.kill()
+
+
+async def extract_pdf_async(content, max_bytes=MAX_PDF_BYTES, max_pages=MAX_PDF_PAGES, timeout=PDF_TIMEOUT):
+    """
+    Parses a PDF in a worker process so the event loop (vitals broadcast, other requests)
+    keeps running. At most PDF_WORKERS parses run at once; the others wait for a worker
+    first, and `timeout` only counts from when a worker picks the document up.
+    Raises PdfLimitError over the limits, asyncio.TimeoutError after `timeout`: the
+    timed-out parse can't be cancelled inside the worker, so only that worker is killed.
+    """
+    if len(content) > max_bytes:
+        raise PdfLimitError(f"PDF is larger than {max_bytes // (1024 * 1024)} MB")
+    loop = asyncio.get_running_loop()
+    async with _slots_for(loop):
+        worker = _checkout()
+        future = None
+        healthy = False
+        try:
+            if not worker.started:
+                # Start the process before the clock runs: interpreter startup isn't parse time
+                await loop.run_in_executor(worker.pool, int)
+                worker.started = True
+            future = loop.run_in_executor(worker.pool, extract_pdf, content, max_pages)
+            result = await asyncio.wait_for(future, timeout)
+            healthy = True
+            return result
+        except Exception as e:
+            # An error raised by the parse itself leaves the worker usable; a timeout or a
+            # crashed process doesn't (cancellation isn't an Exception: the worker is killed too)
+            healthy = (future is not None and future.done()
+                       and not isinstance(e, (asyncio.TimeoutError, BrokenProcessPool)))
+            raise
+        finally:
+            _checkin(worker, healthy)
+
+
+def shutdown():
+    global _slots
+    for worker in list(_workers):
+        worker.kill()
+    _workers.clear()
+    _idle.clear()
+    _slots = None
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# Numeric fields we compare against the population (same as the model's numeric features)
+VITALS = ['Age', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation']
+
+# Same bands as the bias dashboard
+AGE_BINS = [0, 18, 35, 50, 65, 120]
+AGE_LABELS = ['0-18', '19-35', '36-50', '51-65', '65+']
+GENDERS = ['Female', 'Male']
+
+
+def age_band(age):
+    """
+    Index into AGE_LABELS (vectorized; matches pd.cut(bins=AGE_BINS) right-closed bins).
+    Ages outside (0, 120] are in no band, like pd.cut's NaN: -1 in an array, None for a scalar.
+    """
+    band = np.searchsorted(AGE_BINS, age, side='left') - 1
+    band = np.where((band >= 0) & (band < len(AGE_LABELS)), band, -1)
+    if band.ndim == 0:
+        return int(band) if band >= 0 else None
+    return band
+
+
+def gender_code(gender):
+    """Index into GENDERS, -1 for anything else (vectorized)"""
+    return pd.Categorical(gender, categories=GENDERS).codes.astype(np.int64)
+
+
+class PercentileIndex:
+    """
+    Sorted per-vital arrays so "what % of patients are below this value" is an
+    O(log N) searchsorted instead of a full column scan per request.
+
+    Cohorts (age band x gender) share one array per vital, sorted by (cohort, value),
+    with offsets marking where each cohort starts - like a CSR matrix.
+    """
+    def __init__(self):
+        self.n_cohorts = len(AGE_LABELS) * len(GENDERS)
+        self.size = 0
+        self.sorted = {v: np.empty(0) for v in VITALS}
+        self.cohort_sorted = {v: np.empty(0) for v in VITALS}
+        self.cohort_offsets = {v: np.zeros(self.n_cohorts + 1, dtype=np.int64) for v in VITALS}
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        index.add(df)
+        return index
+
+    @staticmethod
+    def cohort_codes(age, gender):
+        """Cohort id = age band * len(GENDERS) + gender, -1 if the gender is unknown or the age in no band"""
+        genders = gender_code(gender)
+        bands = age_band(np.asarray(age))
+        return np.where((genders >= 0) & (bands >= 0), bands * len(GENDERS) + genders, -1)
+
+    def add(self, df):
+        """
+        Incrementally merges new rows into the index (no full re-sort).
+        New values are sorted, then inserted at their searchsorted positions.
+        """
+        if df is None or df.empty:
+            return
+        cohorts = self.cohort_codes(df['Age'].to_numpy(), df['Gender'].to_numpy())
+        known = cohorts >= 0
+
+        for vital in VITALS:
+            if vital not in df.columns:
+                continue
+            values = df[vital].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+
+            # Whole population
+            new = np.sort(values[valid])
+            self.sorted[vital] = np.insert(self.sorted[vital], np.searchsorted(self.sorted[vital], new), new)
+
+            # Cohorts: order new rows by (cohort, value), then insert each inside its cohort's block
+            mask = valid & known
+            c, v = cohorts[mask], values[mask]
+            # One argsort on a composite (cohort, value) key - much faster than np.lexsort
+            if len(v):
+                span = v.max() - v.min() + 1
+                order = np.argsort(c * span + (v - v.min()))
+            else:
+                order = np.empty(0, dtype=np.int64)
+            c, v = c[order], v[order]
+            offsets = self.cohort_offsets[vital]
+            arr = self.cohort_sorted[vital]
+            bounds = np.searchsorted(c, np.arange(self.n_cohorts + 1))
+            positions = np.empty(len(v), dtype=np.int64)
+            for cohort in range(self.n_cohorts):
+                lo, hi = bounds[cohort], bounds[cohort + 1]
+                if lo == hi:
+                    continue
+                start, stop = offsets[cohort], offsets[cohort + 1]
+                positions[lo:hi] = start + np.searchsorted(arr[start:stop], v[lo:hi])
+            self.cohort_sorted[vital] = np.insert(arr, positions, v)
+            counts = np.bincount(c, minlength=self.n_cohorts)
+            self.cohort_offsets[vital] = offsets + np.concatenate(([0], np.cumsum(counts)))
+
+        self.size += len(df)
+
+    def percentile(self, vital, value, cohort=None):
+        """% of the population (or cohort) with a value strictly below `value`. None if empty."""
+        if cohort is None:
+            arr = self.sorted[vital]
+        else:
+            offsets = self.cohort_offsets[vital]
+            arr = self.cohort_sorted[vital][offsets[cohort]:offsets[cohort + 1]]
+        if len(arr) == 0:
+            return None
+        return float(np.searchsorted(arr, value, side='left')) / len(arr) * 100
+
+    def cohort_label(self, cohort):
+        return f"{GENDERS[cohort % len(GENDERS)]} patients aged {AGE_LABELS[cohort // len(GENDERS)]}"
+
+
+class PopulationStats:
+    """
+    Keeps a PercentileIndex in sync with the shared PatientDataset.
+    When the dataset reloads, appended rows are merged incrementally; anything else rebuilds.
+    """
+    def __init__(self, df=None):
+        self.index = PercentileIndex()
+        self.rows = 0
+        if df is not None:
+            self._rebuild(df)
+
+    def _rebuild(self, df):
+        self.index = PercentileIndex.from_frame(df)
+        self.rows = len(df)
+
+    def sync(self, dataset, appended_from=None):
+        """PatientDataset.on_change callback"""
+        df = dataset.frame
+        if appended_from is not None and appended_from == self.rows:
+            # Appended rows only: merge the tail into the existing index
+            self.index.add(df.iloc[self.rows:])
+            self.rows = len(df)
+        else:
+            self._rebuild(df)
+
+    def compare(self, patient):
+        """
+        Percentile rankings for a patient against the whole population and
+        against their own cohort (age band x gender).
+        """
+        if self.index.size == 0:
+            return {}
+
+        stats = {}
+        labels = {'BP_Systolic': 'BP_Percentile'}  # legacy key kept for existing clients
+        for vital in VITALS:
+            pct = self.index.percentile(vital, getattr(patient, vital))
+            if pct is not None:
+                stats[labels.get(vital, f"{vital}_Percentile")] = f"Higher than {pct:.1f}% of patients"
+
+        cohort = int(self.index.cohort_codes([patient.Age], [patient.Gender])[0])
+        if cohort >= 0:
+            cohort_stats = {"group": self.index.cohort_label(cohort)}
+            for vital in VITALS:
+                pct = self.index.percentile(vital, getattr(patient, vital), cohort=cohort)
+                if pct is not None:
+                    cohort_stats[f"{vital}_Percentile"] = f"Higher than {pct:.1f}% of {cohort_stats['group']}"
+            stats['Cohort'] = cohort_stats
+
+        return stats
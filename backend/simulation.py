@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+from explainability import CODE_FIELDS, HR_SPIKE, O2_DESATURATION
+
+# Drift models, same probabilities as the original per-dict loop
+SCENARIOS = ['Stable', 'Sepsis', 'Cardiac']
+SCENARIO_WEIGHTS = [0.8, 0.1, 0.1]
+
+# Simulated vitals and their fallbacks for missing values
+DEFAULTS = {'Heart_Rate': 80, 'Temperature': 37.0, 'BP_Systolic': 120, 'BP_Diastolic': 80, 'O2_Saturation': 98}
+HISTORY_FIELDS = ['Heart_Rate', 'Temperature', 'O2_Saturation', 'BP_Systolic']
+HISTORY_LEN = 5
+
+# Fields a tick can change, with the scale they are stored at (delta frames)
+DELTA_FIELDS = [('Heart_Rate', 1), ('Temperature', 10), ('O2_Saturation', 1), ('BP_Systolic', 1)]
+
+
+
+class VitalsSimulation:
+    """
+    Struct-of-arrays vitals simulator.
+
+    Vitals, scenario codes and the short history live in contiguous NumPy arrays
+    (temperature as int16 tenths of a degree, so rounding to 0.1 is exact), and one
+    tick applies the Stable/Sepsis/Cardiac drift to all patients of a scenario at
+    once with a seeded Generator. Dicts are only built by records() for the patients
+    actually sent to clients.
+    """
+    def __init__(self, frame, seed=None, explain_engine=None, history_len=HISTORY_LEN, texts=None):
+        self.frame = frame  # shared read-only dataset, only read when materializing
+        # Free-text columns kept outside the frame (dataset.TextColumn), decoded per materialized row
+        self.texts = texts or {}
+        self.n = len(frame)
+        self.rng = np.random.default_rng(seed)
+        self.explain_engine = explain_engine
+
+        self.heart_rate = self._column(frame, 'Heart_Rate')
+        self.temperature = np.round(self._column(frame, 'Temperature', np.float64) * 10).astype(np.int16)
+        self.o2 = self._column(frame, 'O2_Saturation')
+        self.bp_systolic = self._column(frame, 'BP_Systolic')
+        self.bp_diastolic = self._column(frame, 'BP_Diastolic')
+        self.scenario = self.rng.choice(len(SCENARIOS), size=self.n, p=SCENARIO_WEIGHTS).astype(np.int8)
+
+        # history[slot, field, patient]: ring buffer of the last history_len ticks (same for every patient)
+        self.history_len = history_len
+        self.history = np.zeros((history_len, len(HISTORY_FIELDS), self.n), dtype=np.int16)
+        self.history_head = 0
+        self.history_count = 0
+
+        # Sticky safety override: once a patient is flagged, Risk_Level stays High
+        self.flagged = np.zeros(self.n, dtype=bool)
+        # Anomaly codes and vitals at the last anomalous tick: HR, temp, O2, systolic, previous HR, previous O2
+        self.alert_codes = np.zeros(self.n, dtype=np.uint16)
+        self.alert = np.zeros((6, self.n), dtype=np.int16)
+        self.alert_changed = np.zeros(self.n, dtype=bool)
+        # Tick of each patient's latest anomaly, -1 if never flagged
+        self.last_alert = np.full(self.n, -1, dtype=np.int64)
+        self.ticks = 0
+        if 'Patient_ID' in frame.columns:
+            self.patient_ids = frame['Patient_ID'].to_numpy(dtype=object)
+        else:
+            self.patient_ids = np.arange(self.n).astype(object)
+        self._static = {}
+
+    @staticmethod
+    def _column(frame, name, dtype=np.int16):
+        if name not in frame.columns:
+            return np.full(len(frame), DEFAULTS[name], dtype=dtype)
+        values = pd.to_numeric(frame[name], errors='coerce').fillna(DEFAULTS[name])
+        return values.to_numpy().astype(dtype)
+
+    def _vitals(self):
+        return [self.heart_rate, self.temperature, self.o2, self.bp_systolic]
+
+    # --- Tick ---
+
+    def tick(self):
+        """Advances every patient one step. Returns the indices flagged by the anomaly check."""
+        self.history[self.history_head] = np.stack(self._vitals())
+        self.history_head = (self.history_head + 1) % self.history_len
+        self.history_count = min(self.history_count + 1, self.history_len)
+
+        rng = self.rng
+        hr, temp = self.heart_rate, self.temperature
+
+        # Stable: random small drift, kept within normal-ish bounds
+        idx = np.flatnonzero(self.scenario == 0)
+        hr[idx] = np.clip(hr[idx] + rng.integers(-1, 2, idx.size), 60, 100)
+        temp[idx] = np.clip(np.round(temp[idx] + rng.uniform(-0.5, 0.5, idx.size)), 360, 375)
+
+        # Sepsis: gradual deterioration - temp up, HR up, BP down, capped
+        idx = np.flatnonzero(self.scenario == 1)
+        temp[idx] = np.minimum(np.round(temp[idx] + rng.uniform(0.1, 1.0, idx.size)), 410)
+        hr[idx] = np.minimum(hr[idx] + rng.integers(0, 3, idx.size), 160)
+        self.bp_systolic[idx] = np.maximum(self.bp_systolic[idx] - rng.integers(0, 2, idx.size), 70)
+
+        # Cardiac: erratic HR with a 10% chance of a sudden spike
+        idx = np.flatnonzero(self.scenario == 2)
+        spike = rng.random(idx.size) < 0.1
+        delta = np.where(spike, rng.integers(10, 31, idx.size), rng.integers(-5, 6, idx.size))
+        hr[idx] = np.clip(hr[idx] + delta, 40, 190)
+
+        self.ticks += 1
+        return self._check_anomalies()
+
+    def _check_anomalies(self):
+        """
+        Runs the engine's batch rules over every patient and snapshots the codes and
+        vitals of flagged ones. Explanation strings are only formatted when sent.
+        """
+        if self.explain_engine is None or self.n == 0:
+            return np.empty(0, dtype=np.int64)
+        vitals = {
+            'Heart_Rate': self.heart_rate,
+            'Temperature': self.temperature / 10,
+            'O2_Saturation': self.o2,
+            'BP_Systolic': self.bp_systolic,
+        }
+        prev = self.history[(self.history_head - 1) % self.history_len]
+        # detect_anomalies only looks at trends once there are two history entries
+        previous = {'Heart_Rate': prev[0], 'O2_Saturation': prev[2]} if self.history_count >= 2 else None
+        codes = self.explain_engine.detect_anomalies_batch(vitals, previous)
+
+        idx = np.flatnonzero(codes)
+        codes = codes[idx]
+        values = np.stack([v[idx] for v in self._vitals()] + [prev[0, idx], prev[2, idx]])
+        # The text changes if the codes do, or a value quoted by one of them does
+        quoted = np.stack([(codes & CODE_FIELDS[f]) != 0 for f in HISTORY_FIELDS]
+                          + [(codes & HR_SPIKE) != 0, (codes & O2_DESATURATION) != 0])
+        changed = (self.alert_codes[idx] != codes) | (quoted & (self.alert[:, idx] != values)).any(axis=0)
+        self.alert_changed[:] = False
+        self.alert_changed[idx] = changed
+
+        self.flagged[idx] = True
+        self.last_alert[idx] = self.ticks
+        self.alert_codes[idx] = codes
+        self.alert[:, idx] = values
+        return idx
+
+    def explanation(self, i):
+        """Explanation strings for the patient's latest anomaly (same text as detect_anomalies)"""
+        code = int(self.alert_codes[i])
+        if not code:
+            return []
+        hr, temp, o2, sys, prev_hr, prev_o2 = self.alert[:, i].tolist()
+        current = {'Heart_Rate': hr, 'Temperature': temp / 10, 'O2_Saturation': o2, 'BP_Systolic': sys}
+        return self.explain_engine.describe_anomalies(code, current, {'Heart_Rate': prev_hr, 'O2_Saturation': prev_o2})
+
+    # --- Materialization ---
+
+    def _history(self, i):
+        """Oldest-first list of history dicts (legacy shape, including the BPM alias)"""
+        history = []
+        for k in range(self.history_count):
+            hr, temp, o2, sys = self.history[(self.history_head - self.history_count + k) % self.history_len, :, i].tolist()
+            history.append({'Heart_Rate': hr, 'BPM': hr, 'Temperature': temp / 10, 'O2_Saturation': o2, 'BP_Systolic': sys})
+        return history
+
+    def _static_records(self, indices):
+        """Dataset fields per patient (cached, they never change during the simulation)"""
+        missing = [i for i in indices if i not in self._static]
+        if missing:
+            rows = self.frame.take(missing).astype(object)
+            rows = rows.where(rows.notna(), None)
+            texts = {name: column.take(missing) for name, column in self.texts.items()}
+            for k, (i, record) in enumerate(zip(missing, rows.to_dict(orient='records'))):
+                for name, values in texts.items():
+                    record[name] = values[k]
+                self._static[i] = record
+        return [self._static[i] for i in indices]
+
+    def records(self, indices=None, fields=None):
+        """
+        Patient dicts in the legacy /ws/vitals shape, built only for `indices` (default: everyone).
+        fields: optional projection, e.g. skipping 'history' and 'Medical_Notes' (not computed at all).
+        """
+        if indices is None:
+            indices = range(self.n)
+        indices = [int(i) for i in indices]
+        hr = self.heart_rate[indices].tolist()
+        temp = self.temperature[indices].tolist()
+        o2 = self.o2[indices].tolist()
+        sys = self.bp_systolic[indices].tolist()
+        dia = self.bp_diastolic[indices].tolist()
+
+        out = []
+        for k, (i, static) in enumerate(zip(indices, self._static_records(indices))):
+            p = dict(static)
+            p['Heart_Rate'] = hr[k]
+            p['Temperature'] = temp[k] / 10
+            p['O2_Saturation'] = o2[k]
+            p['BP_Systolic'] = sys[k]
+            p['BP_Diastolic'] = dia[k]
+            if fields is None or 'explanation' in fields:
+                p['explanation'] = self.explanation(i)
+            p['scenario'] = SCENARIOS[self.scenario[i]]
+            if fields is None or 'history' in fields:
+                p['history'] = self._history(i)
+            if self.flagged[i]:
+                p['Risk_Level'] = 'High'
+                p['Predicted_Risk'] = 'High'  # Override ML model for safety
+            if fields is not None:
+                p = {k: v for k, v in p.items() if k in fields}
+            out.append(p)
+        return out
+
+    def changes(self, among=None):
+        """
+        What the last tick changed, per patient: [{'Patient_ID': ..., 'Heart_Rate': 71}, ...].
+        Only patients with at least one changed field are listed, with only those fields
+        (and only patients in the `among` row mask, if given).
+        History isn't included - it is the previous values, which the client already has.
+        """
+        if self.history_count == 0:
+            return []
+        prev = self.history[(self.history_head - 1) % self.history_len]
+        current = np.stack(self._vitals())
+        changed = current != prev
+        changed_rows = changed.any(axis=0) | self.alert_changed
+        if among is not None:
+            changed_rows &= among
+        rows = np.flatnonzero(changed_rows)
+
+        out = [{'Patient_ID': pid} for pid in self.patient_ids[rows].tolist()]
+        for f, (name, scale) in enumerate(DELTA_FIELDS):
+            sel = np.flatnonzero(changed[f, rows])
+            values = current[f, rows[sel]]
+            values = (values / scale).tolist() if scale != 1 else values.tolist()
+            for j, value in zip(sel.tolist(), values):
+                out[j][name] = value
+        for j in np.flatnonzero(self.alert_changed[rows]).tolist():
+            out[j]['Risk_Level'] = 'High'
+            out[j]['Predicted_Risk'] = 'High'
+            out[j]['explanation'] = self.explanation(int(rows[j]))
+        return out
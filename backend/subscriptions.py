@@ -0,0 +1,108 @@
+import numpy as np
+
+SUBSCRIBE_FIELDS = ('departments', 'risk_levels', 'patient_ids', 'anomalies_only')
+
+
+class Subscription:
+    """
+    What a /ws/vitals client wants to see. Empty filters mean "everything";
+    non-empty filters are ANDed (e.g. Cardiology AND High risk).
+    Clients with equal subscriptions share one slice and one encoded frame per tick.
+    """
+    def __init__(self, departments=None, risk_levels=None, patient_ids=None, anomalies_only=False):
+        self.departments = frozenset(departments or ())
+        self.risk_levels = frozenset(risk_levels or ())
+        self.patient_ids = frozenset(str(p) for p in (patient_ids or ()))
+        self.anomalies_only = bool(anomalies_only)
+
+    @classmethod
+    def from_message(cls, message):
+        """Parses a {"type": "subscribe", ...} message. Raises ValueError on a bad one."""
+        unknown = set(message) - set(SUBSCRIBE_FIELDS) - {'type'}
+        if unknown:
+            raise ValueError(f"Unknown subscription fields: {sorted(unknown)}")
+        for field in ('departments', 'risk_levels', 'patient_ids'):
+            value = message.get(field)
+            if value is None:
+                continue
+            # Patient IDs may be numbers (compared as strings); bool is an int subclass, so exclude it
+            allowed = (str, int) if field == 'patient_ids' else (str,)
+            if not isinstance(value, list) or not all(isinstance(v, allowed) and not isinstance(v, bool) for v in value):
+                kind = "strings or numbers" if field == 'patient_ids' else "strings"
+                raise ValueError(f"'{field}' must be a list of {kind}")
+        anomalies_only = message.get('anomalies_only', False)
+        if anomalies_only is not None and not isinstance(anomalies_only, bool):
+            raise ValueError("'anomalies_only' must be true or false")
+        return cls(message.get('departments'), message.get('risk_levels'),
+                   message.get('patient_ids'), anomalies_only)
+
+    @property
+    def key(self):
+        return (self.departments, self.risk_levels, self.patient_ids, self.anomalies_only)
+
+    @property
+    def is_everything(self):
+        return not (self.departments or self.risk_levels or self.patient_ids or self.anomalies_only)
+
+    def __eq__(self, other):
+        return isinstance(other, Subscription) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+EVERYTHING = Subscription()
+
+
+class PatientIndex:
+    """
+    Secondary indexes over a VitalsSimulation so a subscription's slice is a few
+    vectorized mask operations, not a scan of patient dicts per client.
+
+    Department and patient ID never change during the simulation: department ->
+    row indices and ID -> row are built once. Risk level is the dataset label unless
+    the safety override flagged the patient (then High), read from the live arrays.
+    """
+    def __init__(self, sim):
+        self.sim = sim
+        frame = sim.frame
+        self.departments = {}
+        if 'Department' in frame.columns:
+            codes, names = self._codes(frame['Department'])
+            self.departments = {name: np.flatnonzero(codes == c) for c, name in enumerate(names)}
+        self.risk_names = []
+        self.risk_codes = np.full(sim.n, -1, dtype=np.int8)
+        if 'Risk_Level' in frame.columns:
+            codes, self.risk_names = self._codes(frame['Risk_Level'])
+            self.risk_codes = codes.astype(np.int8)
+        self.rows_by_id = {str(pid): i for i, pid in enumerate(sim.patient_ids.tolist())}
+
+    @staticmethod
+    def _codes(column):
+        categorical = column.astype('category')
+        return categorical.cat.codes.to_numpy(), [str(c) for c in categorical.cat.categories]
+
+    def mask(self, subscription):
+        """Boolean row mask of the patients in a subscription's slice, for the current tick"""
+        n = self.sim.n
+        if subscription.is_everything:
+            return np.ones(n, dtype=bool)
+        mask = np.ones(n, dtype=bool)
+        if subscription.departments:
+            dept = np.zeros(n, dtype=bool)
+            for name in subscription.departments:
+                dept[self.departments.get(name, [])] = True
+            mask &= dept
+        if subscription.patient_ids:
+            ids = np.zeros(n, dtype=bool)
+            ids[[self.rows_by_id[p] for p in subscription.patient_ids if p in self.rows_by_id]] = True
+            mask &= ids
+        if subscription.risk_levels:
+            wanted = [c for c, name in enumerate(self.risk_names) if name in subscription.risk_levels]
+            risk = np.isin(self.risk_codes, wanted)
+            # Flagged patients are overridden to High
+            risk = np.where(self.sim.flagged, 'High' in subscription.risk_levels, risk)
+            mask &= risk
+        if subscription.anomalies_only:
+            mask &= self.sim.flagged
+        return mask
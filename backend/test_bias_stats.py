@@ -0,0 +1,63 @@
+import threading
+import pandas as pd
+from bias_stats import BiasStats
+
+def legacy_tables(df):
+    # The old per-request computation
+    gender_risk = df.groupby(['Gender', 'Risk_Level']).size().unstack(fill_value=0).to_dict()
+    df = df.copy()
+    df['Age_Group'] = pd.cut(df['Age'], bins=[0, 18, 35, 50, 65, 120], labels=['0-18', '19-35', '36-50', '51-65', '65+'])
+    age_risk = df.groupby(['Age_Group', 'Risk_Level']).size().unstack(fill_value=0).to_dict()
+    return gender_risk, age_risk
+
+def test_bias_stats():
+    df = pd.read_csv('patients_dataset.csv')
+    stats = BiasStats(df)
+
+    print("Testing cached tables against the pandas computation...")
+    gender_risk, age_risk = legacy_tables(df)
+    response = stats.response()
+    assert response['gender_risk'] == gender_risk
+    assert response['age_risk'] == age_risk
+    print("- Gender / Age tables match: OK")
+
+    # Ages outside (0, 120] are in no band, as with pd.cut
+    edges = pd.concat([df, df.head(3).assign(Age=[0, 121, 150])], ignore_index=True)
+    assert BiasStats(edges).response()['age_risk'] == legacy_tables(edges)[1] == age_risk
+    stats.add({'Gender': 'Male', 'Age': 0, 'Department': 'Cardiology', 'Risk_Level': 'High', 'Predicted_Risk': 'High'})
+    assert stats.response()['age_risk'] == age_risk and stats.response()['age_predicted_risk'] == {}
+    stats = BiasStats(df)
+    print("- Out-of-range ages left out of the age tables: OK")
+
+    print("\nTesting incremental updates...")
+    version = response['version']
+    stats.add({'Gender': 'Female', 'Age': 30, 'Department': 'Cardiology', 'Risk_Level': 'Low', 'Predicted_Risk': 'High'})
+    stats.add({'Gender': 'Female', 'Age': 30, 'Department': 'Cardiology', 'Risk_Level': '', 'Predicted_Risk': 'High'})
+    response = stats.response()
+    assert response['version'] == version + 2
+    assert response['gender_risk']['Low']['Female'] == gender_risk['Low']['Female'] + 1
+    # The unlabeled patient stays out of the label tables, both count as predicted High
+    assert response['gender_risk']['High']['Female'] == gender_risk['High']['Female']
+    assert response['age_risk']['High']['19-35'] == age_risk['High']['19-35']
+    assert response['gender_predicted_risk'] == {'High': {'Female': 2}}
+    assert response['age_predicted_risk'] == {'High': {'19-35': 2}}
+    # Only the labeled patient lands in the labeled-vs-predicted table
+    assert response['predicted_vs_labeled'] == {'High': {'Low': 1}}
+    print("- Triaged patients counted without re-scanning: OK")
+
+    print("\nTesting concurrent updates...")
+    stats = BiasStats()
+    record = {'Gender': 'Male', 'Age': 40, 'Department': 'Neurology', 'Risk_Level': 'Medium', 'Predicted_Risk': 'Medium'}
+    def worker():
+        for _ in range(2000):
+            stats.add(record)
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stats.response()['gender_risk'] == {'Medium': {'Male': 8000}}
+    print("- No lost updates across threads: OK")
+
+if __name__ == "__main__":
+    test_bias_stats()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from broadcast import ConnectionManager
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.frames.append(data)
+
+def test_broadcast_backpressure():
+    async def run():
+        print("Testing encode-once fan-out...")
+        manager = ConnectionManager(max_queue=2, policy='coalesce')
+        fast, slow = FakeSocket(), FakeSocket(delay=0.2)
+        await manager.connect(fast)
+        await manager.connect(slow)
+        for seq in range(10):
+            await manager.broadcast({"seq": seq})
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.5)
+        assert [json.loads(f)["seq"] for f in fast.frames] == list(range(10))
+        # Same encoded frame object handed to both clients
+        assert slow.frames[0] is fast.frames[0]
+        print("- Fast client got every frame, in order: OK")
+
+        print("\nTesting slow consumer policy...")
+        seqs = [json.loads(f)["seq"] for f in slow.frames]
+        assert seqs == sorted(seqs) and seqs[-1] == 9 and len(seqs) < 10
+        assert manager.stats()["dropped_frames"] == 10 - len(seqs)
+        print(f"- Slow client coalesced to latest ({len(seqs)} frames, {10 - len(seqs)} dropped): OK")
+
+        print("\nTesting delta clients resync instead of dropping...")
+        state = {"seq": 0}
+        delta_manager = ConnectionManager(max_queue=2)
+        lagging = FakeSocket(delay=0.2)
+        channel = await delta_manager.connect(lagging, protocol=2, snapshot=lambda subscription: {"type": "snapshot", "seq": state["seq"]})
+        channel.request_snapshot(resync=False)
+        for seq in range(1, 11):
+            state["seq"] = seq
+            await delta_manager.broadcast({"type": "delta", "seq": seq}, protocol=2)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(1.0)
+        frames = [json.loads(f) for f in lagging.frames]
+        assert frames[0]["type"] == "snapshot"
+        # Every delta applies on top of the frame before it: no gaps
+        for prev, frame in zip(frames, frames[1:]):
+            assert frame["type"] == "snapshot" or frame["seq"] == prev["seq"] + 1
+        assert frames[-1]["seq"] == 10 and channel.resyncs >= 1
+        print(f"- Lagging client resynced from a snapshot ({channel.resyncs}x), no seq gaps: OK")
+
+        for manager_, sockets in ((manager, (fast, slow)), (delta_manager, (lagging,))):
+            for ws in sockets:
+                manager_.disconnect(ws)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_broadcast_backpressure()
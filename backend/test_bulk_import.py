@@ -0,0 +1,102 @@
+import asyncio
+import io
+import zipfile
+import pdf_extract
+from bulk_import import ImportLimitError, expand_zip, extract_documents, to_patient
+from test_pdf_extract import make_pdf, SUMMARY
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buf.getvalue()
+
+def test_expand_zip():
+    print("Testing ZIP expansion...")
+    content = make_zip({"a.pdf": make_pdf(1, SUMMARY), "notes/b.PDF": make_pdf(1, SUMMARY), "readme.txt": "skip"})
+    docs = expand_zip("transfer.zip", content)
+    assert [name for name, _, _ in docs] == ["transfer.zip/a.pdf", "transfer.zip/notes/b.PDF"]
+    assert all(error is None for _, _, error in docs)
+    assert expand_zip("broken.zip", b"not a zip")[0][2] == "Not a valid ZIP file"
+    print("- PDF members only, bad archives reported: OK")
+
+def test_corrupt_zip_member():
+    print("Testing a corrupt ZIP member...")
+    good = make_pdf(1, SUMMARY)
+    content = bytearray(make_zip({"a.pdf": b"%PDF-1.4 broken", "b.pdf": good}))
+    data = content.find(b"%PDF-1.4 broken")
+    content[data] ^= 0xFF  # stored member: flipping a byte breaks its CRC
+    docs = expand_zip("transfer.zip", bytes(content))
+    assert docs[0] == ("transfer.zip/a.pdf", None, "Corrupt or unsupported ZIP member")
+    assert docs[1] == ("transfer.zip/b.pdf", good, None)
+    print("- Bad CRC reported for that member, the other one still read: OK")
+
+def test_expand_zip_limits():
+    print("Testing ZIP limits...")
+    # Highly compressible members: small archive, large uncompressed total
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for i in range(4):
+            archive.writestr(f"{i}.pdf", b"0" * (1024 * 1024))
+    content = buf.getvalue()
+    assert len(content) < 64 * 1024
+    for kwargs in ({"max_docs": 3}, {"max_bytes": 3 * 1024 * 1024}):
+        try:
+            expand_zip("bomb.zip", content, **kwargs)
+            assert False, f"expected ImportLimitError for {kwargs}"
+        except ImportLimitError:
+            pass
+    assert len(expand_zip("bomb.zip", content, max_docs=4, max_bytes=4 * 1024 * 1024)) == 4
+    print("- Document count and uncompressed total rejected before decompressing: OK")
+
+def test_to_patient():
+    patient, missing = to_patient({"Age": 40, "Gender": "Male", "Heart_Rate": 90}, "notes")
+    assert missing == ["BP_Systolic", "BP_Diastolic", "Temperature", "O2_Saturation"]
+    assert patient["Medical_Notes"] == "notes" and patient["Age"] == 40
+
+def test_extract_documents_parallel():
+    print("Testing parallel extraction of 20 documents...")
+    docs = [(f"doc{i}.pdf", make_pdf(5, SUMMARY), None) for i in range(19)] + [("bad.pdf", b"garbage", None)]
+
+    async def collect():
+        return [item async for item in extract_documents(docs)]
+
+    try:
+        results = asyncio.run(collect())
+    finally:
+        pdf_extract.shutdown()
+    assert sorted(i for i, _, _ in results) == list(range(20))
+    by_index = {i: (result, error) for i, result, error in results}
+    assert by_index[19][0] is None and by_index[19][1].startswith("Error processing file")
+    assert all(by_index[i][0]["extracted_data"]["O2_Saturation"] == 91 for i in range(19))
+    print("- Every document reported once, a broken one doesn't fail the others: OK")
+
+def test_import_byte_budget_counts_plain_pdfs():
+    from fastapi.testclient import TestClient
+    import bulk_import
+    import main
+
+    print("Testing the import byte budget with plain PDF uploads...")
+    pdf = make_pdf(1, SUMMARY)
+    previous = bulk_import.MAX_UNZIPPED_BYTES
+    bulk_import.MAX_UNZIPPED_BYTES = 2 * len(pdf) + 10
+    try:
+        client = TestClient(main.app)
+        files = [("files", (f"p{i}.pdf", pdf, "application/pdf")) for i in range(3)]
+        assert client.post("/import_docs", files=files).status_code == 413
+        response = client.post("/import_docs", files=files[:2])
+        assert response.status_code == 200
+        assert '"type": "summary"' in response.text.strip().splitlines()[-1]
+    finally:
+        bulk_import.MAX_UNZIPPED_BYTES = previous
+        pdf_extract.shutdown()
+    print("- Third PDF over the budget rejected with 413, two within it streamed to the summary: OK")
+
+if __name__ == "__main__":
+    test_expand_zip()
+    test_corrupt_zip_member()
+    test_expand_zip_limits()
+    test_to_patient()
+    test_extract_documents_parallel()
+    test_import_byte_budget_counts_plain_pdfs()
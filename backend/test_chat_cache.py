@@ -0,0 +1,77 @@
+import time
+from chat_cache import ChatResponseCache
+
+def test_exact_and_normalized_hits():
+    cache = ChatResponseCache()
+    print("Testing exact / normalized lookups...")
+    assert cache.get("I have a fever", []) is None
+    cache.put("I have a fever", [], "How high is it?")
+    assert cache.get("i have a FEVER!!", []) == "How high is it?"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    print("- Normalized hit: OK")
+
+    # Same message, different conversation state -> different entry
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    assert cache.get("I have a fever", history) is None
+    print("- Conversation fingerprint respected: OK")
+
+def test_similarity_lookup():
+    cache = ChatResponseCache(similarity_threshold=0.8, use_similarity=True)
+    cache.put("I have a headache since morning", [], "On a scale of 1 to 10...")
+    print("Testing similarity lookup...")
+    assert cache.get("i have a headache since this morning", []) == "On a scale of 1 to 10..."
+    assert cache.stats()["similar_hits"] == 1
+    assert cache.get("I have a rash on my arm", []) is None
+    print("- Near-duplicate hit, unrelated miss: OK")
+
+    cache.put("I have a fever", [], "How high is it?")
+    assert cache.get("I don't have a fever", []) is None
+    print("- Negated message never matches: OK")
+
+    cache.put("I have a fever of 38.1 degrees since yesterday", [], "Rest and fluids...")
+    cache.put("My 30 year old husband has a cough", [], "How long has he had it?")
+    assert cache.get("I have a fever of 40.1 degrees since yesterday", []) is None
+    assert cache.get("My 80 year old husband has a cough", []) is None
+    assert cache.get("i have a fever of 38.1 degrees since yesterday!", []) == "Rest and fluids..."
+    print("- Different numbers never match: OK")
+
+    exact_only = ChatResponseCache()  # similarity is off by default
+    exact_only.put("I have a headache since morning", [], "reply")
+    assert exact_only.get("i have a headache since this morning", []) is None
+    print("- Similarity off by default: OK")
+
+def test_emergency_bypass():
+    cache = ChatResponseCache()
+    print("Testing emergency bypass...")
+    cache.put("I have chest pain", [], "canned reply")
+    assert cache.stats()["size"] == 0
+    assert cache.get("I have chest pain", []) is None
+    assert cache.stats()["bypassed_emergency"] == 1
+    print("- Emergency messages never cached or served: OK")
+
+def test_lru_and_ttl():
+    print("Testing LRU eviction...")
+    cache = ChatResponseCache(max_entries=2, use_similarity=False)
+    cache.put("hello", [], "a")
+    cache.put("good morning", [], "b")
+    cache.get("hello", [])           # 'hello' becomes most recently used
+    cache.put("thanks bye", [], "c")  # evicts 'good morning'
+    assert cache.get("good morning", []) is None
+    assert cache.get("hello", []) == "a"
+    assert cache.stats()["evictions"] == 1
+    print("- Least recently used entry evicted: OK")
+
+    print("Testing TTL...")
+    cache = ChatResponseCache(ttl=0.05)
+    cache.put("hello", [], "a")
+    time.sleep(0.1)
+    assert cache.get("hello", []) is None
+    assert cache.stats()["expirations"] == 1
+    print("- Expired entry dropped: OK")
+
+if __name__ == "__main__":
+    test_exact_and_normalized_hits()
+    test_similarity_lookup()
+    test_emergency_bypass()
+    test_lru_and_ttl()
+    print("\nAll Tests Passed!")
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from ollama_client import OllamaClient, OllamaError
+
+# --- Fake Ollama server (same /api/chat wire format, no model needed) ---
+
+fake_ollama = FastAPI()
+TOKENS = ["Hello", "!", " How", " can", " I", " help", "?"]
+TOKEN_DELAY = 0.05
+
+@fake_ollama.post("/api/chat")
+async def fake_chat(request: Request):
+    payload = await request.json()
+    if payload["model"] == "missing-model":
+        return StreamingResponse(iter([json.dumps({"error": "model 'missing-model' not found"})]), status_code=404)
+
+    if not payload["stream"]:
+        await asyncio.sleep(TOKEN_DELAY * len(TOKENS))
+        return {"message": {"role": "assistant", "content": "".join(TOKENS)}, "done": True}
+
+    async def generate():
+        for i, token in enumerate(TOKENS):
+            await asyncio.sleep(TOKEN_DELAY)
+            if payload["model"] == "garbled" and i == 2:
+                yield '{"message": {"role": "assis\n'  # a broken line between two good ones
+            yield json.dumps({"message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+        if payload["model"] != "truncated":
+            yield json.dumps({"message": {"role": "assistant", "content": ""}, "done": True}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_fake_ollama():
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(fake_ollama, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+def test_ollama_client():
+    server, url = start_fake_ollama()
+    try:
+        async def run():
+            client = OllamaClient(base_url=url)
+
+            print("Testing non-streaming chat...")
+            assert await client.chat(MESSAGES) == "".join(TOKENS)
+            print("- Full reply: OK")
+
+            print("\nTesting token streaming...")
+            start = time.perf_counter()
+            first_token_at = None
+            received = []
+            async for token in client.stream_chat(MESSAGES):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - start
+                received.append(token)
+            total = time.perf_counter() - start
+            assert received == TOKENS
+            # First token arrives long before the full generation finishes
+            assert first_token_at < total / 2
+            print(f"- First token after {first_token_at * 1000:.0f} ms, full reply after {total * 1000:.0f} ms: OK")
+
+            print("\nTesting concurrent chats over the shared pool...")
+            start = time.perf_counter()
+            replies = await asyncio.gather(*[client.chat(MESSAGES) for _ in range(30)])
+            elapsed = time.perf_counter() - start
+            assert all(r == "".join(TOKENS) for r in replies)
+            # 30 chats run concurrently: ~1 generation time, not 30x
+            assert elapsed < TOKEN_DELAY * len(TOKENS) * 5
+            print(f"- 30 concurrent chats in {elapsed * 1000:.0f} ms: OK")
+
+            print("\nTesting API errors...")
+            try:
+                await OllamaClient(base_url=url, model="missing-model").chat(MESSAGES)
+                assert False, "expected OllamaError"
+            except OllamaError as e:
+                assert "not found" in str(e)
+            print("- Ollama error surfaced: OK")
+
+            print("\nTesting malformed and truncated streams...")
+            garbled = OllamaClient(base_url=url, model="garbled")
+            assert [t async for t in garbled.stream_chat(MESSAGES)] == TOKENS
+            try:
+                [t async for t in OllamaClient(base_url=url, model="truncated").stream_chat(MESSAGES)]
+                assert False, "expected OllamaError"
+            except OllamaError as e:
+                assert "before it was complete" in str(e)
+            print("- Malformed line skipped, stream without done reported: OK")
+
+            print("\nTesting connection failure...")
+            try:
+                await OllamaClient(base_url=f"http://127.0.0.1:{free_port()}", connect_timeout=1).chat(MESSAGES)
+                assert False, "expected connection error"
+            except httpx.HTTPError:
+                pass
+            print("- Connection error raised: OK")
+
+            await client.aclose()
+
+        asyncio.run(run())
+    finally:
+        server.should_exit = True
+
+def test_chat_stream_endpoint():
+    import main
+
+    server, url = start_fake_ollama()
+    try:
+        async def run():
+            main.ollama = OllamaClient(base_url=url)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                print("Testing /chat/stream (SSE)...")
+                events = []
+                async with client.stream("POST", "/chat/stream", json={"message": "Hi", "history": []}) as response:
+                    assert response.headers["content-type"].startswith("text/event-stream")
+                    async for line in response.aiter_lines():
+                        if line.startswith("data: "):
+                            events.append(json.loads(line[len("data: "):]))
+                assert [e["token"] for e in events if "token" in e] == TOKENS
+                assert events[-1] == {"done": True, "response": "".join(TOKENS)}
+                print("- Tokens streamed as SSE: OK")
+
+                print("\nTesting /chat (async, non-streaming)...")
+                response = await client.post("/chat", json={"message": "Good morning", "history": []})
+                assert response.json() == {"response": "".join(TOKENS)}
+                print("- Full reply: OK")
+
+                # The streamed reply above was cached
+                response = await client.post("/chat", json={"message": "hi!", "history": []})
+                assert response.json() == {"response": "".join(TOKENS), "cached": True}
+                print("- Served from the reply cache: OK")
+            await main.ollama.aclose()
+
+        asyncio.run(run())
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    test_ollama_client()
+    test_chat_stream_endpoint()
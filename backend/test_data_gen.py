@@ -0,0 +1,75 @@
+import filecmp
+import os
+import tempfile
+import uuid
+import numpy as np
+import pandas as pd
+from data_gen import COLUMNS, SCENARIOS, generate_chunk, generate_patient_data, generate_patient_frame, write_patient_data
+
+def test_vectorized_matches_generator_schema_and_logic():
+    print("Testing vectorized chunks against the row-by-row generator...")
+    legacy = generate_patient_data(300)
+    df = generate_chunk(20000, 1)
+    assert list(df.columns) == list(legacy.columns)
+    assert (df.dtypes == legacy.dtypes).all()
+    assert all(str(uuid.UUID(u)) == u and uuid.UUID(u).version == 4 for u in df['Patient_ID'].head(1000))
+    assert df['Patient_ID'].is_unique
+    print("- Same columns and dtypes, valid UUID4 ids: OK")
+
+    # Scenario-conditional vitals, labels and symptoms, as in generate_patient_data
+    for name, risk, dept, symptoms, overrides in SCENARIOS:
+        rows = df[df['Symptoms'] == ', '.join(symptoms)]
+        assert len(rows) > 1500, name  # ~1/9 of the rows each
+        assert set(rows['Risk_Level']) == {risk} and set(rows['Department']) == {dept}
+        for column, (lo, hi) in overrides.items():
+            assert rows[column].between(lo, hi).all(), (name, column)
+    normal = df[~df['Symptoms'].isin([', '.join(SCENARIOS[k][3]) for k in (0, 1, 2, 3, 7)])]
+    assert normal['O2_Saturation'].between(95, 99).all() and normal['Temperature'].between(36.1, 37.5).all()
+    hypertensive = df['Chronic_Conditions'].str.contains('Hypertension')
+    assert (df.loc[hypertensive, 'Age'] > 40).all() and (df.loc[df['Chronic_Conditions'] == 'Arthritis', 'Age'] > 60).all()
+    assert (df.loc[hypertensive & (df['Symptoms'] == 'Deep Cut, Bleeding, Pain'), 'BP_Systolic'] >= 100).all()
+    fever = df[df['Medical_Notes'].str.contains('Fever spiked to')]
+    assert len(fever) and (fever['Medical_Notes'] == [f"Complains of {s}. Fever spiked to {t}. ruling out sepsis."
+                                                     for s, t in zip(fever['Symptoms'], fever['Temperature'])]).all()
+    shares = df['Risk_Level'].value_counts(normalize=True)
+    assert np.allclose(shares[['High', 'Medium', 'Low']], [0.34, 0.33, 0.33], atol=0.02)
+    print("- Scenario vitals, chronic conditions, notes and label balance: OK")
+
+def test_deterministic_streamed_output():
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Testing chunked, multi-process output...")
+        paths = {}
+        for workers in (1, 2):
+            paths[workers] = os.path.join(tmp, f'w{workers}.csv')
+            assert write_patient_data(paths[workers], 25000, seed=7, workers=workers, chunk_size=4000) == 25000
+        assert filecmp.cmp(paths[1], paths[2], shallow=False)
+        print("- Same seed: identical file with 1 and 2 workers: OK")
+
+        df = pd.read_csv(paths[2], keep_default_na=False)
+        assert len(df) == 25000 and df['Patient_ID'].is_unique
+        expected = generate_patient_frame(25000, seed=7, chunk_size=4000)
+        assert (df['Medical_Notes'] == expected['Medical_Notes']).all() and (df['Age'] == expected['Age']).all()
+        other = os.path.join(tmp, 'other.csv')
+        write_patient_data(other, 25000, seed=8, workers=2, chunk_size=4000)
+        assert not filecmp.cmp(paths[1], other, shallow=False)
+        assert not os.path.exists(paths[1] + '.tmp')
+        print("- Matches the in-memory frame, other seeds differ: OK")
+
+def test_zero_rows_keep_the_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Testing an empty dataset...")
+        path = os.path.join(tmp, 'empty.csv')
+        assert write_patient_data(path, 0) == 0
+        df = pd.read_csv(path)
+        assert list(df.columns) == COLUMNS and len(df) == 0
+        try:
+            write_patient_data(path, -1)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        print("- Header only for 0 rows, negative counts rejected: OK")
+
+if __name__ == "__main__":
+    test_vectorized_matches_generator_schema_and_logic()
+    test_deterministic_streamed_output()
+    test_zero_rows_keep_the_header()
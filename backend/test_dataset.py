@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from dataset import PatientDataset
+from population import PopulationStats
+
+def test_dataset_cache():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'patients.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        raw = pd.read_csv('patients_dataset.csv')
+        raw.iloc[:1000].to_csv(path, index=False)
+
+        print("Testing typed columnar load...")
+        dataset = PatientDataset(path, cache_dir=cache_dir)
+        frame = dataset.frame
+        assert len(frame) == 1000
+        assert str(frame['Age'].dtype) == 'int16'
+        assert str(frame['Gender'].dtype) == 'category'
+        assert str(frame['Risk_Level'].dtype) == 'category'
+        assert (frame['Temperature'].to_numpy() == raw['Temperature'].iloc[:1000].to_numpy()).all()
+        print("- Numerics fixed-width, labels categorical: OK")
+
+        # Notes: offsets + one UTF-8 buffer, memory-mapped, decoded per row
+        notes = dataset.texts['Medical_Notes']
+        assert 'Medical_Notes' not in frame.columns and isinstance(notes.buffer, np.memmap)
+        assert notes.take([0, 999]) == raw['Medical_Notes'].iloc[[0, 999]].tolist()
+        assert notes.buffer.nbytes == sum(len(n.encode()) for n in raw['Medical_Notes'].iloc[:1000])
+        assert list(frame['Patient_ID']) == raw['Patient_ID'].iloc[:1000].tolist()
+        print("- Free text as offsets + flat buffer: OK")
+
+        print("\nTesting the binary cache...")
+        assert len(os.listdir(cache_dir)) == 1
+        # Someone else's entry in a shared cache dir
+        os.makedirs(os.path.join(cache_dir, 'unrelated'))
+        cached = PatientDataset(path, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(cached.frame, frame)
+        assert cached.texts['Medical_Notes'].take(range(1000)) == notes.take(range(1000))
+        print("- Second start reads the cache, same frame: OK")
+
+        print("\nTesting append detection...")
+        population = PopulationStats(dataset.frame)
+        dataset.on_change(population.sync)
+        calls = []
+        dataset.on_change(lambda ds, appended_from: calls.append(appended_from))
+        raw.iloc[:1500].to_csv(path, index=False)
+        os.utime(path, ns=(dataset.mtime + 10**9, dataset.mtime + 10**9))
+        assert dataset.refresh()
+        assert calls == [1000]
+        assert population.rows == 1500 and population.index.size == 1500
+        assert not dataset.refresh()
+        # Our old cache replaced, not accumulated; other entries left alone
+        assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(dataset._cache_path(*dataset._stat())), 'unrelated'])
+        print("- Appended rows merged, stale cache dropped: OK")
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    test_dataset_cache()
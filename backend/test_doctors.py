@@ -0,0 +1,82 @@
+import threading
+from doctors import DoctorRegistry
+
+ROSTER = [
+    {"id": f"cardio_{i}", "name": f"Dr. Cardio {i}", "dept": "Cardiology", "status": "Available", "spec": "Cardiology"}
+    for i in range(5)
+] + [
+    {"id": f"gm_{i}", "name": f"Dr. General {i}", "dept": "General Medicine", "status": "Available", "spec": "Internal Medicine"}
+    for i in range(3)
+]
+
+def run_threads(n, target):
+    barrier = threading.Barrier(n)
+    def worker(k):
+        barrier.wait()  # start everyone at once
+        target(k)
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def test_no_double_booking():
+    print("Testing simultaneous High-risk arrivals...")
+    for _ in range(20):
+        registry = DoctorRegistry(ROSTER, seed=0)
+        taken = []
+        lock = threading.Lock()
+        def arrive(k):
+            doc, from_pool = registry.acquire("Cardiology", "High" if k % 2 else "Medium")
+            if from_pool:
+                with lock:
+                    taken.append(doc['id'])
+        run_threads(32, arrive)
+        # Each Available cardiologist handed out exactly once
+        assert sorted(taken) == sorted(d['id'] for d in ROSTER if d['dept'] == "Cardiology")
+        stats = registry.department_stats()["Cardiology"]
+        assert stats["available"] == 0 and stats["total"] == 5
+    print("- 32 concurrent arrivals x 20 rounds, 5 doctors, no double booking: OK")
+
+    print("\nTesting concurrent acquire / release churn...")
+    registry = DoctorRegistry(ROSTER, seed=1)
+    holders = {}
+    lock = threading.Lock()
+    errors = []
+    def churn(k):
+        for _ in range(500):
+            doc, from_pool = registry.acquire("Cardiology", "High")
+            if not from_pool:
+                continue
+            with lock:
+                if doc['id'] in holders:
+                    errors.append(doc['id'])
+                holders[doc['id']] = k
+            with lock:
+                del holders[doc['id']]
+            registry.release(doc['id'])
+    run_threads(16, churn)
+    assert not errors
+    stats = registry.department_stats()
+    assert stats["Cardiology"]["available"] == 5
+    assert sum(1 for d in registry.grouped()["Cardiology"] if d['status'] == 'Available') == 5
+    print("- 16 threads x 500 acquire/release, no doctor held twice, stats consistent: OK")
+
+def test_fallback_and_toggle():
+    registry = DoctorRegistry(ROSTER, seed=0)
+    print("Testing fallback department and manual toggles...")
+    assert registry.assign("Dermatology", "Low")['dept'] == "General Medicine"
+    registry.set_status_by_name("Dr. General 0", "Busy")
+    assert registry.department_stats()["General Medicine"]["available"] == 2
+    registry.reset()
+    assert registry.department_stats()["General Medicine"]["available"] == 3
+    try:
+        registry.set_status_by_name("Dr. Nobody", "Busy")
+        assert False, "expected KeyError"
+    except KeyError:
+        pass
+    print("- Fallback to General Medicine, incremental stats: OK")
+
+if __name__ == "__main__":
+    test_no_double_booking()
+    test_fallback_and_toggle()
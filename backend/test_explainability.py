@@ -1,4 +1,5 @@
-from explainability import ExplainabilityEngine
+import numpy as np
+from explainability import ExplainabilityEngine, HYPOXIA, BRADYCARDIA
 
 def test_explainability():
     engine = ExplainabilityEngine()
@@ -33,5 +34,40 @@ def test_explainability():
 
     print("\nAll Tests Passed!")
 
+def test_zero_values():
+    engine = ExplainabilityEngine()
+
+    print("Testing zero readings are not skipped...")
+    anomalies = engine.detect_anomalies({'Heart_Rate': 0, 'O2_Saturation': 0}, [])
+    assert "CRITICAL: Bradycardia (0 bpm)" in anomalies
+    assert "Hypoxia Alert (O2 0%)" in anomalies
+    codes = engine.detect_anomalies_batch({'Heart_Rate': [0], 'Temperature': [37.0], 'O2_Saturation': [0], 'BP_Systolic': [120]})
+    assert codes[0] == BRADYCARDIA | HYPOXIA
+    print("- Zero HR / O2 flagged: OK")
+
+def test_batch_matches_scalar():
+    engine = ExplainabilityEngine()
+    rng = np.random.default_rng(0)
+    n = 5000
+    vitals = {
+        'Heart_Rate': rng.integers(30, 200, n),
+        'Temperature': rng.integers(340, 415, n) / 10,
+        'O2_Saturation': rng.integers(80, 101, n),
+        'BP_Systolic': rng.integers(70, 200, n),
+    }
+    previous = {'Heart_Rate': rng.integers(30, 200, n), 'O2_Saturation': rng.integers(80, 101, n)}
+
+    print("Testing batch codes against the scalar API...")
+    codes = engine.detect_anomalies_batch(vitals, previous)
+    for i in range(n):
+        current = {k: v[i].item() for k, v in vitals.items()}
+        prev = {k: v[i].item() for k, v in previous.items()}
+        expected = engine.detect_anomalies(current, [prev, prev])
+        assert (codes[i] != 0) == bool(expected)
+        assert engine.describe_anomalies(int(codes[i]), current, prev) == expected
+    print(f"- {n} patients, {int((codes != 0).sum())} flagged, same strings: OK")
+
 if __name__ == "__main__":
     test_explainability()
+    test_zero_values()
+    test_batch_matches_scalar()
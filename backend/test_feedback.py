@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from feedback import FEATURES, FeedbackLog, Retrainer, retrain
+from model_bundle import list_versions, load_engine, read_manifest
+from model_registry import ModelRegistry
+
+def make_env(tmp):
+    model_dir = os.path.join(tmp, 'models')
+    shutil.copytree(os.path.join('models', 'v1'), os.path.join(model_dir, 'v1'))
+    return model_dir, FeedbackLog(os.path.join(tmp, 'feedback', 'feedback.jsonl'), batch_size=10)
+
+def add_dataset_rows(log, rows, relabel=None):
+    for record in rows.to_dict('records'):
+        log.record({f: record[f] for f in FEATURES}, relabel or record['Risk_Level'], record['Department'])
+
+def test_batched_append_only_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = FeedbackLog(os.path.join(tmp, 'f', 'log.jsonl'), batch_size=4)
+        print("Testing batched feedback log...")
+        for i in range(6):
+            log.record({'Age': i, 'Gender': 'Male'}, 'High', None)
+        assert log.count == 4 and log.total == 6  # one batch written, two buffered
+        log.flush()
+        with open(log.path, 'a') as f:
+            f.write('{"torn": ')  # crash mid-write
+        records = FeedbackLog(log.path).read()
+        assert [r['features']['Age'] for r in records] == list(range(6))
+        assert records[0]['Department'] is None and records[0]['features']['Symptoms'] is None
+        assert [r['features']['Age'] for r in log.read(2, 4)] == [2, 3]
+        print("- Batches of 4, readable after reopen, torn tail skipped: OK")
+
+def test_retrain_publishes_or_rejects():
+    data = pd.read_csv('patients_dataset.csv')
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir, log = make_env(tmp)
+        print("Testing warm-start retraining on confirmed labels...")
+        add_dataset_rows(log, data.sample(150, random_state=1))
+        log.flush()
+        result = retrain(log.path, 0, log.count, model_dir, 'v1', 'patients_dataset.csv', rounds=5)
+        assert result['status'] == 'published', result
+        assert list_versions(model_dir) == ['v1', 'v2']
+        manifest = read_manifest(os.path.join(model_dir, 'v2'))
+        assert manifest['parent'] == 'v1' and manifest['feedback']['records'] == [0, 150]
+        base, candidate = load_engine(os.path.join(model_dir, 'v1')), load_engine(os.path.join(model_dir, 'v2'))
+        assert candidate.risk_booster.num_boosted_rounds() == base.risk_booster.num_boosted_rounds() + 5
+        print(f"- Published v2 (+5 trees per head), metrics: {result['metrics']['risk']}")
+
+        print("Testing the regression gate...")
+        start = log.count
+        add_dataset_rows(log, data[data['Risk_Level'] == 'High'].sample(150, random_state=2), relabel='Low')
+        log.flush()
+        # The bundle is too confident on this data for a few rounds to flip it, so demand a strict
+        # improvement (negative tolerance): an unchanged score must count as a regression
+        result = retrain(log.path, start, log.count, model_dir, 'v2', 'patients_dataset.csv', rounds=5, tolerance=-0.01)
+        assert result['status'] == 'rejected', result
+        assert list_versions(model_dir) == ['v1', 'v2']
+        print(f"- Mislabelled batch rejected ({result['detail']}): OK")
+
+def test_retrainer_runs_in_separate_process():
+    data = pd.read_csv('patients_dataset.csv')
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir, log = make_env(tmp)
+        registry = ModelRegistry(model_dir)
+        registry.get()
+        published = []
+        retrainer = Retrainer(log, model_dir, 'patients_dataset.csv', threshold=50, on_publish=published.append,
+                              base_version=lambda: registry.active.version)
+        print("Testing threshold-triggered background retraining...")
+        add_dataset_rows(log, data.sample(40, random_state=3))
+        assert not retrainer.maybe_start() and retrainer.pending == 40
+        add_dataset_rows(log, data.sample(20, random_state=4))
+        start = time.perf_counter()
+        assert retrainer.maybe_start()
+        assert time.perf_counter() - start < 0.5  # returns right away, the job runs elsewhere
+        assert not retrainer.maybe_start(force=True)  # one job at a time
+        retrainer.future.result(timeout=120)
+        time.sleep(0.1)  # done-callback
+        status = retrainer.status()
+        assert status['last_result']['status'] == 'published' and status['pending'] == 0
+        assert published and published[0]['version'] == 'v2'
+        # Published is not promoted: v1 still serves and hasn't seen any feedback
+        assert status['base_version'] == 'v1' and status['trained_through'] == 0
+        print("- Started at the threshold, ran in a worker process, published v2: OK")
+
+        print("Testing that unpromoted candidates don't chain...")
+        add_dataset_rows(log, data.sample(10, random_state=5))
+        assert retrainer.maybe_start(force=True)
+        retrainer.future.result(timeout=120)
+        time.sleep(0.1)
+        manifest = read_manifest(os.path.join(model_dir, 'v3'))
+        assert manifest['parent'] == 'v1' and manifest['feedback']['records'] == [0, 70]
+        registry.activate('v3')
+        retrainer.shutdown()
+        assert retrainer.status()['trained_through'] == 70
+        # Without a base_version callable the ACTIVE pointer names the serving bundle
+        status = Retrainer(FeedbackLog(log.path), model_dir, 'patients_dataset.csv').status()
+        assert status['base_version'] == 'v3' and status['trained_through'] == 70 and status['pending'] == 0
+        print("- v3 warm-started from the serving v1 on all 70 records, promoted v3 trained through 70: OK")
+
+if __name__ == "__main__":
+    test_batched_append_only_log()
+    test_retrain_publishes_or_rejects()
+    test_retrainer_runs_in_separate_process()
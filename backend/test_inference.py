@@ -0,0 +1,87 @@
+import joblib
+import tempfile
+import numpy as np
+import pandas as pd
+from inference import TriageEngine
+from model import export_bundle
+from model_bundle import load_engine, list_versions
+
+def test_fused_engine_matches_pipelines():
+    risk_model = joblib.load('risk_model.joblib')
+    dept_model = joblib.load('dept_model.joblib')
+    risk_le = joblib.load('risk_le.joblib')
+    dept_le = joblib.load('dept_le.joblib')
+    engine = TriageEngine.from_pipelines(risk_model, dept_model, risk_le, dept_le)
+
+    df = pd.read_csv('patients_dataset.csv').head(200)
+    X = df[['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']]
+
+    print("Testing fused prediction against the sklearn pipelines...")
+    prediction = engine.predict(X)
+    assert np.allclose(prediction["risk_proba"], risk_model.predict_proba(X), atol=1e-6)
+    assert np.allclose(prediction["dept_proba"], dept_model.predict_proba(X), atol=1e-6)
+    assert list(prediction["risk"]) == list(risk_le.inverse_transform(risk_model.predict(X)))
+    assert list(prediction["dept"]) == list(dept_le.inverse_transform(dept_model.predict(X)))
+    print("- Risk & Department predictions match: OK")
+
+    # Both boosters must be fed from a single transform
+    assert engine.dept_preprocessor is None
+    print("- Shared preprocessor: OK")
+
+def test_contribution_explanations():
+    risk_model = joblib.load('risk_model.joblib')
+    dept_model = joblib.load('dept_model.joblib')
+    engine = TriageEngine.from_pipelines(risk_model, dept_model, joblib.load('risk_le.joblib'), joblib.load('dept_le.joblib'))
+
+    print("Testing feature map...")
+    fmap = engine.feature_map
+    assert fmap.fields == ['Age', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Gender', 'Symptoms', 'Medical_Notes']
+    assert len(fmap.feature_field) == len(risk_model.named_steps['preprocessor'].get_feature_names_out())
+    print("- Expanded features grouped to source fields: OK")
+
+    print("\nTesting per-patient explanations...")
+    X = pd.DataFrame([
+        {'Age': 70, 'Gender': 'Male', 'BP_Systolic': 120, 'BP_Diastolic': 80, 'Heart_Rate': 72, 'Temperature': 37.0,
+         'O2_Saturation': 80, 'Symptoms': 'Severe Difficulty Breathing, Cyanosis', 'Medical_Notes': ''},
+        {'Age': 30, 'Gender': 'Female', 'BP_Systolic': 120, 'BP_Diastolic': 80, 'Heart_Rate': 72, 'Temperature': 37.0,
+         'O2_Saturation': 98, 'Symptoms': 'Routine Checkup', 'Medical_Notes': 'Routine checkup. Vitals stable.'},
+    ])
+    prediction = engine.predict(X)
+    explanations = prediction["explanation"]
+    assert len(explanations) == 2
+    assert all(1 <= len(e) <= 3 for e in explanations)
+    # Explanations are per patient, not one global ranking
+    assert explanations[0] != explanations[1]
+    assert "O2 Saturation (80%)" in explanations[0]
+    print(f"- Explanations: {explanations}: OK")
+
+def test_bundle_roundtrip():
+    risk_model = joblib.load('risk_model.joblib')
+    dept_model = joblib.load('dept_model.joblib')
+    reference = TriageEngine.from_pipelines(risk_model, dept_model, joblib.load('risk_le.joblib'), joblib.load('dept_le.joblib'))
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        print("Testing bundle export...")
+        export_bundle(model_dir=model_dir)
+        export_bundle(model_dir=model_dir)
+        assert list_versions(model_dir) == ['v1', 'v2']
+        print("- Versioned bundles written: OK")
+
+        print("\nTesting sklearn-free preprocessing and prediction...")
+        engine = load_engine(f"{model_dir}/v2")
+        df = pd.read_csv('patients_dataset.csv').head(500)
+        X = df[['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']]
+        assert abs(engine.transform(X) - reference.transform(X)).max() == 0
+        # Vocabulary lookups run on the memory-mapped arrays (shared between worker processes)
+        vocabularies = [b['vocabulary'] for b in engine.preprocessor.blocks if b['kind'] == 'ngram']
+        assert vocabularies and all(isinstance(v, np.memmap) for v in vocabularies)
+        ours, theirs = engine.predict(X), reference.predict(X)
+        assert np.allclose(ours["risk_proba"], theirs["risk_proba"])
+        assert list(ours["dept"]) == list(theirs["dept"])
+        assert ours["explanation"] == theirs["explanation"]
+        print("- Bundle engine matches the joblib pipelines: OK")
+
+if __name__ == "__main__":
+    test_fused_engine_matches_pipelines()
+    test_contribution_explanations()
+    test_bundle_roundtrip()
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from model_registry import ModelRegistry
+
+FEATURES = ['Age', 'Gender', 'BP_Systolic', 'BP_Diastolic', 'Heart_Rate', 'Temperature', 'O2_Saturation', 'Symptoms', 'Medical_Notes']
+
+def make_model_dir(tmp):
+    """models/v1 plus a v2 with a one-tree risk booster and its risk classes reversed (so the two disagree)"""
+    model_dir = os.path.join(tmp, 'models')
+    shutil.copytree(os.path.join('models', 'v1'), os.path.join(model_dir, 'v1'))
+    shutil.copytree(os.path.join(model_dir, 'v1'), os.path.join(model_dir, 'v2'))
+    booster = xgb.Booster(model_file=os.path.join(model_dir, 'v2', 'risk.ubj'))
+    booster[:1].save_model(os.path.join(model_dir, 'v2', 'risk.ubj'))
+    with open(os.path.join(model_dir, 'v2', 'manifest.json')) as f:
+        manifest = json.load(f)
+    with open(os.path.join(model_dir, 'v2', 'manifest.json'), 'w') as f:
+        manifest['classes']['risk'] = manifest['classes']['risk'][::-1]
+        json.dump(dict(manifest, version='v2'), f)
+    return model_dir
+
+def sample(n, seed=0):
+    return pd.read_csv('patients_dataset.csv').sample(n, random_state=seed)[FEATURES].reset_index(drop=True)
+
+def test_activate_and_rollback():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = make_model_dir(tmp)
+        registry = ModelRegistry(model_dir)
+        print("Testing activation and rollback...")
+        assert registry.get().version == 'v2'  # newest by default
+        registry.activate('v1')
+        assert registry.active.version == 'v1' and registry.history == ['v2']
+        assert ModelRegistry(model_dir).get().version == 'v1'  # survives a restart
+        registry.rollback()
+        assert registry.active.version == 'v2' and registry.history == []
+        try:
+            registry.rollback()
+            assert False, "nothing left to roll back to"
+        except ValueError:
+            pass
+        print("- Activate v1, rollback to v2, pointer persisted: OK")
+
+        # A bundle that doesn't load leaves the serving model alone
+        shutil.copytree(os.path.join(model_dir, 'v1'), os.path.join(model_dir, 'v3'))
+        with open(os.path.join(model_dir, 'v3', 'risk.ubj'), 'wb') as f:
+            f.write(b'corrupt')
+        for version in ('v3', 'v9'):
+            try:
+                registry.activate(version)
+                assert False, f"{version} should not activate"
+            except Exception:
+                pass
+        assert registry.active.version == 'v2' and registry.history == []
+        print("- Broken and unknown versions rejected, v2 still serving: OK")
+
+def test_restart_after_candidate_published():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = make_model_dir(tmp)
+        shutil.rmtree(os.path.join(model_dir, 'v2'))
+        print("Testing a restart after a candidate is published on a fresh deployment...")
+        assert ModelRegistry(model_dir).get().version == 'v1'  # no ACTIVE pointer yet
+        shutil.copytree(os.path.join(model_dir, 'v1'), os.path.join(model_dir, 'v2'))  # retrainer publishes v2
+        assert ModelRegistry(model_dir).get().version == 'v1'
+        print("- First load persisted v1, the unpromoted v2 isn't served after the restart: OK")
+
+def test_swap_under_traffic():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = make_model_dir(tmp)
+        registry = ModelRegistry(model_dir)
+        batch = sample(50)
+        expected = {}
+        for version in ('v1', 'v2'):
+            registry.activate(version)
+            expected[version] = registry.active.predict(batch, explain=False)['risk_proba']
+        assert not np.allclose(expected['v1'], expected['v2'])
+
+        print("Testing swaps while requests are in flight...")
+        results, errors, stop = [], [], threading.Event()
+        def client():
+            while not stop.is_set():
+                try:
+                    engine = registry.get()  # what triage_batch does: one engine per request
+                    results.append((engine.version, engine.predict(batch, explain=False)['risk_proba']))
+                except Exception as e:
+                    errors.append(e)
+        threads = [threading.Thread(target=client) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for i in range(20):
+            registry.activate('v1' if i % 2 else 'v2')
+            time.sleep(0.01)
+        stop.set()
+        for t in threads:
+            t.join()
+        assert not errors, errors
+        assert {v for v, _ in results} == {'v1', 'v2'}
+        for version, proba in results:
+            assert np.allclose(proba, expected[version])  # each request saw one consistent model
+        print(f"- {len(results)} requests across 20 swaps, each fully served by one version: OK")
+
+def test_shadow_scoring():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = make_model_dir(tmp)
+        registry = ModelRegistry(model_dir)
+        active = registry.get()
+        print("Testing shadow scoring...")
+        registry.set_shadow('v1')
+        batches = [sample(100, seed) for seed in range(5)]
+        expected_risk = 0
+        for frame in batches:
+            prediction = active.predict(frame, explain=False)
+            expected_risk += int((prediction['risk'] != registry.shadow.predict(frame, explain=False)['risk']).sum())
+            start = time.perf_counter()
+            assert registry.submit_shadow(active, frame, prediction)
+            assert time.perf_counter() - start < 0.01  # only a queue put on the request path
+        registry.wait_for_shadow()
+        stats = registry.shadow_status()['stats']
+        assert stats['active_version'] == 'v2' and stats['shadow_version'] == 'v1'
+        assert stats['batches'] == 5 and stats['rows'] == 500 and stats['errors'] == 0
+        assert stats['risk_disagreement'] == round(expected_risk / 500, 4) and expected_risk > 0
+        assert sum(c['rows'] for c in stats['risk_changes']) == expected_risk
+        assert stats['dept_disagreement'] == 0.0  # same department booster
+        print(f"- Risk disagreement {stats['risk_disagreement']:.1%} over 500 rows, department 0%: OK")
+
+        registry.set_shadow('v1', sample_rate=0.0)
+        assert not registry.submit_shadow(active, batches[0], active.predict(batches[0], explain=False))
+        registry.activate('v1')  # promoting the candidate ends shadow mode
+        assert registry.shadow is None and registry.shadow_status()['enabled'] is False
+        print("- Sampling and promotion: OK")
+
+if __name__ == "__main__":
+    test_activate_and_rollback()
+    test_restart_after_candidate_published()
+    test_swap_under_traffic()
+    test_shadow_scoring()
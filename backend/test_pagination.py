@@ -0,0 +1,70 @@
+from bench_simulation import synthetic_patients
+from explainability import ExplainabilityEngine
+from pagination import PatientPages, SortIndex
+from simulation import VitalsSimulation
+
+def make_sim(n=2000, seed=1):
+    return VitalsSimulation(synthetic_patients(n, seed), seed=seed, explain_engine=ExplainabilityEngine())
+
+def walk(pages, sort, order=None, limit=97):
+    rows, cursor = pages.page(sort, order, limit)
+    out = list(rows)
+    while cursor:
+        rows, cursor = pages.page(sort, order, limit, cursor)
+        out.extend(rows)
+    return out
+
+def test_sort_index_update():
+    print("Testing SortIndex moves...")
+    index = SortIndex([5, 1, 3, 1])
+    assert list(index.page(10)[0]) == [1, 3, 2, 0]
+    index.update([3, 0], [9, 0])
+    assert list(index.page(10)[0]) == [0, 1, 2, 3]
+    assert list(index.page(10, descending=True)[0]) == [3, 2, 1, 0]
+    rows, last = index.page(2)
+    assert list(index.page(2, after=last)[0]) == [2, 3]
+    print("- Keys stay sorted after moving rows: OK")
+
+def test_pages_match_full_sort():
+    sim = make_sim()
+    pages = PatientPages(sim)
+    for _ in range(10):
+        pages.sync(sim.tick())
+    print("Testing paginated walks against a full sort...")
+    frame = sim.frame
+    age = frame['Age'].to_numpy()
+    assert walk(pages, 'age') == sorted(range(sim.n), key=lambda i: (age[i], i))
+    dept = frame['Department'].astype(str).to_numpy()
+    assert walk(pages, 'department') == sorted(range(sim.n), key=lambda i: (dept[i], i))
+
+    severity = {'Low': 0, 'Medium': 1, 'High': 2}
+    risk = [2 if sim.flagged[i] else severity[r] for i, r in enumerate(frame['Risk_Level'])]
+    assert walk(pages, 'risk') == sorted(range(sim.n), key=lambda i: (risk[i], i), reverse=True)
+    assert walk(pages, 'anomaly') == sorted(range(sim.n), key=lambda i: (sim.last_alert[i], i), reverse=True)
+    assert sim.last_alert.max() == sim.ticks
+    print(f"- risk / anomaly / department / age walks cover all {sim.n} patients in order: OK")
+
+def test_cursor_and_projection():
+    sim = make_sim(300)
+    pages = PatientPages(sim)
+    print("Testing cursor validation and field projection...")
+    rows, cursor = pages.page('age', limit=10)
+    try:
+        pages.page('risk', cursor=cursor)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    for bad in [dict(sort='name'), dict(order='sideways'), dict(cursor='not-a-cursor')]:
+        try:
+            pages.page(**bad)
+            assert False, f"expected ValueError for {bad}"
+        except ValueError:
+            pass
+    record = sim.records(rows[:1], fields={'Patient_ID', 'Heart_Rate'})[0]
+    assert set(record) == {'Patient_ID', 'Heart_Rate'}
+    print("- Foreign/bad cursors rejected, projection drops unrequested fields: OK")
+
+if __name__ == "__main__":
+    test_sort_index_update()
+    test_pages_match_full_sort()
+    test_cursor_and_projection()
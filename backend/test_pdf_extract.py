@@ -0,0 +1,156 @@
+import asyncio
+import time
+import pdf_extract
+from pdf_extract import PdfLimitError, extract_fields, extract_pdf, extract_pdf_async
+
+def make_pdf(pages, lines):
+    """Minimal multi-page PDF with the given text lines on every page (Helvetica)"""
+    stream = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+               f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"]
+    kids = []
+    for _ in range(pages):
+        objects.append("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       "/Resources << /Font << /F1 3 0 R >> >> /Contents 4 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+SUMMARY = ["Discharge summary", "Age: 67  Gender: Female", "BP: 150/95  HR: 104",
+           "Temp: 38.4  O2: 91"] + [f"Day {i}: patient stable, medication continued as per plan." for i in range(50)]
+
+def test_extract_fields():
+    print("Testing single-pass field extraction...")
+    data = extract_fields("age: 45 Gender: other gender: FEMALE BP: 130/85 BP: 1/2 HR: 99 Temp: 38.2 O2: 95 Age: 3")
+    assert data == {"Age": 45, "Gender": "FEMALE", "BP_Systolic": 130, "BP_Diastolic": 85,
+                    "Heart_Rate": 99, "Temperature": 38.2, "O2_Saturation": 95}
+    assert extract_fields("nothing here") == {}
+    print("- First occurrence of each field, case-insensitive: OK")
+
+def test_extract_pdf_and_limits():
+    print("Testing PDF extraction and limits...")
+    result = extract_pdf(make_pdf(3, SUMMARY))
+    assert result["extracted_data"]["Age"] == 67 and result["extracted_data"]["BP_Diastolic"] == 95
+    assert result["medical_notes"].count("Discharge summary") == 3
+    try:
+        extract_pdf(make_pdf(3, SUMMARY), max_pages=2)
+        assert False, "expected PdfLimitError"
+    except PdfLimitError:
+        pass
+    try:
+        asyncio.run(extract_pdf_async(b"x" * 100, max_bytes=10))
+        assert False, "expected PdfLimitError"
+    except PdfLimitError:
+        pass
+    print("- Fields from page text, page and size limits enforced: OK")
+
+async def tick_jitter(work, interval=0.05):
+    """Runs a 50 ms ticker (like the vitals loop) while `work` runs; returns (result, worst lateness)"""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst = max(worst, time.perf_counter() - start - interval)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    try:
+        result = await work()
+    finally:
+        done = True
+        await task
+    return result, worst
+
+def test_event_loop_jitter_200_pages():
+    content = make_pdf(200, SUMMARY)
+    print(f"Testing event loop jitter during a 200-page upload ({len(content) // 1024} KiB)...")
+
+    async def on_loop():
+        return extract_pdf(content)  # previous behaviour: parsing blocks the loop
+
+    async def scenario():
+        await extract_pdf_async(make_pdf(1, SUMMARY))  # start the worker processes first
+        _, blocked = await tick_jitter(on_loop)
+        result, jitter = await tick_jitter(lambda: extract_pdf_async(content))
+        return result, blocked, jitter
+
+    try:
+        result, blocked, jitter = asyncio.run(scenario())
+    finally:
+        pdf_extract.shutdown()
+    assert result["medical_notes"].count("Discharge summary") == 200
+    print(f"- Worst tick delay: {blocked * 1000:.0f} ms on the loop, {jitter * 1000:.0f} ms in the process pool")
+    assert jitter < 0.1 and jitter < blocked
+
+def test_timeout_kills_only_its_worker():
+    print("Testing timeout...")
+    content = make_pdf(200, SUMMARY)
+
+    async def scenario():
+        # Both workers busy: one parse times out, the other must still finish
+        slow = asyncio.ensure_future(extract_pdf_async(content, timeout=60))
+        await asyncio.sleep(0)
+        try:
+            await extract_pdf_async(content, timeout=0.01)
+            assert False, "expected TimeoutError"
+        except asyncio.TimeoutError:
+            pass
+        survived = await slow
+        return survived, await extract_pdf_async(make_pdf(1, SUMMARY))  # replacement worker
+
+    previous = pdf_extract.PDF_WORKERS
+    pdf_extract.PDF_WORKERS = 2
+    try:
+        survived, fresh = asyncio.run(scenario())
+    finally:
+        pdf_extract.shutdown()
+        pdf_extract.PDF_WORKERS = previous
+    assert survived["medical_notes"].count("Discharge summary") == 200
+    assert fresh["extracted_data"]["Heart_Rate"] == 104
+    print("- Timed-out parse killed, the other in-flight parse finished, next upload served: OK")
+
+def test_queued_documents_dont_time_out():
+    content = make_pdf(40, SUMMARY)
+    start = time.perf_counter()
+    extract_pdf(content)
+    single = time.perf_counter() - start
+    timeout = max(4 * single, 0.5)
+    docs = max(8, int(3 * timeout / single))
+    print(f"Testing {docs} documents on 1 worker ({single * 1000:.0f} ms each, timeout {timeout:.2f} s)...")
+
+    async def scenario():
+        return await asyncio.gather(*[extract_pdf_async(content, timeout=timeout) for _ in range(docs)],
+                                    return_exceptions=True)
+
+    previous = pdf_extract.PDF_WORKERS
+    pdf_extract.PDF_WORKERS = 1
+    pdf_extract.shutdown()
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        pdf_extract.shutdown()
+        pdf_extract.PDF_WORKERS = previous
+    failed = [r for r in results if isinstance(r, BaseException)]
+    assert not failed, f"{len(failed)} of {docs} failed: {failed[0]!r}"
+    print("- Timeout counted from when a worker picks the document up, none failed: OK")
+
+if __name__ == "__main__":
+    test_extract_fields()
+    test_extract_pdf_and_limits()
+    test_event_loop_jitter_200_pages()
+    test_timeout_kills_only_its_worker()
+    test_queued_documents_dont_time_out()
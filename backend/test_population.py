@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from population import PercentileIndex, VITALS, AGE_BINS, AGE_LABELS
+
+def scan_percentile(df, vital, value):
+    # The old O(N) implementation
+    return (df[vital] < value).mean() * 100
+
+def test_percentile_index():
+    df = pd.read_csv('patients_dataset.csv')
+    index = PercentileIndex.from_frame(df)
+    rng = np.random.default_rng(0)
+
+    print("Testing population percentiles against a full scan...")
+    for vital in VITALS:
+        for value in rng.choice(df[vital].to_numpy(), 20):
+            assert abs(index.percentile(vital, value) - scan_percentile(df, vital, value)) < 1e-9
+    print("- Population percentiles: OK")
+
+    print("\nTesting cohort percentiles...")
+    bands = pd.cut(df['Age'], bins=AGE_BINS, labels=AGE_LABELS)
+    cohort_df = df[(bands == '36-50') & (df['Gender'] == 'Male')]
+    cohort = int(index.cohort_codes([40], ['Male'])[0])
+    assert index.cohort_label(cohort) == "Male patients aged 36-50"
+    for value in [60, 90, 120, 150]:
+        assert abs(index.percentile('Heart_Rate', value, cohort=cohort) - scan_percentile(cohort_df, 'Heart_Rate', value)) < 1e-9
+    print("- Cohort percentiles: OK")
+
+    print("\nTesting incremental add...")
+    incremental = PercentileIndex.from_frame(df.iloc[:3000])
+    incremental.add(df.iloc[3000:])
+    for vital in VITALS:
+        assert np.array_equal(incremental.sorted[vital], index.sorted[vital])
+        assert np.array_equal(incremental.cohort_sorted[vital], index.cohort_sorted[vital])
+        assert np.array_equal(incremental.cohort_offsets[vital], index.cohort_offsets[vital])
+    print("- Incremental merge matches full rebuild: OK")
+
+if __name__ == "__main__":
+    test_percentile_index()
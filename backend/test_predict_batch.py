@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+import main
+
+base = {
+    'Age': 45,
+    'Gender': 'Male',
+    'BP_Systolic': 120,
+    'BP_Diastolic': 80,
+    'Heart_Rate': 72,
+    'Temperature': 37.0,
+    'O2_Saturation': 98,
+    'Symptoms': 'None',
+    'Medical_Notes': ''
+}
+
+def test_batch_order_and_per_item_errors():
+    client = TestClient(main.app)
+    print("Testing /predict_batch with a mixed batch...")
+    payload = [
+        dict(base, Symptoms='Severe Chest Pain, Sweating', BP_Systolic=160, Heart_Rate=110),
+        dict(base, Age='not a number'),  # Invalid record -> reported per item
+        dict(base, Symptoms='Rash, Itchiness'),
+        42,  # Not an object: an error at its index, not a 422 for the whole batch
+        dict(base, Symptoms='Slurred speech, facial droop'),
+    ]
+    response = client.post('/predict_batch', json=payload)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data['count'] == 5 and data['errors'] == 2
+    assert [r['index'] for r in data['results']] == list(range(5))
+    assert [r['status'] for r in data['results']] == ['ok', 'error', 'ok', 'error', 'ok']
+    assert [data['results'][i]['result']['Department'] for i in (0, 2, 4)] == ['Cardiology', 'Dermatology', 'Neurology']
+    assert 'Age' in data['results'][1]['detail'] and 'int' in data['results'][3]['detail']
+    print("- Results in input order, invalid items reported at their index: OK")
+
+if __name__ == "__main__":
+    test_batch_order_and_per_item_errors()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from explainability import ExplainabilityEngine
+from simulation import VitalsSimulation
+from subscriptions import Subscription, PatientIndex
+
+def test_subscription_slices():
+    df = pd.read_csv('patients_dataset.csv')
+    sim = VitalsSimulation(df, seed=3, explain_engine=ExplainabilityEngine())
+    index = PatientIndex(sim)
+
+    print("Testing index slices against a pandas filter...")
+    sub = Subscription.from_message({"type": "subscribe", "departments": ["Cardiology", "Neurology"]})
+    expected = df['Department'].isin(["Cardiology", "Neurology"]).to_numpy()
+    assert (index.mask(sub) == expected).all()
+    ids = df['Patient_ID'].iloc[[5, 10, 15]].tolist()
+    assert np.flatnonzero(index.mask(Subscription(patient_ids=ids))).tolist() == [5, 10, 15]
+    print("- Department / patient ID slices: OK")
+
+    for _ in range(5):
+        sim.tick()
+    records = sim.records()
+    live = pd.DataFrame(records)
+    sub = Subscription(departments=["Cardiology"], risk_levels=["High"])
+    expected = ((live['Department'] == "Cardiology") & (live['Risk_Level'] == "High")).to_numpy()
+    assert (index.mask(sub) == expected).all()
+    assert (index.mask(Subscription(anomalies_only=True)) == live['explanation'].map(bool).to_numpy()).all()
+    print("- Risk level (with safety override) / anomalies-only slices: OK")
+
+    print("\nTesting invalid subscriptions...")
+    for bad in ({"type": "subscribe", "department": ["Cardiology"]}, {"type": "subscribe", "risk_levels": "High"},
+                {"departments": [["Cardiology"]]}, {"risk_levels": [{}]}, {"patient_ids": [True]},
+                {"anomalies_only": "false"}, {"anomalies_only": 1}):
+        try:
+            Subscription.from_message(bad)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    assert Subscription(risk_levels=["High"]) == Subscription.from_message({"risk_levels": ["High"]})
+    assert Subscription.from_message({"patient_ids": [42, "a1"], "anomalies_only": False}).patient_ids == {"42", "a1"}
+    print("- Rejected, equal subscriptions share a key: OK")
+
+def test_subscribed_stream():
+    from fastapi.testclient import TestClient
+    import main
+
+    print("Testing /ws/vitals subscriptions...")
+    with TestClient(main.app) as client:
+        with client.websocket_connect('/ws/vitals?protocol=2') as ws:
+            assert ws.receive_json()["type"] == "snapshot"
+            ws.send_json({"type": "subscribe", "departments": ["General Medicine"], "risk_levels": ["Low"]})
+            frame = ws.receive_json()
+            while frame["type"] != "snapshot":
+                frame = ws.receive_json()
+            state = {p["Patient_ID"]: p for p in frame["patients"]}
+            assert state and len(state) <= 1044
+            assert all(p["Department"] == "General Medicine" and p["Risk_Level"] == "Low" for p in state.values())
+            print(f"- Snapshot narrowed to {len(state)} patients: OK")
+
+            frame = ws.receive_json()
+            assert frame["type"] == "delta"
+            assert all(p["Patient_ID"] in state for p in frame["patients"])
+            for pid in frame.get("removed", []):
+                assert pid in state
+            print("- Deltas only touch the slice: OK")
+
+            for bad in ({"type": "subscribe", "wards": ["ICU"]}, {"type": "subscribe", "departments": [["x"]]}):
+                ws.send_json(bad)
+                frame = ws.receive_json()
+                while frame["type"] != "error":
+                    frame = ws.receive_json()
+            # The socket is still alive
+            ws.send_json({"type": "resync"})
+            frame = ws.receive_json()
+            while frame["type"] != "snapshot":
+                frame = ws.receive_json()
+            print("- Bad subscriptions answered with error frames, socket kept: OK")
+
+if __name__ == "__main__":
+    test_subscription_slices()
+    test_subscribed_stream()
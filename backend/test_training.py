@@ -0,0 +1,46 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from inference import TriageEngine
+from model import FEATURES
+from training import train
+
+def test_cached_reproducible_training():
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, 'patients.csv')
+        pd.read_csv('patients_dataset.csv').head(1500).to_csv(data, index=False)
+        cache = os.path.join(tmp, 'cache')
+        params = {'learning_rate': 0.3}
+
+        print("Testing training driver (cache miss, then hit)...")
+        risk_a, dept_a, first = train(data, cache_dir=cache, params=params, rounds=200, save=False, verbose=False)
+        risk_b, dept_b, second = train(data, cache_dir=cache, params=params, rounds=200, save=False, verbose=False)
+        assert first['cache'] == 'miss' and second['cache'] == 'hit'
+        assert first['cache_key'] == second['cache_key']
+        assert 'vectorize' not in [s['stage'] for s in second['stages']]
+        assert all(s['seconds'] >= 0 and s['peak_rss_mb'] > 0 for s in second['stages'])
+
+        X = pd.read_csv(data).head(300)[FEATURES]
+        assert np.array_equal(risk_a.predict_proba(X), risk_b.predict_proba(X))
+        assert np.array_equal(dept_a.predict_proba(X), dept_b.predict_proba(X))
+        print("- Same cache key, vectorizing skipped, identical models: OK")
+
+        # Early-stopped boosters: inference must use the same trees as the sklearn wrapper
+        engine = TriageEngine.from_pipelines(risk_a, dept_a, *_encoders(data))
+        assert np.allclose(engine.predict(X)["risk_proba"], risk_a.predict_proba(X), atol=1e-6)
+        assert engine.risk_booster.num_boosted_rounds() == first['heads']['risk']['best_iteration'] + 1
+        print(f"- Early stopping at {first['heads']['risk']['best_iteration'] + 1}/200 trees, "
+              "trimmed booster matches: OK")
+
+        # Different data, different key
+        pd.read_csv(data).head(1400).to_csv(data, index=False)
+        assert train(data, cache_dir=cache, params=params, rounds=200, save=False, verbose=False)[2]['cache'] == 'miss'
+
+def _encoders(data):
+    from sklearn.preprocessing import LabelEncoder
+    df = pd.read_csv(data)
+    return LabelEncoder().fit(df['Risk_Level']), LabelEncoder().fit(df['Department'])
+
+if __name__ == "__main__":
+    test_cached_reproducible_training()
@@ -0,0 +1,113 @@
+import time
+from triage_queue import TriageQueue, RISK_PRIORITY
+
+class FakeClock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+def test_risk_order():
+    clock = FakeClock()
+    queue = TriageQueue(clock)
+    print("Testing risk ordering...")
+    queue.enqueue("Cardiology", "Low", 0.9, {"name": "low"})
+    queue.enqueue("Cardiology", "High", 0.6, {"name": "high"})
+    queue.enqueue("Cardiology", "Medium", 0.8, {"name": "medium"})
+    queue.enqueue("Cardiology", "High", 0.95, {"name": "sure high"})
+    order = [queue.dequeue("Cardiology").patient["name"] for _ in range(4)]
+    assert order == ["sure high", "high", "medium", "low"], order
+    assert queue.dequeue("Cardiology") is None
+    print("- High before Medium before Low, confidence within a level: OK")
+
+def test_aging():
+    clock = FakeClock()
+    queue = TriageQueue(clock)
+    print("Testing aging (no starvation)...")
+    old = queue.enqueue("Neurology", "Low", 0.5)
+    clock.t += RISK_PRIORITY["High"] + 600  # waited longer than High's head start
+    queue.enqueue("Neurology", "High", 0.5)
+    assert queue.dequeue("Neurology").ticket == old.ticket
+    # A recent Low still waits behind a new High
+    queue.enqueue("Neurology", "Low", 0.5)
+    clock.t += 10
+    queue.enqueue("Neurology", "High", 0.5)
+    assert queue.dequeue("Neurology").risk == "High"
+    print("- Low patient waiting > 1h overtakes a new High: OK")
+
+def test_cancel_and_stats():
+    clock = FakeClock()
+    queue = TriageQueue(clock)
+    print("Testing cancel, position and stats...")
+    tickets = [queue.enqueue("General Medicine", "Medium", 0.5).ticket for _ in range(5)]
+    clock.t += 1
+    assert queue.position(tickets[2]) == 3
+    assert queue.cancel(tickets[0]) and not queue.cancel(tickets[0])
+    assert queue.depth("General Medicine") == 4 and queue.position(tickets[2]) == 2
+    assert queue.dequeue("General Medicine").ticket == tickets[1]
+    clock.t += 99
+    stats = queue.stats()["General Medicine"]
+    assert stats["depth"] == 3
+    assert stats["waiting_seconds"]["p50"] == 100.0
+    assert stats["served_wait_seconds"]["p50"] == 1.0
+    print("- Cancel skips lazily, positions shift, percentiles per department: OK")
+
+def test_many_operations():
+    queue = TriageQueue()
+    print("Testing 50k enqueue/dequeue...")
+    levels = ["High", "Medium", "Low"]
+    start = time.perf_counter()
+    for i in range(50_000):
+        queue.enqueue("Cardiology", levels[i % 3], (i % 100) / 100)
+    last = None
+    for _ in range(50_000):
+        entry = queue.dequeue("Cardiology")
+        rank = -RISK_PRIORITY[entry.risk]
+        assert last is None or rank >= last  # same arrival time: strictly by risk
+        last = rank
+    elapsed = time.perf_counter() - start
+    print(f"- 100k operations in {elapsed * 1000:.0f} ms")
+    assert elapsed < 5.0
+
+def test_freed_doctors_take_waiting_patients():
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    print("Testing hand-off when a doctor becomes free...")
+    client.post("/reset_doctors")
+    client.post("/toggle_availability", json={"doctor_name": "Dr. Skin", "status": "Busy"})
+    main.triage_queue.enqueue("Dermatology", "Low", 0.8, {"name": "rash"})
+    res = client.post("/toggle_availability", json={"doctor_name": "Dr. Skin", "status": "Available"}).json()
+    assert res["new_state"] == "Busy" and res["patient"]["patient"]["name"] == "rash"
+    assert main.triage_queue.depth("Dermatology") == 0
+    res = client.post("/toggle_availability", json={"doctor_name": "Dr. Skin", "status": "Available"}).json()
+    assert res["new_state"] == "Available" and res["patient"] is None
+    print("- Toggle to Available takes the next patient, else frees the doctor: OK")
+
+    client.post("/toggle_availability", json={"doctor_name": "Dr. Skin", "status": "Busy"})
+    main.triage_queue.enqueue("Dermatology", "Medium", 0.7, {"name": "lesion"})
+    res = client.post("/reset_doctors").json()
+    assert [(h["doctor_id"], h["patient"]["patient"]["name"]) for h in res["handed_off"]] == [("derma_1", "lesion")]
+    assert main.doctor_registry.get("derma_1")["status"] == "Busy" and main.triage_queue.depth("Dermatology") == 0
+    client.post("/reset_doctors")
+    print("- Reset hands queued patients to the freed doctors: OK")
+
+    # A queued Medium/Low patient isn't shown a busy doctor the queue may not give them
+    client.post("/toggle_availability", json={"doctor_name": "Dr. Skin", "status": "Busy"})
+    patient = {"Age": 30, "Gender": "Female", "BP_Systolic": 118, "BP_Diastolic": 76, "Heart_Rate": 70,
+               "Temperature": 36.8, "O2_Saturation": 99, "Symptoms": "Rash, Itchiness"}
+    res = client.post("/predict", json=patient).json()
+    assert res["Predicted_Risk"] != "High" and res["Doctor_Status"] == "Queued"
+    assert res["Assigned_Doctor"] is None and res["Assigned_Doctor_ID"] is None
+    assert res["Queue"]["department"] == "Dermatology" and res["Queue"]["position"] == 1
+    client.post("/reset_doctors")
+    print("- Queued patient gets a queue position, not a doctor: OK")
+
+if __name__ == "__main__":
+    test_risk_order()
+    test_aging()
+    test_cancel_and_stats()
+    test_many_operations()
+    test_freed_doctors_take_waiting_patients()
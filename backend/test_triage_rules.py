@@ -0,0 +1,88 @@
+import random
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants, sre_parse
+import pandas as pd
+from triage_rules import RuleEngine, get_rule_engine
+
+def legacy_overrides(symptoms, risk_pred, dept_pred):
+    # The previous hard-coded if/elif chain in main.py
+    s = symptoms.lower()
+    if any(x in s for x in ['chest', 'heart', 'coronary', 'angina']):
+        return "High", "Cardiology"
+    elif any(x in s for x in ['stroke', 'slurred', 'facial', 'droop', 'paralysis']):
+        return "High", "Neurology"
+    elif any(x in s for x in ['breath', 'lung', 'respiratory', 'asthma', 'wheez']):
+        return "High", "Pulmonology"
+    elif any(x in s for x in ['bone', 'fracture', 'break', 'dislocat']):
+        return risk_pred, "Orthopedics"
+    elif any(x in s for x in ['skin', 'rash', 'derma']):
+        return risk_pred, "Dermatology"
+    elif any(x in s for x in ['stomach', 'abdomen', 'gut', 'vomit']):
+        return risk_pred, "Gastroenterology"
+    return risk_pred, dept_pred
+
+def test_matches_legacy_chain():
+    engine = get_rule_engine()
+    symptoms = pd.read_csv("patients_dataset.csv", usecols=["Symptoms"])["Symptoms"].fillna("").tolist()
+    symptoms += ["Heartbreak", "WHEEZING after a BREAKfast", "no complaints", ""]
+    print(f"Testing the rule table against the old if/elif chain ({len(symptoms)} symptom texts)...")
+    preds = [("Low", "General Medicine"), ("Medium", "Dermatology")]
+    for k, (risk, dept) in enumerate(preds):
+        records = [{"Symptoms": s, "Medical_Notes": ""} for s in symptoms]
+        results = engine.evaluate_batch(records, [risk] * len(records), [dept] * len(records))
+        for s, (new_risk, new_dept, _) in zip(symptoms, results):
+            assert (new_risk, new_dept) == legacy_overrides(s, risk, dept), s
+    print("- Same department/risk for every text: OK")
+
+def test_hits_notes_and_prefixes():
+    engine = RuleEngine([
+        {"name": "a", "department": "Orthopedics", "priority": 1, "phrases": ["break", "breakdown"]},
+        {"name": "b", "department": "Cardiology", "min_risk": "Medium", "priority": 5, "phrases": ["heart"]},
+    ])
+    print("Testing hits across fields and overlapping phrases...")
+    risk, dept, hits = engine.evaluate("Breakdown at work", "history of HEART failure", "Low", "General Medicine")
+    assert (risk, dept) == ("Medium", "Cardiology")
+    assert [h["rule"] for h in hits] == ["b", "a"]
+    assert hits[0]["matches"] == [{"phrase": "heart", "field": "Medical_Notes"}]
+    assert {m["phrase"] for m in hits[1]["matches"]} == {"break", "breakdown"}
+    # min_risk never lowers a prediction
+    assert engine.evaluate("heart", "", "High", "X")[0] == "High"
+    assert engine.evaluate("nothing", "", "Low", "X") == ("Low", "X", [])
+    print("- Notes are scanned, prefix phrases all reported, highest priority applied: OK")
+
+def alternations(parsed):
+    """[[first item of each alternative], ...] for every alternation in a parsed regex"""
+    found = []
+    for op, arg in parsed:
+        if op is sre_constants.BRANCH:
+            found.append([branch[0] if len(branch) else None for branch in arg[1]])
+            for branch in arg[1]:
+                found += alternations(branch)
+        elif op is sre_constants.SUBPATTERN:
+            found += alternations(arg[-1])
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            found += alternations(arg[2])
+    return found
+
+def test_single_trie_alternation():
+    rng = random.Random(0)
+    phrases = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 12))) for _ in range(2000)]
+    print("Testing the compiled matcher for 2000 phrases...")
+    engine = RuleEngine([{"name": f"r{i}", "department": "D", "priority": i, "phrases": [p]} for i, p in enumerate(phrases)])
+    parsed = list(sre_parse.parse(engine.pattern.pattern))
+    # One alternation at the top, one branch per first letter rather than one per phrase
+    assert len(parsed) == 1 and parsed[0][0] is sre_constants.BRANCH
+    nested = alternations(parsed)
+    assert len(nested[0]) == len({p[0] for p in phrases})
+    # Every alternation picks its branch from the next character alone: no phrase is retried
+    for firsts in nested:
+        assert all(op is sre_constants.LITERAL for op, _ in firsts)
+        assert len({ch for _, ch in firsts}) == len(firsts)
+    print(f"- One alternation of {len(nested[0])} branches, {len(nested)} alternations, all keyed by their first character: OK")
+
+if __name__ == "__main__":
+    test_matches_legacy_chain()
+    test_hits_notes_and_prefixes()
+    test_single_trie_alternation()
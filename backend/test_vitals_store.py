@@ -0,0 +1,52 @@
+import numpy as np
+from vitals_store import VitalsStore
+
+def test_vitals_store():
+    n = 100
+    store = VitalsStore(n, interval=2, retention=20, tiers=((10, 60),))
+    rng = np.random.default_rng(0)
+    samples = []
+
+    print("Testing ring buffer retention...")
+    for tick in range(25):
+        hr = rng.integers(60, 120, n)
+        temp = rng.integers(360, 400, n)
+        o2 = rng.integers(90, 100, n)
+        sys = rng.integers(100, 160, n)
+        store.append(1000.0 + 2 * tick, hr, temp, o2, sys)
+        samples.append((hr, temp, o2, sys))
+
+    series = store.query(7)
+    # 20 s at 2 s resolution: the last 10 ticks, oldest first, across the wrap-around
+    assert series['timestamps'] == [1000.0 + 2 * t for t in range(15, 25)]
+    assert series['Heart_Rate'] == [int(samples[t][0][7]) for t in range(15, 25)]
+    assert series['Temperature'] == [samples[t][1][7] / 10 for t in range(15, 25)]
+    print("- Oldest samples dropped, order kept across wrap-around: OK")
+
+    print("\nTesting since=...")
+    series = store.query(7, since=1040.0)
+    assert series['timestamps'] == [1042.0, 1044.0, 1046.0, 1048.0]
+    assert store.query(7, since=2000.0)['timestamps'] == []
+    print("- Only newer samples returned: OK")
+
+    print("\nTesting downsampled tier...")
+    series = store.query(7, resolution=10)
+    # 25 ticks / 5 per bucket = 5 averaged samples
+    assert len(series['timestamps']) == 5
+    expected = np.round(np.mean([samples[t][0][7] for t in range(5)]))
+    assert series['Heart_Rate'][0] == expected
+    try:
+        store.query(7, resolution=30)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("- 10 s averages, unknown resolution rejected: OK")
+
+    print("\nTesting memory budget...")
+    default = VitalsStore(1)
+    # 1 h of 2 s samples + 6 h of 1 min averages, 4 int16 fields
+    assert default.bytes_per_patient == (1800 + 360) * 4 * 2 + 16
+    print(f"- {default.bytes_per_patient / 1024:.1f} KiB per patient: OK")
+
+if __name__ == "__main__":
+    test_vitals_store()
@@ -0,0 +1,257 @@
+"""
+Training driver for the risk and department models.
+
+    python training.py [--data patients_dataset.csv] [--no-cache] [--jobs N] [--export]
+
+- The dataset is vectorized once; the sparse train/validation/test matrices, targets and
+  fitted preprocessor are cached under .training_cache/<key>, where the key hashes the
+  data file's bytes, the preprocessor config and the split settings. Re-running on the
+  same data (e.g. while tuning the boosters) skips CSV parsing and tokenization.
+- Both heads train at the same time (XGBoost releases the GIL), each on half the cores,
+  with the hist tree method and early stopping on a validation split of the training set.
+- Wall time and peak memory are reported per stage.
+Same artifacts as model.train_models (joblib Pipelines + label encoders), same test split.
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import sklearn
+from sklearn.metrics import classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+import xgboost as xgb
+from xgboost import XGBClassifier
+from xgboost.callback import EarlyStopping
+from model import FEATURES, PREPROCESSOR_CONFIG, build_preprocessor, export_bundle
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.training_cache')
+SPLIT_CONFIG = {'test_size': 0.2, 'valid_size': 0.1, 'random_state': 42, 'stratify': 'Risk_Level'}
+BOOSTER_PARAMS = {'learning_rate': 0.1, 'max_depth': 8, 'tree_method': 'hist', 'eval_metric': 'mlogloss'}
+MAX_ROUNDS = 300
+EARLY_STOPPING_ROUNDS = 20
+# Stop once validation mlogloss improves by less than this (it keeps creeping down long after accuracy plateaus)
+EARLY_STOPPING_MIN_DELTA = 1e-4
+CACHE_VERSION = 1
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+class StageTimer:
+    """Collects wall time and peak memory per training stage"""
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        before = peak_rss_mb()
+        result = fn(*args, **kwargs)
+        peak = peak_rss_mb()
+        self.stages.append({'stage': name, 'seconds': round(time.perf_counter() - start, 3),
+                            'peak_rss_mb': round(peak, 1), 'peak_growth_mb': round(peak - before, 1)})
+        return result
+
+    def print(self):
+        print(f"\n{'stage':<24}{'seconds':>10}{'peak MB':>10}{'+MB':>8}")
+        for s in self.stages:
+            print(f"{s['stage']:<24}{s['seconds']:>10.2f}{s['peak_rss_mb']:>10.0f}{s['peak_growth_mb']:>8.0f}")
+
+
+def cache_key(data_path):
+    """Hash of the data file's bytes plus everything that shapes the feature matrices"""
+    digest = hashlib.sha1()
+    with open(data_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b''):
+            digest.update(chunk)
+    digest.update(json.dumps({
+        'preprocessor': PREPROCESSOR_CONFIG, 'split': SPLIT_CONFIG, 'features': FEATURES,
+        'sklearn': sklearn.__version__, 'cache_version': CACHE_VERSION,
+    }, sort_keys=True).encode())
+    return digest.hexdigest()[:20]
+
+
+def vectorize(data_path, n_jobs=None):
+    """Reads the dataset, splits it and fits the preprocessor once. Returns the feature set dict."""
+    df = pd.read_csv(data_path, usecols=FEATURES + ['Risk_Level', 'Department'])
+    le_risk, le_dept = LabelEncoder(), LabelEncoder()
+    y_risk = le_risk.fit_transform(df['Risk_Level'])
+    y_dept = le_dept.fit_transform(df['Department'])
+
+    # Same test split as model.train_models, then a validation split for early stopping
+    rows = np.arange(len(df))
+    train, test = train_test_split(rows, test_size=SPLIT_CONFIG['test_size'],
+                                   random_state=SPLIT_CONFIG['random_state'], stratify=y_risk)
+    train, valid = train_test_split(train, test_size=SPLIT_CONFIG['valid_size'],
+                                    random_state=SPLIT_CONFIG['random_state'], stratify=y_risk[train])
+
+    preprocessor = build_preprocessor()
+    # Fit the column transformers in parallel, but don't ship a parallel transform to inference
+    preprocessor.set_params(n_jobs=n_jobs)
+    X = df[FEATURES]
+    features = {'X_train': preprocessor.fit_transform(X.iloc[train])}
+    features['X_valid'] = preprocessor.transform(X.iloc[valid])
+    features['X_test'] = preprocessor.transform(X.iloc[test])
+    preprocessor.set_params(n_jobs=None)
+    for name in ('X_train', 'X_valid', 'X_test'):
+        # XGBoost works in float32 anyway: half the memory, same trees
+        features[name] = sp.csr_matrix(features[name], dtype=np.float32)
+    for split, idx in (('train', train), ('valid', valid), ('test', test)):
+        features[f'y_risk_{split}'] = y_risk[idx]
+        features[f'y_dept_{split}'] = y_dept[idx]
+    features.update(preprocessor=preprocessor, le_risk=le_risk, le_dept=le_dept)
+    return features
+
+
+def save_features(path, features):
+    tmp = path + '.tmp'
+    os.makedirs(tmp, exist_ok=True)
+    for name, value in features.items():
+        if sp.issparse(value):
+            sp.save_npz(os.path.join(tmp, f'{name}.npz'), value, compressed=False)
+        elif isinstance(value, np.ndarray):
+            np.save(os.path.join(tmp, f'{name}.npy'), value)
+        else:
+            joblib.dump(value, os.path.join(tmp, f'{name}.joblib'))
+    # Rename last: a cache entry only exists once it is complete
+    os.replace(tmp, path)
+
+
+def load_features(path):
+    features = {}
+    for filename in os.listdir(path):
+        name, ext = os.path.splitext(filename)
+        full = os.path.join(path, filename)
+        if ext == '.npz':
+            features[name] = sp.load_npz(full)
+        elif ext == '.npy':
+            features[name] = np.load(full)
+        elif ext == '.joblib':
+            features[name] = joblib.load(full)
+    return features
+
+
+def fit_head(features, target, n_classes, n_jobs, params, rounds, early_stopping_rounds):
+    """
+    One head with the native API, loaded back into an XGBClassifier (already cut at the
+    best iteration) so the saved Pipelines stay what model.train_models produced.
+    Validation is a plain DMatrix: evaluating on the QuantileDMatrix the sklearn wrapper
+    builds for hist made every round ~3x slower.
+    """
+    start = time.perf_counter()
+    train_matrix = xgb.QuantileDMatrix(features['X_train'], features[f'y_{target}_train'], nthread=n_jobs)
+    valid_matrix = xgb.DMatrix(features['X_valid'], features[f'y_{target}_valid'], nthread=n_jobs)
+    booster_params = {**params, 'objective': 'multi:softprob', 'num_class': n_classes,
+                      'nthread': n_jobs, 'seed': SPLIT_CONFIG['random_state']}
+    stopping = EarlyStopping(rounds=early_stopping_rounds, min_delta=EARLY_STOPPING_MIN_DELTA)
+    booster = xgb.train(booster_params, train_matrix, num_boost_round=rounds,
+                        evals=[(valid_matrix, 'valid')], callbacks=[stopping], verbose_eval=False)
+    best_iteration = booster.best_iteration
+    clf = XGBClassifier()
+    clf.load_model(bytearray(booster[:best_iteration + 1].save_raw('ubj')))
+    return clf, best_iteration, time.perf_counter() - start
+
+
+def train(data_path='patients_dataset.csv', cache_dir=CACHE_DIR, use_cache=True, n_jobs=None,
+          params=None, rounds=MAX_ROUNDS, early_stopping_rounds=EARLY_STOPPING_ROUNDS, save=True, export=False, verbose=True):
+    """
+    Trains both heads. Returns (risk_clf, dept_clf, report), the classifiers wrapped in
+    Pipelines around the shared preprocessor like model.train_models.
+    save: write the joblib artifacts; export: also write a versioned model bundle.
+    """
+    params = {**BOOSTER_PARAMS, **(params or {})}
+    timer = StageTimer()
+    key = timer.run('hash data', cache_key, data_path)
+    entry = os.path.join(cache_dir, key)
+    cache_hit = use_cache and os.path.isdir(entry)
+    if cache_hit:
+        features = timer.run('load cached features', load_features, entry)
+    else:
+        features = timer.run('vectorize', vectorize, data_path, n_jobs)
+        if use_cache:
+            timer.run('cache features', save_features, entry, features)
+
+    # Both heads at once, splitting the cores between them
+    cores = n_jobs or os.cpu_count() or 1
+    per_head = max(1, cores // 2)
+
+    def fit_both():
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            risk = pool.submit(fit_head, features, 'risk', len(features['le_risk'].classes_), per_head,
+                               params, rounds, early_stopping_rounds)
+            dept = pool.submit(fit_head, features, 'dept', len(features['le_dept'].classes_), per_head,
+                               params, rounds, early_stopping_rounds)
+            return risk.result(), dept.result()
+
+    (risk_xgb, risk_best, risk_seconds), (dept_xgb, dept_best, dept_seconds) = timer.run('train heads (parallel)', fit_both)
+
+    def evaluate():
+        out = {}
+        for name, clf, le in (('risk', risk_xgb, features['le_risk']), ('dept', dept_xgb, features['le_dept'])):
+            y_true = features[f'y_{name}_test']
+            y_pred = clf.predict(features['X_test'])
+            out[name] = {'accuracy': float(np.mean(y_pred == y_true)),
+                         'report': classification_report(y_true, y_pred, labels=np.arange(len(le.classes_)),
+                                                         target_names=[str(c) for c in le.classes_], zero_division=0)}
+        return out
+
+    metrics = timer.run('evaluate', evaluate)
+
+    preprocessor = features['preprocessor']
+    risk_clf = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', risk_xgb)])
+    dept_clf = Pipeline(steps=[('preprocessor', preprocessor), ('classifier', dept_xgb)])
+
+    def save_artifacts():
+        joblib.dump(features['le_risk'], 'risk_le.joblib')
+        joblib.dump(risk_clf, 'risk_model.joblib')
+        joblib.dump(features['le_dept'], 'dept_le.joblib')
+        joblib.dump(dept_clf, 'dept_model.joblib')
+
+    if save:
+        timer.run('save artifacts', save_artifacts)
+    if export:
+        timer.run('export bundle', export_bundle, risk_clf, dept_clf, features['le_risk'], features['le_dept'])
+
+    report = {
+        'cache_key': key,
+        'cache': 'hit' if cache_hit else ('miss' if use_cache else 'off'),
+        'train_rows': features['X_train'].shape[0],
+        'n_features': features['X_train'].shape[1],
+        'stages': timer.stages,
+        'heads': {
+            'risk': {'seconds': round(risk_seconds, 3), 'best_iteration': int(risk_best),
+                     'accuracy': metrics['risk']['accuracy']},
+            'dept': {'seconds': round(dept_seconds, 3), 'best_iteration': int(dept_best),
+                     'accuracy': metrics['dept']['accuracy']},
+        },
+    }
+    if verbose:
+        print(f"Features: {report['train_rows']} training rows x {report['n_features']} (cache {report['cache']})")
+        for name in ('risk', 'dept'):
+            head = report['heads'][name]
+            print(f"\n{name} model: {head['seconds']:.2f} s, stopped at {head['best_iteration'] + 1} trees")
+            print(metrics[name]['report'])
+        timer.print()
+    return risk_clf, dept_clf, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the risk and department models")
+    parser.add_argument('--data', default='patients_dataset.csv')
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write cached feature matrices")
+    parser.add_argument('--jobs', type=int, default=None, help="cores to use (default: all)")
+    parser.add_argument('--export', action='store_true', help="also export a versioned model bundle")
+    args = parser.parse_args()
+    train(args.data, use_cache=not args.no_cache, n_jobs=args.jobs, export=args.export)
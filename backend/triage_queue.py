@@ -0,0 +1,146 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+import numpy as np
+
+# Head start per risk level, in seconds of waiting: a Low patient who has waited an hour
+# longer than a High one ranks level with them. This is what prevents starvation.
+RISK_PRIORITY = {'High': 3600.0, 'Medium': 1200.0, 'Low': 0.0}
+# Model confidence is worth up to this many seconds within a risk level
+CONFIDENCE_WEIGHT = 300.0
+# Seconds of priority gained per second waited
+AGING_RATE = 1.0
+# Recent completed waits kept per department for percentiles
+WAIT_WINDOW = 1000
+
+
+class QueueEntry:
+    __slots__ = ('ticket', 'department', 'risk', 'confidence', 'arrival', 'patient', 'removed')
+
+    def __init__(self, ticket, department, risk, confidence, arrival, patient):
+        self.ticket = ticket
+        self.department = department
+        self.risk = risk
+        self.confidence = confidence
+        self.arrival = arrival
+        self.patient = patient
+        self.removed = False
+
+    def as_dict(self, now):
+        return {
+            "ticket": self.ticket,
+            "department": self.department,
+            "risk": self.risk,
+            "confidence": self.confidence,
+            "waited_seconds": round(now - self.arrival, 1),
+            "patient": self.patient,
+        }
+
+
+def priority(risk, confidence, arrival):
+    """
+    Heap key (smaller = served first).
+    Effective priority is base + AGING_RATE * (now - arrival); `now` is the same for every
+    waiting patient, so ordering by base - AGING_RATE * arrival is equivalent and never
+    changes while a patient waits - the heap stays valid without re-keying.
+    """
+    base = RISK_PRIORITY.get(risk, 0.0) + CONFIDENCE_WEIGHT * float(confidence or 0.0)
+    return AGING_RATE * arrival - base
+
+
+class TriageQueue:
+    """
+    Waiting patients per department, one binary heap each: O(log n) enqueue/dequeue.
+    Cancelled tickets are marked and skipped lazily when they reach the top.
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._heaps = {}
+        self._entries = {}
+        self._counter = itertools.count()
+        self._depth = {}
+        self._waits = {}
+
+    def enqueue(self, department, risk, confidence, patient=None, arrival=None):
+        with self._lock:
+            arrival = self.clock() if arrival is None else arrival
+            entry = QueueEntry(uuid.uuid4().hex[:12], department, risk, confidence, arrival, patient or {})
+            # Counter breaks ties in arrival order and keeps entries from being compared
+            heapq.heappush(self._heaps.setdefault(department, []),
+                           (priority(risk, confidence, arrival), next(self._counter), entry))
+            self._entries[entry.ticket] = entry
+            self._depth[department] = self._depth.get(department, 0) + 1
+            return entry
+
+    def _pop_removed(self, heap):
+        while heap and heap[0][2].removed:
+            heapq.heappop(heap)
+
+    def dequeue(self, department):
+        """Highest-priority waiting patient of a department, or None"""
+        with self._lock:
+            heap = self._heaps.get(department)
+            if not heap:
+                return None
+            self._pop_removed(heap)
+            if not heap:
+                return None
+            entry = heapq.heappop(heap)[2]
+            del self._entries[entry.ticket]
+            self._depth[department] -= 1
+            self._waits.setdefault(department, deque(maxlen=WAIT_WINDOW)).append(self.clock() - entry.arrival)
+            return entry
+
+    def cancel(self, ticket):
+        """Removes a waiting patient (left, transferred...). Returns False for an unknown ticket."""
+        with self._lock:
+            entry = self._entries.pop(ticket, None)
+            if entry is None:
+                return False
+            entry.removed = True
+            self._depth[entry.department] -= 1
+            self._pop_removed(self._heaps[entry.department])
+            return True
+
+    def position(self, ticket):
+        """1-based place in line (O(n) - for display, not for the hot path)"""
+        with self._lock:
+            entry = self._entries.get(ticket)
+            if entry is None:
+                return None
+            key = next((k, c) for k, c, e in self._heaps[entry.department] if e is entry)
+            ahead = sum(1 for k, c, e in self._heaps[entry.department] if not e.removed and (k, c) < key)
+            return ahead + 1
+
+    def depth(self, department=None):
+        if department is not None:
+            return self._depth.get(department, 0)
+        return sum(self._depth.values())
+
+    @staticmethod
+    def _percentiles(values):
+        if len(values) == 0:
+            return None
+        p50, p90, p99 = np.percentile(np.asarray(values, dtype=np.float64), [50, 90, 99])
+        return {"p50": round(float(p50), 1), "p90": round(float(p90), 1), "p99": round(float(p99), 1)}
+
+    def stats(self):
+        """Depth, current waits and recent completed waits per department"""
+        with self._lock:
+            now = self.clock()
+            waiting = {}
+            for entry in self._entries.values():
+                waiting.setdefault(entry.department, []).append(now - entry.arrival)
+            departments = set(self._depth) | set(self._waits)
+            return {
+                dept: {
+                    "depth": self._depth.get(dept, 0),
+                    "waiting_seconds": self._percentiles(waiting.get(dept, [])),
+                    "served_wait_seconds": self._percentiles(self._waits.get(dept, ())),
+                }
+                for dept in sorted(departments)
+            }
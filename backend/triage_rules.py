@@ -0,0 +1,140 @@
+"""
+Keyword safety-net rules for triage, loaded from a JSON table (triage_rules.json):
+
+    {"rules": [{"name": "cardiac", "department": "Cardiology", "min_risk": "High",
+                "priority": 60, "phrases": ["chest", "heart", ...]}, ...]}
+
+Every phrase of every rule is compiled into one trie-shaped regex, so a batch of texts
+is scanned once however many phrases there are: alternatives share their prefixes, so
+the work per position is bounded by the alphabet and the longest phrase rather than
+growing with the number of phrases like one substring test per keyword does.
+Phrases match as case-insensitive substrings ("wheez" matches "wheezing"), like the
+original if/elif chain. The highest-priority rule that hits sets the department and
+raises the risk to its min_risk; every hit is reported.
+"""
+import bisect
+import itertools
+import json
+import os
+import re
+
+RULES_PATH = os.environ.get('TRIAGE_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'triage_rules.json'))
+RISK_ORDER = {'Low': 0, 'Medium': 1, 'High': 2}
+# Text fields the rules look at, in scan order
+FIELDS = ('Symptoms', 'Medical_Notes')
+# Joins texts for one batch scan; phrases can't contain it, so no match spans two texts
+SEPARATOR = '\x00'
+
+
+def _trie_pattern(node):
+    """Regex for a character trie ({char: child}, '' marks the end of a phrase)"""
+    ends = '' in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != '']
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if ends:
+        # A shorter phrase ends here: the rest is optional, longest match preferred
+        return '(?:' + body + ')?'
+    return body
+
+
+def compile_phrases(phrases):
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return re.compile(_trie_pattern(trie))
+
+
+class RuleEngine:
+    def __init__(self, rules):
+        self.rules = sorted(rules, key=lambda r: -r.get('priority', 0))
+        self.by_phrase = {}
+        for rank, rule in enumerate(self.rules):
+            for phrase in rule['phrases']:
+                phrase = phrase.lower()
+                if not phrase or SEPARATOR in phrase:
+                    raise ValueError(f"Invalid phrase {phrase!r} in rule {rule.get('name')}")
+                self.by_phrase.setdefault(phrase, []).append(rank)
+        self.pattern = compile_phrases(self.by_phrase) if self.by_phrase else None
+
+    @classmethod
+    def from_file(cls, path=RULES_PATH):
+        with open(path) as f:
+            return cls(json.load(f)['rules'])
+
+    def _phrases_at(self, match):
+        """The longest phrase matched at a position and every shorter phrase that is its prefix"""
+        text = match.group()
+        return [text[:k] for k in range(len(text), 0, -1) if text[:k] in self.by_phrase]
+
+    def scan(self, texts):
+        """
+        Hits for many texts in one regex pass over their concatenation.
+        Returns one {rank: [phrase, ...]} per text (rank = index in self.rules).
+        """
+        hits = [{} for _ in texts]
+        if self.pattern is None or not texts:
+            return hits
+        texts = [t.lower() for t in texts]
+        joined = SEPARATOR.join(texts)
+        starts = list(itertools.accumulate([0] + [len(t) + 1 for t in texts[:-1]]))
+        search = self.pattern.search
+        match = search(joined)
+        while match:
+            row = bisect.bisect_right(starts, match.start()) - 1
+            for phrase in self._phrases_at(match):
+                for rank in self.by_phrase[phrase]:
+                    found = hits[row].setdefault(rank, [])
+                    if phrase not in found:
+                        found.append(phrase)
+            # Restart one character later so overlapping phrases are found too
+            match = search(joined, match.start() + 1)
+        return hits
+
+    def evaluate_batch(self, records, risk_preds, dept_preds):
+        """
+        Applies the rules to a batch: records are dicts/objects with Symptoms and Medical_Notes.
+        Returns [(risk, department, rule hits)], hits ordered by rule priority.
+        """
+        texts = []
+        for record in records:
+            for field in FIELDS:
+                value = record.get(field) if isinstance(record, dict) else getattr(record, field, None)
+                texts.append(value or '')
+        scanned = self.scan(texts)
+
+        out = []
+        for i, (risk, dept) in enumerate(zip(risk_preds, dept_preds)):
+            per_rule = {}
+            for k, field in enumerate(FIELDS):
+                for rank, phrases in scanned[i * len(FIELDS) + k].items():
+                    per_rule.setdefault(rank, []).extend({"phrase": p, "field": field} for p in phrases)
+            hits = []
+            for rank in sorted(per_rule):
+                rule = self.rules[rank]
+                hits.append({"rule": rule.get('name'), "department": rule['department'], "matches": per_rule[rank]})
+            if hits:
+                top = self.rules[min(per_rule)]
+                dept = top['department']
+                min_risk = top.get('min_risk')
+                if min_risk and RISK_ORDER.get(min_risk, 0) > RISK_ORDER.get(risk, -1):
+                    risk = min_risk
+            out.append((risk, dept, hits))
+        return out
+
+    def evaluate(self, symptoms, notes, risk_pred, dept_pred):
+        return self.evaluate_batch([{'Symptoms': symptoms, 'Medical_Notes': notes}], [risk_pred], [dept_pred])[0]
+
+
+_engine = None
+
+
+def get_rule_engine():
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine.from_file()
+    return _engine
@@ -0,0 +1,119 @@
+import os
+import numpy as np
+
+# Stored vitals and their scale (temperature kept as int16 tenths of a degree)
+FIELDS = [('Heart_Rate', 1), ('Temperature', 10), ('O2_Saturation', 1), ('BP_Systolic', 1)]
+
+# Defaults: 1 hour of raw 2 s samples, plus 1-minute averages for 6 hours
+DEFAULT_INTERVAL = 2
+DEFAULT_RETENTION = int(os.environ.get('VITALS_RETENTION', 3600))
+DEFAULT_TIERS = ((60, int(os.environ.get('VITALS_TIER_RETENTION', 6 * 3600))),)
+
+
+class _Ring:
+    """
+    Preallocated ring of samples for every patient: values[slot, field, patient].
+    Time-major, so appending a tick for all patients is one contiguous write.
+    """
+    def __init__(self, n, capacity, resolution):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.values = np.zeros((capacity, len(FIELDS), n), dtype=np.int16)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    def write(self, t, values):
+        self.values[self.head] = values
+        self.times[self.head] = t
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def window(self, since=None):
+        """Slot ranges (oldest first, at most two because of wrap-around) of samples newer than `since`"""
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            pieces = [(start, start + self.count)]
+        else:
+            pieces = [(start, self.capacity), (0, self.head)]
+        if since is None:
+            return pieces
+        # Times are increasing within the chronological order: binary search each piece
+        out = []
+        for a, b in pieces:
+            first = a + int(np.searchsorted(self.times[a:b], since, side='right'))
+            if first < b:
+                out.append((first, b))
+        return out
+
+    def read(self, patient, since=None):
+        """(times, values[field, sample]) for one patient, copying only the requested range"""
+        pieces = self.window(since)
+        if not pieces:
+            return np.empty(0), np.empty((len(FIELDS), 0), dtype=np.int16)
+        times = np.concatenate([self.times[a:b] for a, b in pieces])
+        values = np.concatenate([self.values[a:b, :, patient] for a, b in pieces], axis=0).T
+        return times, values
+
+
+class VitalsStore:
+    """
+    Bounded time-series store of simulated vitals, fed once per simulation tick.
+
+    Raw samples go into a ring buffer sized for `retention` seconds at `interval`
+    resolution; each tier keeps running sums and writes one averaged sample every
+    `resolution` seconds into its own, longer ring. Everything is preallocated, so
+    memory per patient is fixed: bytes_per_patient.
+    """
+    def __init__(self, n, interval=DEFAULT_INTERVAL, retention=DEFAULT_RETENTION, tiers=DEFAULT_TIERS):
+        self.n = n
+        self.interval = interval
+        self.raw = _Ring(n, max(1, int(retention // interval)), interval)
+        self.tiers = []
+        for resolution, tier_retention in tiers:
+            factor = max(1, int(resolution // interval))
+            self.tiers.append({
+                'ring': _Ring(n, max(1, int(tier_retention // resolution)), resolution),
+                'factor': factor,
+                'sums': np.zeros((len(FIELDS), n), dtype=np.int32),
+                'count': 0,
+            })
+
+    @property
+    def resolutions(self):
+        return [self.interval] + [t['ring'].resolution for t in self.tiers]
+
+    @property
+    def bytes_per_patient(self):
+        rings = [self.raw] + [t['ring'] for t in self.tiers]
+        return sum(r.capacity * len(FIELDS) * 2 for r in rings) + sum(len(FIELDS) * 4 for _ in self.tiers)
+
+    def append(self, t, heart_rate, temperature, o2, bp_systolic):
+        """One sample for every patient (temperature in tenths of a degree, like VitalsSimulation)"""
+        values = np.stack([heart_rate, temperature, o2, bp_systolic]).astype(np.int16, copy=False)
+        self.raw.write(t, values)
+        for tier in self.tiers:
+            tier['sums'] += values
+            tier['count'] += 1
+            if tier['count'] == tier['factor']:
+                tier['ring'].write(t, np.round(tier['sums'] / tier['count']).astype(np.int16))
+                tier['sums'][:] = 0
+                tier['count'] = 0
+
+    def query(self, patient, since=None, resolution=None):
+        """
+        Samples for one patient newer than `since` (unix seconds) at a stored resolution
+        (seconds, default: raw). Columnar: {'timestamps': [...], 'Heart_Rate': [...], ...}.
+        """
+        resolution = resolution or self.interval
+        if resolution == self.interval:
+            ring = self.raw
+        else:
+            ring = next((t['ring'] for t in self.tiers if t['ring'].resolution == resolution), None)
+            if ring is None:
+                raise ValueError(f"Unknown resolution {resolution}s, available: {self.resolutions}")
+        times, values = ring.read(patient, since)
+        out = {'resolution': resolution, 'timestamps': times.tolist()}
+        for (name, scale), column in zip(FIELDS, values):
+            out[name] = (column / scale).tolist() if scale != 1 else column.tolist()
+        return out
@@ -58,10 +58,11 @@ function App() {
   useEffect(() => {
     const fetchPatients = async () => {
       try {
-        const response = await fetch('http://localhost:8000/patients');
+        // First page, highest risk first
+        const response = await fetch('http://localhost:8000/patients?sort=risk&limit=50');
         const data = await response.json();
-        if (Array.isArray(data)) {
-          setPatients(data);
+        if (Array.isArray(data.items)) {
+          setPatients(data.items);
         } else {
           console.error("Received non-array patients data:", data);
         }
@@ -78,7 +78,8 @@ const Chatbot = () => {
                 content: m.content
             }));
 
-            const response = await fetch('http://localhost:8000/chat', {
+            // Stream tokens as Server-Sent Events so the reply appears as it is generated
+            const response = await fetch('http://localhost:8000/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -89,13 +90,50 @@ const Chatbot = () => {
                 }),
             });
 
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error('Network response was not ok');
             }
 
-            const data = await response.json();
-            const botMessage = { role: 'assistant', content: data.response };
-            setMessages(prev => [...prev, botMessage]);
+            // Placeholder assistant message, filled in token by token
+            setMessages(prev => [...prev, { role: 'assistant', content: "" }]);
+            setIsLoading(false);
+
+            const updateReply = (content) => {
+                setMessages(prev => {
+                    const updated = [...prev];
+                    updated[updated.length - 1] = { role: 'assistant', content };
+                    return updated;
+                });
+            };
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let reply = "";
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // SSE frames are separated by a blank line
+                const frames = buffer.split("\n\n");
+                buffer = frames.pop();
+                for (const frame of frames) {
+                    const isError = frame.startsWith("event: error");
+                    const dataLine = frame.split("\n").find(l => l.startsWith("data: "));
+                    if (!dataLine) continue;
+                    const data = JSON.parse(dataLine.slice(6));
+                    if (isError) {
+                        reply = data.message;
+                    } else if (data.token) {
+                        reply += data.token;
+                    } else if (data.done) {
+                        reply = data.response;
+                    }
+                    updateReply(reply);
+                }
+            }
 
         } catch (error) {
             console.error("Chat Error:", error);
@@ -35,7 +35,9 @@ const PatientView = () => {
                             <h3 className="text-lg font-bold text-green-800">Assessment Complete</h3>
                             <p className="text-sm font-semibold text-green-700">ID: {result.Patient_ID}</p>
                             <p className="text-green-700 mt-1">
-                                Your data has been analyzed. <strong>{result.Assigned_Doctor}</strong> ({result.Department}) has been notified and sent your complete <strong>EHR Packet</strong>.
+                                {result.Assigned_Doctor
+                                    ? <>Your data has been analyzed. <strong>{result.Assigned_Doctor}</strong> ({result.Department}) has been notified and sent your complete <strong>EHR Packet</strong>.</>
+                                    : <>Your data has been analyzed. You are number <strong>{result.Queue?.position}</strong> in the {result.Department} queue; the next available doctor will receive your <strong>EHR Packet</strong>.</>}
                             </p>
                         </div>
                     </div>
@@ -98,7 +98,10 @@ const TriageForm = ({ onTriageResult, className = "" }) => {
             });
 
             // Show Success Message
-            setSuccessMessage(`Patient Triaged: ${response.data.Predicted_Risk} Risk. Assigned to ${response.data.Assigned_Doctor}.`);
+            const assignment = response.data.Assigned_Doctor
+                ? `Assigned to ${response.data.Assigned_Doctor}.`
+                : `Queued for ${response.data.Department} (position ${response.data.Queue?.position}).`;
+            setSuccessMessage(`Patient Triaged: ${response.data.Predicted_Risk} Risk. ${assignment}`);
 
             // Clear success message after 5 seconds
             setTimeout(() => setSuccessMessage(null), 5000);